@@ -1,3 +1,4 @@
+import os
 from flask import Flask, jsonify
 from flask_admin import Admin
 from flask_restful import Api
@@ -19,6 +20,9 @@ jwt = JWTManager()
 
 app = Flask(__name__)
 app.config.from_object(Config)
+if not app.config["JWT_BLOCKLIST_DB"]:
+    os.makedirs(app.instance_path, exist_ok=True)
+    app.config["JWT_BLOCKLIST_DB"] = os.path.join(app.instance_path, "blocklist.db")
 print(f"--- Flask App SECRET_KEY: {app.config['SECRET_KEY']} ---")
 api = Api(app)
 jwt = JWTManager(app)
@@ -37,6 +41,9 @@ from app.utils.decorators import jwt_blacklist
 # Configure JWT to check the blacklist
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blocklist(jwt_header, jwt_payload):
+    # Tokens issued before the user's last "revoke all" are rejected without a DB lookup
+    if jwt_blacklist.is_user_revoked(int(jwt_payload["sub"]), jwt_payload.get("tva", 0)):
+        return True
     jti = jwt_payload["jti"]
     return jwt_blacklist.is_blocked(jti)
 
@@ -64,7 +71,25 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"] # Default for all routes
 )
 
+from app.utils import sql_instrumentation # Registers the per-request SQL counters
+from app.utils import stats_counters # Registers the admin stats counter hooks
+from app.utils import provider_ratings # Registers the provider rating aggregate hooks
+from app.utils import geo # Keeps Provider.geo_cell in step with the provider location
+from app.utils import booking_slots # Claims provider time slots for bookings (double-booking guard)
+from app.utils import catalog_cache # Drops cached catalog listings when the catalog changes
+from app.utils import surge # Feeds committed bookings into the surge pricing demand model
+from app.utils import search # Mirrors services, categories and specializations into the search index
+from app.utils import autocomplete # Patches the typeahead suggestions when the catalog changes
+from app.utils import inbox # Keeps each user's unread notification counter in step
+from app.utils import notification_dispatch # Queues outbox deliveries for new notifications and runs the dispatcher pool
+from app.utils import reminders # Keeps the booking/payment reminder wheel in step and runs its scheduler
+from app.utils import change_feed # Appends notification and booking status events for GET /events
 from app import routes
         # return app
-from cli import user_cli
+from cli import user_cli, stats_cli, search_cli, notify_cli, reminders_cli, bench_cli
 app.cli.add_command(user_cli)
+app.cli.add_command(stats_cli)
+app.cli.add_command(search_cli)
+app.cli.add_command(notify_cli)
+app.cli.add_command(reminders_cli)
+app.cli.add_command(bench_cli)
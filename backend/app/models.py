@@ -5,6 +5,7 @@ from datetime import datetime, date, timedelta, time
 from sqlalchemy import or_
 from werkzeug.security import generate_password_hash, check_password_hash
 import hashlib
+import time as _time # `time` is datetime.time, imported above
 import pytz
 import moment
 from app import app, db # Assuming 'app' and 'db' are initialized correctly in app/__init__.py
@@ -63,13 +64,16 @@ class Users(db.Model):
     password = db.Column(db.String(255), nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    last_login_at = db.Column(db.DateTime, nullable=True) # New field for last login timestamp
+    last_login_at = db.Column(db.DateTime, nullable=True) # Written behind by app/utils/touch_buffer.py
+    notifications_seen_at = db.Column(db.DateTime, nullable=True) # Last inbox view (read receipt), written behind like last_login_at
     email_verification_token = db.Column(db.String(255), nullable=True) # New field for email verification token
     email_verified_at = db.Column(db.DateTime, nullable=True) # New field for email verification timestamp
     phone_verification_token = db.Column(db.String(255), nullable=True) # New field for phone verification token
     phone_verified_at = db.Column(db.DateTime, nullable=True) # New field for phone verification timestamp
     password_reset_token = db.Column(db.String(255), nullable=True) # New field for password reset token
     password_reset_expiration = db.Column(db.DateTime, nullable=True) # New field for password reset token expiration
+    tokens_valid_after = db.Column(db.Integer, default=0, server_default='0', nullable=False) # Revocation epoch (epoch seconds) stamped into every token as "tva"
+    unread_notifications = db.Column(db.Integer, default=0, server_default='0', nullable=False) # Maintained by app/utils/inbox.py
 
     provider = db.relationship('Provider', backref='user', uselist=False, lazy='joined', cascade="all, delete-orphan")
     bookings = db.relationship('Booking', backref='customer', lazy='dynamic')
@@ -85,11 +89,22 @@ class Users(db.Model):
             self.set_password(kwargs['password'])
 
     def set_password(self, password):
-        self.password = generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
+        # Hashes inline; request handlers use app.utils.password_hashing to keep this off their threads
+        self.password = generate_password_hash(
+            password, method=app.config["PASSWORD_HASH_METHOD"], salt_length=app.config["PASSWORD_SALT_LENGTH"]
+        )
 
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    def revoke_all_tokens(self):
+        # Tokens stamped with an older epoch are rejected once this is committed
+        self.tokens_valid_after = max(int(_time.time()), (self.tokens_valid_after or 0) + 1)
+
+    def token_claims(self):
+        # Custom claims for access tokens; refresh tokens only carry "tva"
+        return {"role": self.role.value, "tva": self.tokens_valid_after or 0}
+
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
@@ -125,13 +140,32 @@ class Provider(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False)
     bio = db.Column(db.String(500), nullable=True)
-    rating = db.Column(db.Float, default=5.0)
+    rating = db.Column(db.Float, default=5.0) # rating_sum / rating_count, 5.0 until the first approved review
+    # Aggregates over approved reviews, maintained by app/utils/provider_ratings.py
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+    rating_1 = db.Column(db.Integer, default=0, nullable=False) # Per-star histogram
+    rating_2 = db.Column(db.Integer, default=0, nullable=False)
+    rating_3 = db.Column(db.Integer, default=0, nullable=False)
+    rating_4 = db.Column(db.Integer, default=0, nullable=False)
+    rating_5 = db.Column(db.Integer, default=0, nullable=False)
     is_available = db.Column(db.Boolean, default=True)
-    service_radius = db.Column(db.Float, nullable=True) # e.g., in miles or kilometers
+    service_radius = db.Column(db.Float, nullable=True) # in kilometers
+    latitude = db.Column(db.Float, nullable=True) # Provider's base location
+    longitude = db.Column(db.Float, nullable=True)
+    geo_cell = db.Column(db.Integer, nullable=True) # Grid cell of (latitude, longitude), set by app/utils/geo.py
     service_area_description = db.Column(db.String(255), nullable=True) # e.g., "Serves all of NYC", "Zip Codes: 10001, 10002"
     verification_status = db.Column(db.Enum(VerificationStatus), default=VerificationStatus.PENDING, nullable=False)
     verification_document_url = db.Column(db.String(255), nullable=True) # URL to uploaded verification document
 
+    # Backs "sort/filter providers by rating" with a keyset on (rating, id)
+    __table_args__ = (
+        db.Index('ix_providers_rating_id', 'rating', 'id'),
+        # Covers the whole geo search, so candidates never touch the table rows
+        db.Index('ix_providers_geo_cell', 'geo_cell', 'is_available', 'verification_status',
+                 'latitude', 'longitude', 'service_radius', 'user_id', 'rating'),
+    )
+
     bookings = db.relationship('Booking', backref='provider', lazy='dynamic')
     reviews_received = db.relationship('Review', backref='provider', lazy='dynamic')
     services_offered = db.relationship('ProviderService', backref='provider', lazy='dynamic', cascade="all, delete-orphan")
@@ -202,6 +236,18 @@ class Service(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Back the /services filters and sorts (app/resources/service.py); a
+    # category listing can be read in any sort order. SQLite appends the rowid
+    # (id) to each index, which breaks ties.
+    __table_args__ = (
+        db.Index('ix_services_category_active', 'category_id', 'is_active'),
+        db.Index('ix_services_category_id', 'category_id', 'id'),
+        db.Index('ix_services_category_name', 'category_id', 'name'),
+        db.Index('ix_services_category_price', 'category_id', 'base_price'),
+        db.Index('ix_services_name', 'name'),
+        db.Index('ix_services_base_price', 'base_price'),
+    )
+
     add_ons = db.relationship('ServiceAddOn', backref='service', lazy='dynamic', cascade="all, delete-orphan")
     bookings = db.relationship('Booking', backref='service', lazy='dynamic')
     providers = db.relationship('ProviderService', backref='service', lazy='dynamic', cascade="all, delete-orphan")
@@ -387,6 +433,18 @@ class Booking(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Availability and overlap checks read a provider's bookings by time range;
+    # the others back the /bookings filters (app/resources/booking.py), which
+    # are therefore read in scheduled_at order
+    __table_args__ = (
+        db.Index('ix_bookings_provider_scheduled', 'provider_id', 'scheduled_at'),
+        db.Index('ix_bookings_user_scheduled', 'user_id', 'scheduled_at'),
+        db.Index('ix_bookings_service_scheduled', 'service_id', 'scheduled_at'),
+        db.Index('ix_bookings_status_scheduled', 'status', 'scheduled_at'),
+        db.Index('ix_bookings_city_scheduled', 'city', 'scheduled_at'),
+        db.Index('ix_bookings_scheduled_at', 'scheduled_at'),
+    )
+
     payment = db.relationship('Payment', backref='booking', uselist=False, lazy='joined', cascade="all, delete-orphan")
     review = db.relationship('Review', backref='booking', uselist=False, lazy='joined', cascade="all, delete-orphan")
 
@@ -403,6 +461,16 @@ class Booking(db.Model):
         return cls.query.filter_by(id=_id).first()
 
 
+class BookingSlot(db.Model):
+    # One row per BOOKING_SLOT_MINUTES bucket a booking occupies. The primary key
+    # makes the database itself reject a second booking for the same provider
+    # and bucket, which keeps overlap checks correct under concurrent inserts.
+    __tablename__ = 'booking_slots'
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id', ondelete='CASCADE'), primary_key=True)
+    slot_start = db.Column(db.DateTime, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False, index=True)
+
+
 class Payment(db.Model):
     __tablename__ = 'payments'
     id = db.Column(db.Integer, primary_key=True)
@@ -414,9 +482,15 @@ class Payment(db.Model):
     transaction_ref = db.Column(db.String(100), unique=True, nullable=True) # Payment gateway transaction reference
     refund_amount = db.Column(db.Float, nullable=True) # New field for refund amount
     refund_status = db.Column(db.String(20), nullable=True) # New field for refund status (e.g., 'initiated', 'completed', 'failed')
+    due_at = db.Column(db.DateTime, nullable=True) # Pay-by deadline; defaults to the booking's start (app/utils/reminders.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Reminder scheduling reads unpaid deadlines by time range
+    __table_args__ = (
+        db.Index('ix_payments_status_due', 'status', 'due_at'),
+    )
+
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
@@ -449,6 +523,12 @@ class Review(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Back the /reviews filters (app/resources/review.py)
+    __table_args__ = (
+        db.Index('ix_reviews_provider_id', 'provider_id', 'id'),
+        db.Index('ix_reviews_user_id', 'user_id', 'id'),
+    )
+
 
     def save_to_db(self):
         db.session.add(self)
@@ -465,13 +545,17 @@ class Review(db.Model):
 
 class Notifications(db.Model):
     __tablename__ = 'notifications'
+    # Inbox reads are one range per (user, read state), newest first
+    __table_args__ = (
+        db.Index('ix_notifications_inbox', 'user_id', 'is_read', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     type = db.Column(db.Enum(NotificationType), nullable=True) # Changed to use NotificationType enum
     status = db.Column(db.String(20), default="sent", nullable=False) # e.g., "sent", "delivered", "failed"
-    is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     def save_to_db(self):
         db.session.add(self)
@@ -485,7 +569,108 @@ class Notifications(db.Model):
     def find_by_id(cls, _id):
         return cls.query.filter_by(id=_id).first()
 
+
+class NotificationDelivery(db.Model):
+    # Outbox: one row per (notification, channel), written in the same
+    # transaction as the notification and drained by app/utils/notification_dispatch.py
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        db.Index('ix_notification_outbox_due', 'status', 'available_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id', ondelete='CASCADE'), nullable=False, index=True)
+    channel = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), default="pending", nullable=False) # pending, sending, delivered, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False) # next attempt; lease expiry while sending
+    claimed_by = db.Column(db.String(32), nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ReminderLog(db.Model):
+    # One row per reminder sent; its primary key stops two workers (or a
+    # restarted one) from sending the same reminder twice
+    __tablename__ = 'reminder_log'
+    fire_at = db.Column(db.DateTime, primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True) # "booking" or "payment"
+    ref_id = db.Column(db.Integer, primary_key=True)
+
+
+class ChangeEvent(db.Model):
+    # Per-user change feed behind GET /events, written in the same transaction
+    # as the change (app/utils/change_feed.py) and kept for SSE_RETENTION_HOURS
+    __tablename__ = 'change_events'
+    __table_args__ = (
+        db.Index('ix_change_events_user_id', 'user_id', 'id'), # Last-Event-ID resume
+        {'sqlite_autoincrement': True}, # Event ids must never be reused after a purge
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(30), nullable=False) # "notification", "booking_status"
+    data = db.Column(db.Text, nullable=False) # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+# -------------------- Denormalized counters --------------------
+# Kept up to date by the mapper hooks in app/utils/stats_counters.py and
+# rebuilt with `flask stats rebuild`.
+
+class SiteCounters(db.Model):
+    __tablename__ = 'site_counters'
+    id = db.Column(db.Integer, primary_key=True) # Single row, id = 1
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    total_providers = db.Column(db.Integer, default=0, nullable=False)
+    total_bookings = db.Column(db.Integer, default=0, nullable=False)
+    active_services = db.Column(db.Integer, default=0, nullable=False)
+
+    @classmethod
+    def get(cls):
+        return cls.query.filter_by(id=1).first()
+
+
+class BookingDailyCount(db.Model):
+    __tablename__ = 'booking_daily_counts'
+    day = db.Column(db.Date, primary_key=True) # Day the booking was created (UTC)
+    status = db.Column(db.Enum(BookingStatus), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
     @classmethod
-    def find_all_for_user(cls, user_id):
-        return cls.query.filter_by(user_id=user_id).order_by(cls.created_at.desc()).all()
+    def find_range(cls, start, end):
+        return cls.query.filter(cls.day >= start, cls.day <= end).order_by(cls.day).all()
+
+
+
+# -------------------- Search index --------------------
+# Inverted index behind /search, kept in step by the mapper hooks in
+# app/utils/search.py and rebuilt with `flask search rebuild`.
+
+class SearchDocument(db.Model):
+    # One row per searchable catalog entry
+    __tablename__ = 'search_documents'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # ref_id * DOC_KINDS + kind code
+    kind = db.Column(db.String(20), nullable=False) # "service", "category" or "specialization"
+    ref_id = db.Column(db.Integer, nullable=False)
+    parent_id = db.Column(db.Integer, nullable=True) # Service.category_id / ProviderSpecialization.provider_id
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+    length = db.Column(db.Integer, default=0, nullable=False) # token count, for bm25 length normalization
+
+
+class SearchTerm(db.Model):
+    # Postings, clustered by (term, impact) so a term's best documents are read first
+    __tablename__ = 'search_terms'
+    term = db.Column(db.String(64), primary_key=True)
+    impact = db.Column(db.SmallInteger, primary_key=True) # quantized bm25 weight of the term in the document
+    doc_id = db.Column(db.Integer, db.ForeignKey('search_documents.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_search_terms_doc_term', 'doc_id', 'term'),
+        {'sqlite_with_rowid': False},
+    )
+
 
+class SearchVocabulary(db.Model):
+    __tablename__ = 'search_vocabulary'
+    term = db.Column(db.String(64), primary_key=True)
+    doc_count = db.Column(db.Integer, default=0, nullable=False) # documents containing the term, for idf
@@ -2,6 +2,9 @@ from flask import request
 from flask_restful import Resource
 from ..models import ServiceAddOn
 from ..schemas.addon import ServiceAddOnSchema
+from ..utils.pagination import paginate
+from ..utils.catalog_cache import catalog_cached
+from ..utils.sql_instrumentation import query_budget
 from app import db
 
 addon_schema = ServiceAddOnSchema()
@@ -33,9 +36,10 @@ class ServiceAddOnResource(Resource):
 
 
 class ServiceAddOnListResource(Resource):
+    @query_budget(1)
+    @catalog_cached
     def get(self):
-        addons = ServiceAddOn.query.all()
-        return addon_list_schema.dump(addons), 200
+        return paginate(ServiceAddOn.query, addon_list_schema, [ServiceAddOn.id]), 200
 
     def post(self):
         data = request.get_json()
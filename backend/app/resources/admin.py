@@ -1,17 +1,45 @@
+from datetime import datetime, timedelta
+from flask import request
 from flask_restful import Resource
-from ..models import Users, UserRole
-from ..models import Booking
-from ..models import Service
-from app import db
+from ..models import UserRole
+from ..models import SiteCounters, BookingDailyCount
 from app.utils.decorators import role_required # or jwt_required_wrapper
+from app.utils.sql_instrumentation import query_budget
 
 
 class AdminStatsResource(Resource):
     @role_required(UserRole.ADMIN) # Use role_required from app.utils.decorators
+    @query_budget(1)
     def get(self):
+        # Counters are maintained incrementally (app/utils/stats_counters.py)
+        counters = SiteCounters.get()
+        if counters is None:
+            return {"total_users": 0, "total_providers": 0, "total_bookings": 0, "active_services": 0}, 200
         return {
-            "total_users": Users.query.count(),
-            "total_providers": Users.query.filter_by(role=UserRole.PROVIDER).count(),
-            "total_bookings": Booking.query.count(),
-            "active_services": Service.query.filter_by(is_active=True).count(),
+            "total_users": counters.total_users,
+            "total_providers": counters.total_providers,
+            "total_bookings": counters.total_bookings,
+            "active_services": counters.active_services,
         }, 200
+
+
+class AdminBookingTrendsResource(Resource):
+    @role_required(UserRole.ADMIN)
+    @query_budget(1)
+    def get(self):
+        try:
+            days = int(request.args.get("days", 30))
+        except ValueError:
+            days = 0
+        if days < 1:
+            return {"message": "days must be a positive integer."}, 400
+        days = min(days, 366)
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=days - 1)
+
+        per_day = {}
+        for bucket in BookingDailyCount.find_range(start, end):
+            if not bucket.count:
+                continue
+            per_day.setdefault(bucket.day.isoformat(), {})[bucket.status.value] = bucket.count
+        return {"from": start.isoformat(), "to": end.isoformat(), "bookings_per_day": per_day}, 200
@@ -6,6 +6,8 @@ from flask_jwt_extended import create_access_token, create_refresh_token, jwt_re
 from app.models import Users, UserRole # Assuming UserRole is defined
 from app.schemas.user import UserLoginSchema
 from app.utils.decorators import jwt_blacklist # Import the blacklist for revocation
+from app.utils.password_hashing import HasherBusy, password_hasher
+from app.utils.touch_buffer import touches
 
 class UserLoginResource(Resource):
     def post(self):
@@ -17,22 +19,31 @@ class UserLoginResource(Resource):
 
         user = Users.find_by_email(user_data["email"]) or Users.find_by_username(user_data["username"])
 
-        if user and user.check_password(user_data["password"]):
+        verified = user is not None and password_hasher.verify(user.password, user_data["password"])
+
+        if verified:
             # Ensure user is active for login
             if not user.is_active:
                 return {"message": "Account is inactive. Please contact support."}, 403
 
-            # Update last login timestamp
-            user.last_login_at = datetime.utcnow()
-            user.save_to_db()
+            # Hashed with older parameters: upgrade it now that we have the plain password
+            if password_hasher.needs_rehash(user.password):
+                try:
+                    user.password = password_hasher.hash(user_data["password"])
+                    user.save_to_db()
+                except HasherBusy:
+                    pass # Tried again on the next login
+
+            # Written behind in a batch with other logins rather than committed here
+            touches.touch(Users.last_login_at, user.id, datetime.utcnow())
 
             # Create access and refresh tokens
             # We can add custom claims like user role here
-            additional_claims = {"role": user.role.value}
+            additional_claims = user.token_claims()
             # access_token = create_access_token(identity=user.id, additional_claims=additional_claims)
             # refresh_token = create_refresh_token(identity=user.id)
-            access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role.value})
-            refresh_token = create_refresh_token(identity=str(user.id))
+            access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
+            refresh_token = create_refresh_token(identity=str(user.id), additional_claims={"tva": additional_claims["tva"]})
 
             return {
                 "message": "Logged in successfully",
@@ -56,13 +67,24 @@ class TokenRefreshResource(Resource):
             return {"message": "Account is inactive. Cannot refresh token."}, 403
 
         # Create a new access token
-        additional_claims = {"role": user.role.value}
+        additional_claims = user.token_claims()
         new_access_token = create_access_token(identity=current_user_id, additional_claims=additional_claims)
         return {"access_token": new_access_token}, 200
 
 class UserLogoutResource(Resource):
     @jwt_required()
     def post(self):
-        jti = get_jwt()["jti"] # Get the JTI (JWT ID) of the current token
-        jwt_blacklist.add(jti) # Add it to the blacklist
-        return {"message": "Successfully logged out"}, 200
\ No newline at end of file
+        claims = get_jwt()
+        jwt_blacklist.add(claims["jti"], claims["exp"]) # Blocked until the token would have expired anyway
+        return {"message": "Successfully logged out"}, 200
+
+class UserLogoutAllResource(Resource):
+    @jwt_required()
+    def post(self):
+        user = Users.find_by_id(get_jwt_identity())
+        if not user:
+            return {"message": "User not found."}, 404
+        # Bumps the user's revocation epoch: every access and refresh token issued so far stops working
+        user.revoke_all_tokens()
+        user.save_to_db()
+        return {"message": "Logged out from all sessions"}, 200
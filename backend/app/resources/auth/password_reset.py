@@ -1,6 +1,7 @@
 from flask_restful import Resource
 from flask import request, jsonify
 from app.models import Users
+from app.utils.password_hashing import password_hasher
 from app.schemas.user import PasswordResetRequestSchema, PasswordResetConfirmSchema
 from datetime import datetime, timedelta
 import uuid
@@ -53,7 +54,8 @@ class PasswordResetConfirmResource(Resource):
             user.save_to_db()
             return {"message": "Invalid or expired token."}, 400
 
-        user.set_password(data["new_password"])
+        user.password = password_hasher.hash(data["new_password"])
+        user.revoke_all_tokens() # Sign out any session opened with the old password
         user.password_reset_token = None
         user.password_reset_expiration = None
         user.save_to_db()
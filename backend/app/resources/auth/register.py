@@ -2,7 +2,7 @@ from flask import request
 from flask_restful import Resource
 from ...models import Users, UserRole 
 from app import db
-from werkzeug.security import generate_password_hash
+from app.utils.password_hashing import password_hasher
 from ...schemas.user import UserRegisterSchema, UserSchema
 
 user_schema = UserSchema()
@@ -31,6 +31,8 @@ class UserRegisterResource(Resource):
         if Users.find_by_phone(user_data.get("phone")):
             return {"message": "Phone number already exists"}, 409
 
+        password_hash = password_hasher.hash(user_data["password"])
+
         user = Users(
             firstname=user_data.get("firstname"),
             lastname=user_data.get("lastname"),
@@ -38,9 +40,9 @@ class UserRegisterResource(Resource):
             email=user_data["email"],
             gender=user_data.get("gender"),
             phone=user_data.get("phone"),
-            password=user_data["password"], # This calls set_password
             is_verified=False # New users are not verified by default
         )
+        user.password = password_hash # Not Users(password=...), which hashes inline
 
         # Generate email verification token
         user.email_verification_token = str(uuid.uuid4())
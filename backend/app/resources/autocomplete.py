@@ -0,0 +1,23 @@
+from flask import request, current_app
+from flask_restful import Resource, abort
+from ..utils.autocomplete import autocomplete
+from app import app, limiter
+
+
+class AutocompleteResource(Resource):
+    decorators = [limiter.limit(app.config["AUTOCOMPLETE_RATE_LIMIT"])]
+
+    def get(self):
+        """
+        Typeahead suggestions for the search box, from memory (no DB access).
+        Example: /autocomplete?q=pipe+re&limit=8
+        """
+        limit = request.args.get("limit", current_app.config["AUTOCOMPLETE_DEFAULT_LIMIT"], type=int)
+        if limit is None or limit < 1:
+            abort(400, message="limit must be a positive integer.")
+        limit = min(limit, current_app.config["AUTOCOMPLETE_MAX_LIMIT"])
+
+        suggestions = autocomplete.complete(request.args.get("q", ""), limit)
+        items = [{"kind": s.kind, "id": s.id, "label": s.label} for s in suggestions]
+        # Suggestions only drift with popularity; let browsers reuse them for a minute
+        return {"items": items}, 200, {"Cache-Control": "public, max-age=60"}
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta
+from flask import request
+from flask_restful import Resource
+from ..models import Provider
+from ..utils.availability import provider_availability
+from ..utils.sql_instrumentation import query_budget
+from app import app
+
+
+def _parse_window():
+    # ?from=YYYY-MM-DD&to=YYYY-MM-DD, defaulting to the next 7 days
+    try:
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else datetime.utcnow().date()
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else start + timedelta(days=6)
+    except ValueError:
+        return None, None, {"message": "from/to must be dates (YYYY-MM-DD)."}
+    if end < start:
+        return None, None, {"message": "to must not be before from."}
+    if (end - start).days + 1 > app.config["AVAILABILITY_MAX_DAYS"]:
+        return None, None, {"message": f"Window is limited to {app.config['AVAILABILITY_MAX_DAYS']} days."}
+    return start, end, None
+
+
+def _dump(provider_id, availability):
+    return {
+        "provider_id": provider_id,
+        "slot_minutes": availability["slot_minutes"],
+        "free": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in availability["free"]],
+        "slots": [slot.isoformat() for slot in availability["slots"]],
+    }
+
+
+class ProviderAvailabilityResource(Resource):
+    @query_budget(5)
+    def get(self, provider_id):
+        start, end, error = _parse_window()
+        if error:
+            return error, 400
+        if not Provider.find_by_id(provider_id):
+            return {"message": "Provider not found."}, 404
+
+        service_id = request.args.get("service_id", type=int)
+        availability = provider_availability(
+            [provider_id], start, end, service_id, step=app.config["AVAILABILITY_SLOT_STEP_MINUTES"],
+            grid=app.config["BOOKING_SLOT_MINUTES"],
+        )
+        return {"from": start.isoformat(), "to": end.isoformat(), "service_id": service_id,
+                **_dump(provider_id, availability[provider_id])}, 200
+
+
+# Batched form: GET /providers/availability?provider_ids=1,2,3&from=&to=&service_id=
+class ProviderAvailabilityBatchResource(Resource):
+    @query_budget(4)
+    def get(self):
+        start, end, error = _parse_window()
+        if error:
+            return error, 400
+        try:
+            provider_ids = [int(p) for p in request.args.get("provider_ids", "").split(",") if p.strip()]
+        except ValueError:
+            return {"message": "provider_ids must be a comma-separated list of ids."}, 400
+        if not provider_ids:
+            return {"message": "provider_ids is required."}, 400
+        if len(provider_ids) > app.config["AVAILABILITY_MAX_PROVIDERS"]:
+            return {"message": f"At most {app.config['AVAILABILITY_MAX_PROVIDERS']} providers per request."}, 400
+
+        service_id = request.args.get("service_id", type=int)
+        availability = provider_availability(
+            provider_ids, start, end, service_id, step=app.config["AVAILABILITY_SLOT_STEP_MINUTES"],
+            grid=app.config["BOOKING_SLOT_MINUTES"],
+        )
+        return {
+            "from": start.isoformat(), "to": end.isoformat(), "service_id": service_id,
+            "items": [_dump(provider_id, availability[provider_id]) for provider_id in provider_ids],
+        }, 200
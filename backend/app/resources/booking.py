@@ -1,24 +1,70 @@
+from datetime import datetime
 from flask import request
 from flask_restful import Resource
-from ..models import Booking
+from ..models import Booking, BookingStatus, Notifications, NotificationType
 from ..schemas.booking import BookingSchema
-from app import db
+from ..schemas.payment import PaymentSchema
+from ..schemas.review import ReviewSchema
+from ..utils.booking_slots import BookingConflict, on_slot_grid
+from ..utils.conditional import conditional
+from ..utils.fieldsets import fieldset
+from ..utils.filters import ListSpec, Filter, RANGE, parse_datetime, parse_enum
+from ..utils.pagination import paginate
+from ..utils.serializers import serializer_for
+from ..utils.sql_instrumentation import query_budget
+from app import app, db
 
 booking_schema = BookingSchema()
-booking_list_schema = BookingSchema(many=True)
+booking_serializer = serializer_for(BookingSchema)
+
+CONFLICT_MESSAGE = "The provider is already booked for that time."
+
+# ?expand= targets; both are lazy="joined" on the model, so they are noload()ed unless asked for
+BOOKING_EXPANDS = {"payment": ("payment", PaymentSchema), "review": ("review", ReviewSchema)}
+
+# e.g. /bookings?status=confirmed&city=Monrovia&scheduled_at[gte]=2030-01-06&sort=-scheduled_at
+BOOKING_LIST = ListSpec(
+    Booking,
+    filters={
+        "status": Filter(Booking.status, parse=parse_enum(BookingStatus)),
+        "city": Filter(Booking.city),
+        "user_id": Filter(Booking.user_id, parse=int),
+        "provider_id": Filter(Booking.provider_id, parse=int),
+        "service_id": Filter(Booking.service_id, parse=int),
+        "scheduled_at": Filter(Booking.scheduled_at, ops=RANGE, parse=parse_datetime),
+    },
+    sorts={"id": Booking.id, "scheduled_at": Booking.scheduled_at},
+)
 
 class BookingResource(Resource):
+    @conditional(Booking, "booking_id", expandable=BOOKING_EXPANDS)
     def get(self, booking_id):
-        booking = Booking.query.get_or_404(booking_id)
-        return booking_schema.dump(booking), 200
+        options, serializer = fieldset(Booking, BookingSchema, expandable=BOOKING_EXPANDS)
+        booking = Booking.query.options(*options).get_or_404(booking_id)
+        return serializer.dump(booking), 200
 
+    @conditional(Booking, "booking_id")
     def put(self, booking_id):
         booking = Booking.query.get_or_404(booking_id)
         data = request.get_json()
-        for field in ["status", "scheduled_date", "scheduled_time", "address", "notes"]:
+        try:
+            if "status" in data:
+                booking.status = BookingStatus(data["status"])
+            if "scheduled_at" in data:
+                booking.scheduled_at = datetime.fromisoformat(data["scheduled_at"])
+        except (TypeError, ValueError) as err:
+            return {"message": str(err)}, 400
+        if "scheduled_at" in data and not on_slot_grid(booking.scheduled_at, app.config["BOOKING_SLOT_MINUTES"]):
+            return {"message": f"Bookings start on a {app.config['BOOKING_SLOT_MINUTES']}-minute boundary."}, 400
+        for field in ["street_address", "city", "state", "zip_code", "notes"]:
             setattr(booking, field, data.get(field, getattr(booking, field)))
-        db.session.commit()
-        return booking_schema.dump(booking), 200
+        try:
+            db.session.commit()
+        except BookingConflict:
+            # A reschedule collided with another booking (see app/utils/booking_slots.py)
+            db.session.rollback()
+            return {"message": CONFLICT_MESSAGE}, 409
+        return booking_serializer.dump(booking), 200
 
     def delete(self, booking_id):
         booking = Booking.query.get_or_404(booking_id)
@@ -27,12 +73,31 @@ class BookingResource(Resource):
         return {"message": "Booking cancelled"}, 204
 
 class BookingListResource(Resource):
+    @query_budget(3) # One more per expanded relationship
     def get(self):
-        return booking_list_schema.dump(Booking.query.all()), 200
+        query, key_columns, descending = BOOKING_LIST.apply(Booking.query)
+        options, serializer = fieldset(Booking, BookingSchema, many=True, expandable=BOOKING_EXPANDS, required=key_columns)
+        return paginate(query.options(*options), serializer, key_columns, descending=descending), 200
 
     def post(self):
         data = request.get_json()
-        new_booking = booking_schema.load(data)
+        try:
+            new_booking = booking_schema.load(data)
+        except Exception as e:
+            return {"message": f"Validation error: {str(e)}"}, 400
+
         db.session.add(new_booking)
-        db.session.commit()
-        return booking_schema.dump(new_booking), 201
+        # Queued in the same commit; delivery happens off the request (app/utils/notification_dispatch.py)
+        db.session.add(Notifications(
+            user_id=new_booking.user_id,
+            type=NotificationType.BOOKING_CONFIRMATION,
+            message=f"Your booking for {new_booking.scheduled_at:%Y-%m-%d %H:%M} has been received.",
+        ))
+        try:
+            # The provider's time buckets are claimed in the same flush; an
+            # overlapping booking fails on the booking_slots primary key
+            db.session.commit()
+        except BookingConflict:
+            db.session.rollback()
+            return {"message": CONFLICT_MESSAGE}, 409
+        return booking_serializer.dump(new_booking), 201
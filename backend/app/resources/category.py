@@ -3,6 +3,7 @@ from flask_restful import Resource
 from ..schemas.category import ServiceCategorySchema
 from app import db
 from ..models import ServiceCategory
+from ..utils.catalog_cache import catalog_cached
 
 
 category_schema = ServiceCategorySchema()
@@ -28,6 +29,7 @@ class ServiceCategoryResource(Resource):
         return {"message": "Category deleted"}, 204
 
 class ServiceCategoryListResource(Resource):
+    @catalog_cached
     def get(self):
         return category_list_schema.dump(ServiceCategory.query.all()), 200
 
@@ -0,0 +1,70 @@
+import time
+from flask import Response, request, g
+from flask_restful import Resource
+from flask_jwt_extended import get_jwt
+from ..utils.change_feed import change_feed
+from ..utils.decorators import jwt_required_wrapper
+from app import app
+
+RETRY_MS = 3000 # client reconnect delay
+
+
+def _format(feed_event):
+    return f"id: {feed_event.id}\nevent: {feed_event.kind}\ndata: {feed_event.data}\n\n"
+
+
+def _stream(subscription, backlog, reset, heartbeat, expires_at):
+    # Runs after the request context is gone; only waits on the subscription
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if reset:
+            yield "event: reset\ndata: {}\n\n" # Missed too much: refetch, then follow the stream
+        if backlog:
+            yield "".join(_format(e) for e in backlog)
+        # End with the access token; the client reconnects with a fresh one and Last-Event-ID
+        while not subscription.overflowed:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                break
+            batch = subscription.take(min(heartbeat, remaining))
+            yield "".join(_format(e) for e in batch) if batch else ": ping\n\n"
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+class EventStreamResource(Resource):
+    @jwt_required_wrapper
+    def get(self):
+        """
+        Server-Sent Events for the caller: "notification" (new notifications)
+        and "booking_status" (booking status transitions). Resumes after
+        the Last-Event-ID header (or ?last_event_id=).
+        """
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        if last_event_id is not None:
+            try:
+                last_event_id = int(last_event_id)
+            except ValueError:
+                return {"message": "Last-Event-ID must be an integer."}, 400
+
+        subscription = change_feed.subscribe(g.principal.id)
+        if subscription is None:
+            return {"message": "Too many open event streams, retry later."}, 503, {"Retry-After": str(RETRY_MS // 1000)}
+
+        # Subscribed before reading the backlog, so nothing committed in between is lost
+        backlog, reset = [], False
+        try:
+            if last_event_id is not None:
+                subscription.last_id = last_event_id
+                backlog, reset = change_feed.backfill(g.principal.id, last_event_id)
+                if backlog:
+                    subscription.last_id = backlog[-1].id
+        except Exception:
+            change_feed.unsubscribe(subscription)
+            raise
+
+        stream = _stream(subscription, backlog, reset, app.config["SSE_HEARTBEAT_SECONDS"], get_jwt()["exp"])
+        return Response(stream, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no", # Stop nginx from buffering the stream
+        })
@@ -1,15 +1,55 @@
-from flask import request
-from flask_restful import Resource
-from ..models import Notifications
+from datetime import datetime
+from flask import request, g
+from flask_restful import Resource, abort
+from ..models import Notifications, Users
 from ..schemas.notification import NotificationSchema
+from ..utils.decorators import jwt_required_wrapper
+from ..utils.inbox import INBOX_KEY, inbox_page, mark_read, unread_count
+from ..utils.pagination import decode_cursor, encode_cursor, get_page_limit
+from ..utils.sql_instrumentation import query_budget
+from ..utils.touch_buffer import touches
 from .. import db
 
 notification_schema = NotificationSchema()
 notification_list_schema = NotificationSchema(many=True)
 
+
+def _inbox_cursor(value):
+    values = decode_cursor(value, INBOX_KEY)
+    if values is None:
+        abort(400, message="Invalid cursor.")
+    return values
+
+
 class NotificationListResource(Resource):
+    @jwt_required_wrapper
+    @query_budget(1)
     def get(self):
-        return notification_list_schema.dump(Notifications.query.all()), 200
+        """
+        The caller's inbox, newest first. ?unread=true for unread only.
+        read_cursor marks the newest item shown; POST it to /notifications/read
+        to mark everything up to it read without touching newer arrivals.
+        """
+        limit = get_page_limit()
+        after = request.args.get("after")
+        before = _inbox_cursor(after) if after else None
+        unread_only = request.args.get("unread", "").lower() in ("1", "true")
+
+        # Fetch one extra row so we know whether there is another page
+        rows = inbox_page(g.principal.id, limit + 1, before=before, unread_only=unread_only)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].created_at, rows[-1].id])
+        read_cursor = encode_cursor([rows[0].created_at, rows[0].id]) if rows else None
+        touches.touch(Users.notifications_seen_at, g.principal.id, datetime.utcnow()) # Read receipt, written behind
+
+        return {
+            "items": notification_list_schema.dump(rows),
+            "next_cursor": next_cursor,
+            "read_cursor": read_cursor,
+            "limit": limit,
+        }, 200
 
     def post(self):
         data = request.get_json()
@@ -19,6 +59,31 @@ class NotificationListResource(Resource):
         return notification_schema.dump(new_notification), 201
 
 
+class NotificationUnreadCountResource(Resource):
+    @jwt_required_wrapper
+    @query_budget(1)
+    def get(self):
+        # Badge poll: reads the maintained counter off the user's row
+        return {"unread": unread_count(g.principal.id) or 0}, 200
+
+
+class NotificationMarkReadResource(Resource):
+    @jwt_required_wrapper
+    @query_budget(2)
+    def post(self):
+        """
+        Marks the caller's notifications read in bulk.
+        Body: {"up_to": <read_cursor>} marks that notification and older ones;
+        no body (or no up_to) marks all of them.
+        """
+        data = request.get_json(silent=True) or {}
+        up_to = data.get("up_to")
+        if up_to is not None and not isinstance(up_to, str):
+            abort(400, message="up_to must be a cursor string.")
+        marked = mark_read(g.principal.id, up_to=_inbox_cursor(up_to) if up_to else None)
+        return {"marked": marked}, 200
+
+
 class NotificationResource(Resource):
     def get(self, notification_id):
         notification = Notifications.query.get_or_404(notification_id)
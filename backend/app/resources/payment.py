@@ -2,15 +2,19 @@ from flask import request
 from flask_restful import Resource
 from ..models import Payment
 from ..schemas.payment import PaymentSchema
+from ..utils.pagination import paginate
+from ..utils.sql_instrumentation import query_budget
+from ..utils.conditional import conditional
+from ..utils.fieldsets import fieldset
 from .. import db
 
 payment_schema = PaymentSchema()
-payment_list_schema = PaymentSchema(many=True)
 
 class PaymentListResource(Resource):
+    @query_budget(1)
     def get(self):
-        payments = Payment.query.all()
-        return payment_list_schema.dump(payments), 200
+        options, serializer = fieldset(Payment, PaymentSchema, many=True)
+        return paginate(Payment.query.options(*options), serializer, [Payment.id]), 200
 
     def post(self):
         data = request.get_json()
@@ -25,10 +29,13 @@ class PaymentListResource(Resource):
 
 
 class PaymentResource(Resource):
+    @conditional(Payment, "payment_id")
     def get(self, payment_id):
-        payment = Payment.query.get_or_404(payment_id)
-        return payment_schema.dump(payment), 200
+        options, serializer = fieldset(Payment, PaymentSchema)
+        payment = Payment.query.options(*options).get_or_404(payment_id)
+        return serializer.dump(payment), 200
 
+    @conditional(Payment, "payment_id")
     def put(self, payment_id):
         payment = Payment.query.get_or_404(payment_id)
         data = request.get_json()
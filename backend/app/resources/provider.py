@@ -1,16 +1,39 @@
 from flask import request
 from flask_restful import Resource
-from ..models import Users, UserRole
+from sqlalchemy.orm import contains_eager
+from ..models import Users, UserRole, Provider
 from ..schemas.user import UserSchema
-from app import db
+from ..utils.pagination import paginate
+from ..utils.serializers import serializer_for
+from ..utils.sql_instrumentation import query_budget
+from ..utils.geo import search_providers
+from app import app, db
 
 provider_schema = UserSchema()
-provider_list_schema = UserSchema(many=True)
+provider_list_schema = serializer_for(UserSchema, many=True)
 
 class ProviderListResource(Resource):
+    @query_budget(1)
     def get(self):
-        providers = Users.query.filter_by(role=UserRole.PROVIDER).all()
-        return provider_list_schema.dump(providers), 200
+        providers = Users.query.filter_by(role=UserRole.PROVIDER)
+
+        # ?sort=rating and ?min_rating= use the (rating, id) index on providers
+        min_rating = request.args.get("min_rating")
+        if min_rating is not None:
+            try:
+                min_rating = float(min_rating)
+            except ValueError:
+                return {"message": "Invalid value for 'min_rating'."}, 400
+        if request.args.get("sort") == "rating" or min_rating is not None:
+            providers = providers.join(Provider, Provider.user_id == Users.id).options(contains_eager(Users.provider))
+            if min_rating is not None:
+                providers = providers.filter(Provider.rating >= min_rating)
+        if request.args.get("sort") == "rating":
+            return paginate(
+                providers, provider_list_schema, [Provider.rating, Provider.id], descending=True,
+                cursor_values=lambda user: [user.provider.rating, user.provider.id],
+            ), 200
+        return paginate(providers, provider_list_schema, [Users.id]), 200
 
     def post(self):
         data = request.get_json()
@@ -21,6 +44,33 @@ class ProviderListResource(Resource):
         return provider_schema.dump(new_provider), 201
 
 
+class ProviderSearchResource(Resource):
+    @query_budget(1)
+    def get(self):
+        lat = request.args.get("lat", type=float)
+        lng = request.args.get("lng", type=float)
+        service_id = request.args.get("service_id", type=int)
+        if lat is None or lng is None or service_id is None:
+            return {"message": "lat, lng and service_id are required."}, 400
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return {"message": "lat/lng out of range."}, 400
+        try:
+            limit = int(request.args.get("limit", 20))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return {"message": "limit must be a positive integer."}, 400
+        limit = min(limit, 100)
+
+        results = search_providers(
+            db.session, lat, lng, service_id,
+            max_radius_km=app.config["PROVIDER_SEARCH_MAX_RADIUS_KM"],
+            default_radius_km=app.config["PROVIDER_DEFAULT_SERVICE_RADIUS_KM"],
+            limit=limit,
+        )
+        return {"items": results}, 200
+
+
 class ProviderResource(Resource):
     def get(self, provider_id):
         provider = Users.query.filter_by(id=provider_id, role=UserRole.PROVIDER).first_or_404()
@@ -0,0 +1,22 @@
+from flask import request
+from flask_restful import Resource
+from ..schemas.quote import QuoteRequestSchema
+from ..utils.pricing import pricing_engine
+from ..utils.sql_instrumentation import query_budget
+from app import app
+
+quote_request_schema = QuoteRequestSchema()
+
+
+class QuoteResource(Resource):
+    @query_budget(3)
+    def post(self):
+        try:
+            data = quote_request_schema.load(request.get_json())
+        except Exception as e:
+            return {"message": f"Validation error: {str(e)}"}, 400
+
+        items = data["items"]
+        if len(items) > app.config["QUOTE_MAX_ITEMS"]:
+            return {"message": f"At most {app.config['QUOTE_MAX_ITEMS']} items per quote request."}, 400
+        return {"items": pricing_engine.quote_many(items)}, 200
@@ -2,14 +2,27 @@ from flask import request
 from flask_restful import Resource
 from ..models import Review
 from ..schemas.review import ReviewSchema
+from ..utils.pagination import paginate
+from ..utils.sql_instrumentation import query_budget
+from ..utils.conditional import conditional
+from ..utils.fieldsets import fieldset
+from ..utils.filters import ListSpec, Filter
 from .. import db
 
 review_schema = ReviewSchema()
-review_list_schema = ReviewSchema(many=True)
+
+REVIEW_LIST = ListSpec(
+    Review,
+    filters={"provider_id": Filter(Review.provider_id, parse=int), "user_id": Filter(Review.user_id, parse=int)},
+    sorts={"id": Review.id},
+)
 
 class ReviewListResource(Resource):
+    @query_budget(1)
     def get(self):
-        return review_list_schema.dump(Review.query.all()), 200
+        query, key_columns, descending = REVIEW_LIST.apply(Review.query)
+        options, serializer = fieldset(Review, ReviewSchema, many=True, required=key_columns)
+        return paginate(query.options(*options), serializer, key_columns, descending=descending), 200
 
     def post(self):
         data = request.get_json()
@@ -20,10 +33,13 @@ class ReviewListResource(Resource):
 
 
 class ReviewResource(Resource):
+    @conditional(Review, "review_id")
     def get(self, review_id):
-        review = Review.query.get_or_404(review_id)
-        return review_schema.dump(review), 200
+        options, serializer = fieldset(Review, ReviewSchema)
+        review = Review.query.options(*options).get_or_404(review_id)
+        return serializer.dump(review), 200
 
+    @conditional(Review, "review_id")
     def put(self, review_id):
         review = Review.query.get_or_404(review_id)
         data = request.get_json()
@@ -0,0 +1,56 @@
+from flask import request, current_app
+from flask_restful import Resource, abort
+from sqlalchemy import Integer, column
+from ..utils.pagination import decode_cursor, encode_cursor, get_page_limit
+from ..utils.search import KINDS, TooManyTerms, search
+from app import db
+
+# Key each kind's parent id is returned under
+PARENT_KEYS = {"service": "category_id", "specialization": "provider_id"}
+_OFFSET = column("offset", Integer)
+
+
+class SearchResource(Resource):
+    def get(self):
+        """
+        Ranked full-text search over services, categories and provider specializations.
+        Example: /search?q=pipe+repair&kind=specialization&limit=20
+        """
+        text_query = (request.args.get("q") or "").strip()
+        if not text_query:
+            abort(400, message="q is required.")
+        kind = request.args.get("kind")
+        if kind is not None and kind not in KINDS:
+            abort(400, message=f"kind must be one of: {', '.join(KINDS)}.")
+
+        # Ranked results have no stable sort key to page on, so the cursor
+        # carries an offset, capped at SEARCH_MAX_RESULTS
+        limit = get_page_limit()
+        offset = 0
+        after = request.args.get("after")
+        if after:
+            values = decode_cursor(after, [_OFFSET])
+            if values is None or not isinstance(values[0], int) or values[0] < 0:
+                abort(400, message="Invalid cursor.")
+            offset = values[0]
+        max_results = current_app.config["SEARCH_MAX_RESULTS"]
+        limit = max(min(limit, max_results - offset), 0)
+
+        try:
+            rows = search(db.session, text_query, kind=kind, limit=limit + 1, offset=offset) if limit else []
+        except TooManyTerms as err:
+            abort(400, message=str(err))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if offset + limit < max_results:
+                next_cursor = encode_cursor([offset + limit])
+
+        items = []
+        for row in rows:
+            item = {"kind": row["kind"], "id": row["ref_id"], "title": row["title"],
+                    "snippet": row["snippet"], "score": row["score"]}
+            if row["kind"] in PARENT_KEYS:
+                item[PARENT_KEYS[row["kind"]]] = row["parent_id"]
+            items.append(item)
+        return {"items": items, "next_cursor": next_cursor, "limit": limit}, 200
@@ -1,18 +1,41 @@
 from flask import request
 from flask_restful import Resource
 from ..models import Service # Adjust import path
+from ..schemas.category import ServiceCategorySchema
 from ..schemas.service import ServiceSchema
+from ..utils.pagination import paginate
+from ..utils.conditional import conditional
+from ..utils.catalog_cache import catalog_cached
+from ..utils.fieldsets import fieldset
+from ..utils.filters import ListSpec, Filter, RANGE
+from ..utils.serializers import serializer_for
+from ..utils.sql_instrumentation import query_budget
 from app import db
 
 service_schema = ServiceSchema()
-service_list_schema = ServiceSchema(many=True)
+service_serializer = serializer_for(ServiceSchema)
+
+SERVICE_EXPANDS = {"category": ("category", ServiceCategorySchema)}
+
+SERVICE_LIST = ListSpec(
+    Service,
+    filters={
+        "category_id": Filter(Service.category_id, parse=int),
+        "name": Filter(Service.name, ops=("eq", "in")),
+        "base_price": Filter(Service.base_price, ops=RANGE, parse=float),
+    },
+    sorts={"id": Service.id, "name": Service.name, "base_price": Service.base_price},
+)
 
 
 class ServiceResource(Resource):
+    @conditional(Service, "service_id", expandable=SERVICE_EXPANDS)
     def get(self, service_id):
-        service = Service.query.get_or_404(service_id)
-        return service_schema.dump(service), 200
+        options, serializer = fieldset(Service, ServiceSchema, expandable=SERVICE_EXPANDS)
+        service = Service.query.options(*options).get_or_404(service_id)
+        return serializer.dump(service), 200
 
+    @conditional(Service, "service_id")
     def put(self, service_id):
         service = Service.query.get_or_404(service_id)
         data = request.get_json()
@@ -29,7 +52,7 @@ class ServiceResource(Resource):
         service.is_active = data.get("is_active", service.is_active)
 
         db.session.commit()
-        return service_schema.dump(service), 200
+        return service_serializer.dump(service), 200
 
     def delete(self, service_id):
         service = Service.query.get_or_404(service_id)
@@ -39,9 +62,12 @@ class ServiceResource(Resource):
 
 
 class ServiceListResource(Resource):
+    @query_budget(2) # One more with ?expand=category
+    @catalog_cached
     def get(self):
-        services = Service.query.all()
-        return service_list_schema.dump(services), 200
+        query, key_columns, descending = SERVICE_LIST.apply(Service.query)
+        options, serializer = fieldset(Service, ServiceSchema, many=True, expandable=SERVICE_EXPANDS, required=key_columns)
+        return paginate(query.options(*options), serializer, key_columns, descending=descending), 200
 
     def post(self):
         data = request.get_json()
@@ -52,4 +78,4 @@ class ServiceListResource(Resource):
 
         db.session.add(new_service)
         db.session.commit()
-        return service_schema.dump(new_service), 201
+        return service_serializer.dump(new_service), 201
@@ -14,18 +14,30 @@ from app.schemas.user import (
 )
 from app import db
 from flask_jwt_extended import jwt_required
-from app.utils.decorators import jwt_required_wrapper, role_required
+from app.utils.decorators import jwt_required_wrapper, role_required, get_current_user
 from app.utils.decorators import jwt_blacklist # Assuming this is available if needed for token revocation
+from app.utils.pagination import paginate
+from app.utils.sql_instrumentation import query_budget
+from app.utils.conditional import conditional
+from app.utils.serializers import serializer_for
+from app.utils.fieldsets import fieldset
 
-user_schema = UserSchema()
+user_schema = serializer_for(UserSchema)
 user_update_schema = UserUpdateSchema()
 requested_role_enum = UserRoleRequestSchema()
 
+# Users.provider is lazy="joined"; only load it when ?expand=provider asks for it
+USER_EXPANDS = {"provider": ("provider", ProviderProfileSchema)}
+# In UserSchema but written behind (app/utils/touch_buffer.py), without moving updated_at
+USER_TOUCHED = (Users.last_login_at, Users.notifications_seen_at)
+
 
 class UserDetailResource(Resource):
+    @conditional(Users, "user_id", expandable=USER_EXPANDS, touched=USER_TOUCHED)
     def get(self, user_id):
-        user = Users.query.get_or_404(user_id)
-        return user_schema.dump(user), 200
+        options, serializer = fieldset(Users, UserSchema, expandable=USER_EXPANDS)
+        user = Users.query.options(*options).get_or_404(user_id)
+        return serializer.dump(user), 200
 
     def delete(self, user_id):
         user = Users.query.get_or_404(user_id)
@@ -43,13 +55,14 @@ class UserProfileUpdateResource(Resource):
         db.session.commit()
         return user_schema.dump(user), 200
 
-# Resource for listing all users (Admin only) or self (jwt_required_wrapper handles G.user context)
+# Resource for listing all users (Admin only) or self (jwt_required_wrapper handles g.principal context)
 class UserListResource(Resource):
     @role_required(UserRole.ADMIN)
+    @query_budget(2) # One more with ?expand=provider
     def get(self):
-        users = Users.query.all()
         # Exclude sensitive fields like password hash from schema dump
-        return UserSchema(many=True).dump(users), 200
+        options, serializer = fieldset(Users, UserSchema, many=True, expandable=USER_EXPANDS)
+        return paginate(Users.query.options(*options), serializer, [Users.id]), 200
 
 
 # Resource for a single user (GET, PUT, DELETE)
@@ -61,11 +74,11 @@ class UserResource(Resource):
             return {"message": "User not found"}, 404
 
         # Authorization: User can only view their own profile, or admin can view any
-        if g.user.id != user.id and g.user.role != UserRole.ADMIN:
+        if g.principal.id != user.id and g.principal.role != UserRole.ADMIN:
             return {"message": "Unauthorized access"}, 403
 
         # Use UserSchema for dumping data
-        return UserSchema().dump(user), 200
+        return user_schema.dump(user), 200
 
     @jwt_required_wrapper
     def put(self, user_id):
@@ -74,9 +87,9 @@ class UserResource(Resource):
             return {"message": "User not found"}, 404
 
         # Determine which schema to use based on role and target user
-        if g.user.role == UserRole.ADMIN:
+        if g.principal.role == UserRole.ADMIN:
             schema = UserAdminUpdateSchema(partial=True) # Allows partial updates, including is_active/role
-        elif g.user.id == user.id:
+        elif g.principal.id == user.id:
             schema = UserProfileUpdateSchema(partial=True) # Standard user can update their profile
         else:
             return {"message": "Unauthorized access"}, 403
@@ -87,7 +100,7 @@ class UserResource(Resource):
             return {"message": str(err)}, 400
 
         # Prevent non-admins from changing their own role or is_active status
-        if g.user.role != UserRole.ADMIN:
+        if g.principal.role != UserRole.ADMIN:
             if isinstance(data, dict) and ("role" in data or "is_active" in data or "is_verified" in data):
                 return {"message": "Unauthorized to modify role, account status, or verification status"}, 403
 
@@ -105,7 +118,7 @@ class UserResource(Resource):
             return {"message": "Invalid input data."}, 400
 
         user.save_to_db()
-        return {"message": "User updated successfully", "user": UserSchema().dump(user)}, 200
+        return {"message": "User updated successfully", "user": user_schema.dump(user)}, 200
 
     @role_required(UserRole.ADMIN) # Only admin can "delete" (soft-delete) users
     def delete(self, user_id):
@@ -125,7 +138,7 @@ class UserResource(Resource):
 class UserRoleRequestResource(Resource):
     @jwt_required_wrapper
     def post(self): # Note: No user_id is needed in the method signature
-        user = g.user # The user is the one making the request, from the JWT
+        user = get_current_user() # The user is the one making the request, from the JWT
         if user.role != UserRole.CUSTOMER:
             return {"message": "Only customers can request a role change."}, 400
 
@@ -228,8 +241,7 @@ class UserRoleApprovalResource(Resource):
 class ProviderProfileResource(Resource):
     @role_required(UserRole.PROVIDER) # Only a provider can update their provider profile
     def put(self):
-        user = g.user # The authenticated user is the provider
-        provider = Provider.find_by_user_id(user.id)
+        provider = Provider.find_by_user_id(g.principal.id) # The authenticated user is the provider
 
         if not provider:
             return {"message": "Provider profile not found for this user."}, 404
@@ -254,8 +266,7 @@ class ProviderProfileResource(Resource):
 
     @role_required(UserRole.PROVIDER)
     def get(self):
-        user = g.user
-        provider = Provider.find_by_user_id(user.id)
+        provider = Provider.find_by_user_id(g.principal.id)
         if not provider:
             return {"message": "Provider profile not found."}, 404
         return ProviderProfileSchema().dump(provider), 200
\ No newline at end of file
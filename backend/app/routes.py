@@ -8,14 +8,20 @@ from app.resources.notification import NotificationResource
 from app.resources.category import ServiceCategoryListResource, ServiceCategoryResource
 from app.resources.booking import BookingListResource, BookingResource
 from app.resources.user import UserListResource, UserRoleApprovalResource, UserDetailResource, UserProfileUpdateResource, UserRoleRequestResource, ProviderProfileResource
-from app.resources.provider import ProviderListResource, ProviderResource
+from app.resources.provider import ProviderListResource, ProviderResource, ProviderSearchResource
+from app.resources.availability import ProviderAvailabilityResource, ProviderAvailabilityBatchResource
 from app.resources.payment import PaymentListResource, PaymentResource
 from app.resources.service import ServiceListResource, ServiceResource
+from app.resources.addon import ServiceAddOnListResource, ServiceAddOnResource
 from app.resources.review import ReviewListResource, ReviewResource
-from app.resources.notification import NotificationListResource
+from app.resources.quote import QuoteResource
+from app.resources.search import SearchResource
+from app.resources.autocomplete import AutocompleteResource
+from app.resources.events import EventStreamResource
+from app.resources.notification import NotificationListResource, NotificationUnreadCountResource, NotificationMarkReadResource
 from .resources.auth.register import UserRegisterResource 
-from app.resources.admin import AdminStatsResource
-from app.resources.auth.login import UserLoginResource, TokenRefreshResource, UserLogoutResource
+from app.resources.admin import AdminStatsResource, AdminBookingTrendsResource
+from app.resources.auth.login import UserLoginResource, TokenRefreshResource, UserLogoutResource, UserLogoutAllResource
 
 
 
@@ -26,7 +32,10 @@ api.add_resource(UserProfileUpdateResource, "/update")
 api.add_resource(UserRoleRequestResource, "/user/request-role")
 api.add_resource(UserRoleApprovalResource, "/users/<int:user_id>/approve-role")
 api.add_resource(ProviderListResource, "/providers")
+api.add_resource(ProviderSearchResource, "/providers/search")
+api.add_resource(ProviderAvailabilityBatchResource, "/providers/availability")
 api.add_resource(ProviderResource, "/providers/<int:provider_id>")
+api.add_resource(ProviderAvailabilityResource, "/providers/<int:provider_id>/availability")
 api.add_resource(ProviderProfileResource, "/provider/profile")
 
 # Categories
@@ -45,23 +54,40 @@ api.add_resource(PaymentResource, "/payments/<int:payment_id>")
 api.add_resource(ServiceListResource, "/services")
 api.add_resource(ServiceResource, "/services/<int:service_id>")
 
+# Add-ons
+api.add_resource(ServiceAddOnListResource, "/addons")
+api.add_resource(ServiceAddOnResource, "/addons/<int:addon_id>")
 
 
+# Search
+api.add_resource(SearchResource, "/search")
+api.add_resource(AutocompleteResource, "/autocomplete")
+
+# Quotes
+api.add_resource(QuoteResource, "/quotes")
+
 # Reviews
 api.add_resource(ReviewListResource, "/reviews")
 api.add_resource(ReviewResource, "/reviews/<int:review_id>")
 
 # Notifications
 api.add_resource(NotificationListResource, "/notifications")
+api.add_resource(NotificationUnreadCountResource, "/notifications/unread-count")
+api.add_resource(NotificationMarkReadResource, "/notifications/read")
 api.add_resource(NotificationResource, "/notifications/<int:notification_id>")
 
+# Live events
+api.add_resource(EventStreamResource, "/events")
+
 
 # User Protection
 api.add_resource(UserRegisterResource, "/auth/v1/register")
 api.add_resource(AdminStatsResource, "/admin/v1/stats")
+api.add_resource(AdminBookingTrendsResource, "/admin/v1/stats/bookings")
 api.add_resource(UserLoginResource, '/auth/v1/login')
 api.add_resource(TokenRefreshResource, '/auth/v1/refresh')
 api.add_resource(UserLogoutResource, '/auth/v1/logout')
+api.add_resource(UserLogoutAllResource, '/auth/v1/logout-all')
 
 
 
@@ -1,20 +1,46 @@
-from marshmallow import Schema, fields, post_load
-from ..models import Booking
+from marshmallow import Schema, fields, post_load, validate, validates, ValidationError
+from app import app
+from ..models import Booking, BookingStatus
+from ..utils.booking_slots import on_slot_grid
+from ..utils.pricing import pricing_engine, PricingError
 
 class BookingSchema(Schema):
     id = fields.Int(dump_only=True)
     user_id = fields.Int(required=True)
     provider_id = fields.Int(required=True)
     service_id = fields.Int(required=True)
-    status = fields.Str(required=True)
-    scheduled_date = fields.Date(required=True)
-    scheduled_time = fields.Time(required=True)
-    address = fields.Str(required=True)
+    status = fields.Enum(BookingStatus, by_value=True, dump_only=True) # New bookings always start as pending
+    scheduled_at = fields.DateTime(required=True)
+    street_address = fields.Str(required=True)
+    city = fields.Str(required=True)
+    state = fields.Str()
+    zip_code = fields.Str()
+    latitude = fields.Float()
+    longitude = fields.Float()
     notes = fields.Str()
-    total_price = fields.Float()
+    total_cost = fields.Float(dump_only=True) # Priced on the server, see app/utils/pricing.py
+    # Pricing inputs, depending on the service's pricing model
+    area = fields.Float(load_only=True, validate=validate.Range(min=0, min_inclusive=False))
+    hours = fields.Float(load_only=True, validate=validate.Range(min=0, min_inclusive=False))
+    add_on_ids = fields.List(fields.Int(), load_only=True, load_default=list)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
+    @validates("scheduled_at")
+    def validate_scheduled_at(self, value, **kwargs):
+        # Bookings start on the slot grid (see app/utils/booking_slots.py)
+        minutes = app.config["BOOKING_SLOT_MINUTES"]
+        if not on_slot_grid(value, minutes):
+            raise ValidationError(f"Bookings start on a {minutes}-minute boundary.")
+
     @post_load
     def make_booking(self, data, **kwargs):
-        return Booking(**data)
+        area, hours, add_on_ids = data.pop("area", None), data.pop("hours", None), data.pop("add_on_ids", [])
+        try:
+            quote = pricing_engine.quote(
+                data["service_id"], area=area, hours=hours, add_on_ids=add_on_ids,
+                city=data.get("city"), scheduled_at=data.get("scheduled_at"),
+            )
+        except PricingError as err:
+            raise ValidationError(str(err), "service_id")
+        return Booking(total_cost=quote["total_cost"], **data)
@@ -9,6 +9,7 @@ class PaymentSchema(Schema):
     payment_method = fields.Str(required=True)
     status = fields.Str(required=True)  # e.g. pending, completed, failed
     transaction_ref = fields.Str()
+    due_at = fields.DateTime() # Defaults to the booking's scheduled start
     created_at = fields.DateTime(dump_only=True)
 
     @post_load
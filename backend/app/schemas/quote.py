@@ -0,0 +1,15 @@
+from marshmallow import Schema, fields, validate
+
+
+class QuoteItemSchema(Schema):
+    service_id = fields.Int(required=True)
+    area = fields.Float(validate=validate.Range(min=0, min_inclusive=False)) # For area-based services
+    hours = fields.Float(validate=validate.Range(min=0, min_inclusive=False)) # For hourly services
+    add_on_ids = fields.List(fields.Int(), load_default=list)
+    # Where and when, for demand-based surge pricing
+    city = fields.Str()
+    scheduled_at = fields.DateTime()
+
+
+class QuoteRequestSchema(Schema):
+    items = fields.List(fields.Nested(QuoteItemSchema), required=True, validate=validate.Length(min=1))
@@ -18,6 +18,7 @@ class UserSchema(Schema):
     timestamp = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
     last_login_at = fields.DateTime(dump_only=True)
+    notifications_seen_at = fields.DateTime(dump_only=True)
     email_verified_at = fields.DateTime(dump_only=True)
     phone_verified_at = fields.DateTime(dump_only=True)
 
@@ -26,7 +27,7 @@ class UserSchema(Schema):
         fields = (
             "id", "username", "email", "firstname", "lastname", "gender", "phone",
             "role", "is_verified", "is_active", "address", "timestamp", "updated_at",
-            "last_login_at", "email_verified_at", "phone_verified_at"
+            "last_login_at", "notifications_seen_at", "email_verified_at", "phone_verified_at"
         )
 
 
@@ -134,19 +135,27 @@ class RoleChangeApprovalSchema(Schema):
 class ProviderProfileSchema(Schema):
     bio = fields.String(validate=validate.Length(max=500))
     is_available = fields.Boolean()
-    service_radius = fields.Float()
+    service_radius = fields.Float() # km
+    latitude = fields.Float(validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(validate=validate.Range(min=-180, max=180))
     service_area_description = fields.String(validate=validate.Length(max=255))
     # Admin can update verification status
     verification_status = fields.String(validate=validate.OneOf([e.value for e in VerificationStatus]))
     verification_document_url = fields.URL() # Assuming this is a URL to a document
     rating = fields.Float(dump_only=True) # Rating is aggregated, not directly set via schema
+    rating_count = fields.Int(dump_only=True)
+    rating_histogram = fields.Method("get_rating_histogram", dump_only=True)
 
     class Meta:
         fields = (
-            "bio", "is_available", "service_radius", "service_area_description",
-            "verification_status", "verification_document_url", "rating"
+            "bio", "is_available", "service_radius", "latitude", "longitude", "service_area_description",
+            "verification_status", "verification_document_url", "rating",
+            "rating_count", "rating_histogram"
         )
 
+    def get_rating_histogram(self, provider):
+        return {str(star): getattr(provider, f"rating_{star}") or 0 for star in range(1, 6)}
+
 
 class UserUpdateSchema(Schema):
     firstname = fields.Str()
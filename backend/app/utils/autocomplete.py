@@ -0,0 +1,267 @@
+import heapq
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from sqlalchemy import and_, event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Booking, Service, ServiceCategory, ProviderSpecialization
+from app.utils.search import words
+
+
+# Typeahead suggestions for the search box, answered from memory.
+#
+# Each worker keeps a PrefixIndex over service names, category names and the
+# most-booked specialization phrases. Every suffix of a label's words is a
+# key ("pipe repair", "repair"), so typing any word of a label finds it. The
+# keys sit in one sorted list: a prefix is a bisect range, and ranges too big
+# to scan have their best suggestions precomputed, so a lookup reads at most
+# SCAN_LIMIT keys and never touches the database.
+#
+# Catalog commits made through this worker patch the suggestion set as they
+# commit and wake the worker's refresher thread, which swaps in a rebuilt
+# index a moment later, off the request thread (a rebuild over 100k
+# suggestions takes about a second). The same thread reloads everything every
+# AUTOCOMPLETE_REFRESH_INTERVAL, which also picks up popularity and other
+# workers' edits. The first lookup in a worker loads the suggestions; if
+# that fails the lookup fails, and the next one tries again.
+
+SCAN_LIMIT = 256 # keys a lookup may scan; bigger prefix ranges are precomputed
+MAX_KEY_WORDS = 6 # word suffixes indexed per label
+
+Suggestion = namedtuple("Suggestion", "kind id label popularity")
+
+
+def _normalize(text):
+    return " ".join(words(text))
+
+
+class PrefixIndex:
+    """
+    Immutable prefix index over `suggestions`, ranked by popularity (then
+    label). Build a new one to change it.
+
+    Args:
+        suggestions (iterable): Suggestion tuples.
+        top (int): Suggestions kept per precomputed prefix; the most a lookup returns.
+    """
+    def __init__(self, suggestions, top=20):
+        self.top = top
+        self.suggestions = sorted(suggestions, key=lambda s: (-s.popularity, s.label.lower(), s.kind))
+        keyed = sorted(
+            (" ".join(key_words[i:]), rank)
+            for rank, suggestion in enumerate(self.suggestions)
+            for key_words in [words(suggestion.label)[:MAX_KEY_WORDS]]
+            for i in range(len(key_words))
+        )
+        # Suggestions are stored best first, so an owner's list position is its rank
+        self._keys = [key for key, _ in keyed]
+        self._owners = array("i", [rank for _, rank in keyed])
+        self._hot = {}
+        self._precompute()
+
+    def _precompute(self):
+        # Walk the implicit trie of the sorted keys; every node whose range is
+        # too big to scan at lookup time gets its top suggestions stored
+        keys = self._keys
+        stack = [(0, len(keys), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= SCAN_LIMIT:
+                continue
+            prefix = keys[lo][:depth]
+            if depth:
+                self._hot[prefix] = tuple(heapq.nsmallest(self.top, set(self._owners[lo:hi])))
+            start = lo
+            while start < hi and len(keys[start]) == depth:
+                start += 1 # Keys equal to the prefix itself sort first
+            while start < hi:
+                end = bisect_left(keys, prefix + keys[start][depth] + "\uffff", start, hi)
+                stack.append((start, end, depth + 1))
+                start = end
+
+    def complete(self, text, limit=8):
+        """Up to `limit` Suggestions whose label has a word sequence starting with `text`, best first."""
+        prefix = _normalize(text)
+        if not prefix:
+            return []
+        limit = min(limit, self.top)
+        ranks = self._hot.get(prefix)
+        if ranks is None:
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_left(self._keys, prefix + "\uffff", lo)
+            ranks = heapq.nsmallest(limit, set(self._owners[lo:hi]))
+        return [self.suggestions[rank] for rank in ranks[:limit]]
+
+    def __len__(self):
+        return len(self.suggestions)
+
+
+class Autocomplete:
+    """Per-worker suggestion set and the PrefixIndex built from it."""
+    def __init__(self, refresh_interval=600, max_specializations=500, top=20):
+        self.refresh_interval = refresh_interval
+        self.max_specializations = max_specializations
+        self.top = top
+        self.index = PrefixIndex([], top)
+        self._suggestions = {} # (kind, id or normalized phrase) -> Suggestion
+        self._stale = False # _suggestions changed since the index was built
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+    def complete(self, text, limit=8):
+        self._ensure_started()
+        return self.index.complete(text, limit)
+
+    def refresh(self, session=None):
+        """Reloads every suggestion and its popularity (bookings) from the database."""
+        session = session or db.session
+        service_bookings = dict(session.execute(
+            select(Booking.service_id, func.count()).group_by(Booking.service_id)
+        ).all())
+
+        suggestions = {}
+        category_bookings = {}
+        for service_id, name, category_id, is_active in session.execute(
+            select(Service.id, Service.name, Service.category_id, Service.is_active)
+        ):
+            bookings = service_bookings.get(service_id, 0)
+            category_bookings[category_id] = category_bookings.get(category_id, 0) + bookings
+            if is_active is not False:
+                suggestions[("service", service_id)] = Suggestion("service", service_id, name, bookings)
+        for category_id, name in session.execute(select(ServiceCategory.id, ServiceCategory.name)):
+            suggestions[("category", category_id)] = Suggestion(
+                "category", category_id, name, category_bookings.get(category_id, 0))
+
+        # A specialization's bookings are its providers' bookings of the
+        # specialized service (any service for general specializations)
+        phrase = func.lower(ProviderSpecialization.specialization_description)
+        bookings = func.count(Booking.id)
+        rows = session.execute(
+            select(phrase, func.min(ProviderSpecialization.specialization_description), bookings)
+            .outerjoin(Booking, and_(
+                Booking.provider_id == ProviderSpecialization.provider_id,
+                or_(ProviderSpecialization.service_id.is_(None),
+                    Booking.service_id == ProviderSpecialization.service_id),
+            ))
+            .group_by(phrase)
+            .order_by(bookings.desc(), phrase)
+            .limit(self.max_specializations)
+        )
+        for _, label, count in rows:
+            key = _normalize(label)
+            if key:
+                suggestions[("specialization", key)] = Suggestion("specialization", None, label, count)
+
+        index = PrefixIndex(suggestions.values(), self.top)
+        with self._lock:
+            self._suggestions = suggestions
+            self._stale = False
+            self.index = index
+
+    def apply(self, changes):
+        """
+        Patches the suggestion set with committed catalog changes and wakes
+        the refresher to rebuild the index. No database access.
+
+        Args:
+            changes (dict): (kind, id or normalized phrase) -> label, or None to remove.
+        """
+        with self._lock:
+            suggestions = self._suggestions
+            for (kind, key), label in changes.items():
+                if label is None:
+                    suggestions.pop((kind, key), None)
+                    continue
+                current = suggestions.get((kind, key))
+                popularity = current.popularity if current else 0
+                suggestions[(kind, key)] = Suggestion(kind, key if kind != "specialization" else None, label, popularity)
+            self._stale = True
+        self._wake.set()
+
+    def rebuild(self):
+        """Swaps in an index built from the current suggestion set, if apply() changed it."""
+        with self._lock:
+            if not self._stale:
+                return
+            self._stale = False
+            suggestions = list(self._suggestions.values())
+        index = PrefixIndex(suggestions, self.top)
+        with self._lock:
+            self.index = index
+
+    def _ensure_started(self):
+        # First lookup in each worker process loads the suggestions and starts the refresher
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.refresh() # If this raises, _pid stays unset and the next lookup tries again
+            self._pid = os.getpid()
+        threading.Thread(target=self._refresh_loop, name="autocomplete-refresher", daemon=True).start()
+
+    def _refresh_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            # Woken by apply(): rebuild from memory; timed out: reload from the database
+            woken = self._wake.wait(self.refresh_interval or None)
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    if woken:
+                        self.rebuild()
+                    else:
+                        self.refresh()
+                except Exception as e:
+                    app.logger.error(f"Autocomplete refresh failed: {e}")
+                finally:
+                    db.session.remove()
+
+
+autocomplete = Autocomplete(
+    refresh_interval=app.config["AUTOCOMPLETE_REFRESH_INTERVAL"],
+    max_specializations=app.config["AUTOCOMPLETE_MAX_SPECIALIZATIONS"],
+    top=app.config["AUTOCOMPLETE_MAX_LIMIT"],
+)
+
+
+def _changes(obj, new, deleted):
+    """{key: label or None} for one flushed catalog object, or {} if its suggestion is unaffected."""
+    def changed(*attrs):
+        return new or deleted or any(inspect(obj).attrs[attr].history.has_changes() for attr in attrs)
+
+    if isinstance(obj, Service) and changed("name", "is_active"):
+        return {("service", obj.id): None if deleted or obj.is_active is False else obj.name}
+    if isinstance(obj, ServiceCategory) and changed("name"):
+        return {("category", obj.id): None if deleted else obj.name}
+    if isinstance(obj, ProviderSpecialization) and not deleted and changed("specialization_description"):
+        # Phrases are shared between providers; removals wait for the next refresh
+        key = _normalize(obj.specialization_description)
+        return {("specialization", key): obj.specialization_description} if key else {}
+    return {}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_suggestion_changes(session, flush_context):
+    for objects, new, deleted in ((session.new, True, False), (session.dirty, False, False), (session.deleted, False, True)):
+        for obj in objects:
+            changes = _changes(obj, new, deleted)
+            if changes:
+                session.info.setdefault("autocomplete_changes", {}).update(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_suggestion_changes(session):
+    changes = session.info.pop("autocomplete_changes", None)
+    if changes and autocomplete._pid == os.getpid():
+        autocomplete.apply(changes) # Not loaded in this worker yet: the first refresh will see them
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_suggestion_changes(session):
+    session.info.pop("autocomplete_changes", None)
@@ -0,0 +1,168 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import ProviderSchedule, ServiceAvailability, Booking, BookingStatus, Service
+
+
+# Slot engine. Everything is turned into sorted, non-overlapping [start, end)
+# intervals in minutes from the start of the window, then combined with linear
+# merge/intersect/subtract sweeps:
+#
+#   free = (provider schedule ∩ service weekly hours) − booked intervals
+#
+# and bookable slots are the start times inside `free` where the service fits.
+# Booked time and the service's length are rounded out to the booking grid
+# (BOOKING_SLOT_MINUTES), the whole buckets app/utils/booking_slots.py claims.
+
+DEFAULT_DURATION = 60 # minutes, for services without estimated_duration
+
+
+def merge(intervals):
+    """Sorts and coalesces overlapping or touching intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def intersect(a, b):
+    """Intersection of two merged interval lists."""
+    result, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        start, end = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract(a, b):
+    """Parts of merged list `a` not covered by merged list `b`."""
+    result, j = [], 0
+    for start, end in a:
+        while j < len(b) and b[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] < end:
+            if b[k][0] > start:
+                result.append((start, b[k][0]))
+            start = max(start, b[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def slot_starts(free, duration, step):
+    """Start offsets (aligned to `step` minutes) where `duration` fits in `free`."""
+    starts = []
+    for start, end in free:
+        first = -(-start // step) * step # round up to the step grid
+        starts.extend(range(first, end - duration + 1, step))
+    return starts
+
+
+def _round_out(start, end, grid):
+    """[start, end) widened to whole `grid`-minute buckets."""
+    return start // grid * grid, -(-end // grid) * grid
+
+
+def _minutes(moment, origin):
+    return int((moment - origin).total_seconds() // 60)
+
+
+def _weekly_windows(service_id, origin, days):
+    """Service opening hours unrolled over the window; None if the service has no restriction."""
+    if service_id is None:
+        return None
+    rows = ServiceAvailability.query.filter_by(service_id=service_id).all()
+    if not rows:
+        return None
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[row.day_of_week].append((row.start_time, row.end_time))
+    windows = []
+    for offset in range(days):
+        day = origin + timedelta(days=offset)
+        for start_time, end_time in by_day.get(day.weekday(), ()):
+            windows.append((
+                _minutes(datetime.combine(day.date(), start_time), origin),
+                _minutes(datetime.combine(day.date(), end_time), origin),
+            ))
+    return merge(windows)
+
+
+def provider_availability(provider_ids, start_date, end_date, service_id=None, step=30, grid=1):
+    """
+    Free windows and bookable slots for several providers in one pass: one
+    query for schedules, one for bookings, one for the service's weekly hours.
+
+    Args:
+        provider_ids (list): Providers to answer for.
+        start_date (date): First day of the window.
+        end_date (date): Last day of the window (inclusive).
+        service_id (int): Service being booked; sets slot length and opening hours.
+        step (int): Slot start granularity in minutes (a multiple of `grid`).
+        grid (int): Bucket size in minutes that bookings occupy whole (BOOKING_SLOT_MINUTES).
+
+    Returns:
+        dict: provider_id -> {"free": [(start, end), ...], "slots": [datetime, ...]}
+    """
+    origin = datetime.combine(start_date, datetime.min.time())
+    days = (end_date - start_date).days + 1
+    horizon = origin + timedelta(days=days)
+
+    duration = DEFAULT_DURATION
+    if service_id is not None:
+        service = Service.find_by_id(service_id)
+        if service is not None and service.estimated_duration:
+            duration = service.estimated_duration
+
+    schedules = defaultdict(list)
+    for provider_id, day, start_time, end_time in ProviderSchedule.query.with_entities(
+        ProviderSchedule.provider_id, ProviderSchedule.available_date,
+        ProviderSchedule.start_time, ProviderSchedule.end_time,
+    ).filter(
+        ProviderSchedule.provider_id.in_(provider_ids),
+        ProviderSchedule.available_date >= start_date,
+        ProviderSchedule.available_date <= end_date,
+    ):
+        schedules[provider_id].append((
+            _minutes(datetime.combine(day, start_time), origin),
+            _minutes(datetime.combine(day, end_time), origin),
+        ))
+
+    # Bookings that started up to a day before the window may still run into it
+    booked = defaultdict(list)
+    for provider_id, scheduled_at, booked_duration in Booking.query.with_entities(
+        Booking.provider_id, Booking.scheduled_at, func.coalesce(Service.estimated_duration, DEFAULT_DURATION),
+    ).outerjoin(Service, Service.id == Booking.service_id).filter(
+        Booking.provider_id.in_(provider_ids),
+        Booking.scheduled_at >= origin - timedelta(days=1),
+        Booking.scheduled_at < horizon,
+        Booking.status != BookingStatus.CANCELLED,
+    ):
+        start = _minutes(scheduled_at, origin)
+        booked[provider_id].append(_round_out(start, start + booked_duration, grid))
+
+    opening_hours = _weekly_windows(service_id, origin, days)
+
+    result = {}
+    for provider_id in provider_ids:
+        free = merge(schedules.get(provider_id, ()))
+        if opening_hours is not None:
+            free = intersect(free, opening_hours)
+        free = subtract(free, merge(booked.get(provider_id, ())))
+        result[provider_id] = {
+            "free": [(origin + timedelta(minutes=s), origin + timedelta(minutes=e)) for s, e in free],
+            "slots": [origin + timedelta(minutes=m) for m in slot_starts(free, _round_out(0, duration, grid)[1], step)],
+            "slot_minutes": duration,
+        }
+    return result
@@ -0,0 +1,231 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (token jtis).
+
+    A negative answer is always correct, a positive one is wrong with roughly
+    `error_rate` probability once `capacity` keys have been added.
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Kirsch-Mitzenmacher double hashing: k positions out of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class TokenBlacklist:
+    """
+    JWT blocklist shared by every worker process on the host.
+
+    Revoked jtis live in a small SQLite database in WAL mode, each row expiring
+    with the token itself. Every worker keeps a Bloom filter of the table in
+    memory, so a check for a token that was never revoked (the common case) is
+    answered without touching the table. The filter is kept in step with other
+    workers through `PRAGMA data_version`, which only reads the WAL index in
+    shared memory, and by pulling rows above the last id it has seen.
+
+    The same file carries per-user revocation epochs ("log out everywhere"):
+    a token whose stamped epoch is older than its user's current epoch is
+    revoked. Workers mirror the epochs into a dict, so that check is O(1) too.
+    Epochs older than `epoch_retention` seconds (the longest token lifetime)
+    can no longer match a live token and are dropped. The file is only a
+    fast path for epochs: `seed_epochs` returns the authoritative ones
+    (user_id, valid_after) and is read whenever a worker opens the file, so
+    losing or recreating it does not undo a "log out everywhere".
+
+    A daemon thread in each worker deletes expired rows every
+    `compact_interval` seconds and rebuilds the filter once most of its
+    entries are stale.
+    """
+    def __init__(self, path, capacity=1_000_000, error_rate=0.01, compact_interval=300, epoch_retention=30 * 86400,
+                 seed_epochs=None):
+        self.path = path
+        self.seed_epochs = seed_epochs
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.compact_interval = compact_interval
+        self.epoch_retention = epoch_retention
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        self._bloom = None
+        self._last_id = 0
+        self._user_epochs = {}
+        self._last_epoch_id = 0
+        self._data_version = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_open(self):
+        # Called with self._lock held. Reopen after a fork (gunicorn --preload)
+        # since SQLite connections must not cross process boundaries.
+        if self._pid == os.getpid():
+            return
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " jti TEXT NOT NULL UNIQUE,"
+            " expires_at INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_token_epochs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " user_id INTEGER NOT NULL,"
+            " valid_after INTEGER NOT NULL)"
+        )
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._last_id = 0
+        self._user_epochs = {}
+        self._last_epoch_id = 0
+        self._data_version = None
+        if self.seed_epochs is not None:
+            cutoff = time.time() - self.epoch_retention
+            self._user_epochs = {
+                int(user_id): int(valid_after)
+                for user_id, valid_after in self.seed_epochs() if valid_after and valid_after > cutoff
+            }
+        self._pid = os.getpid()
+        if self.compact_interval:
+            threading.Thread(target=self._compact_loop, name="jwt-blocklist-compactor", daemon=True).start()
+
+    def _sync(self):
+        # Called with self._lock held. Pull rows written by other workers into the filter.
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        rows = self._conn.execute(
+            "SELECT id, jti FROM revoked_tokens WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for row_id, jti in rows:
+            self._bloom.add(jti)
+        if rows:
+            self._last_id = rows[-1][0]
+
+        rows = self._conn.execute(
+            "SELECT id, user_id, valid_after FROM user_token_epochs WHERE id > ? ORDER BY id", (self._last_epoch_id,)
+        ).fetchall()
+        epochs = self._user_epochs
+        for row_id, user_id, valid_after in rows:
+            if valid_after > epochs.get(user_id, 0):
+                epochs[user_id] = valid_after
+        if rows:
+            self._last_epoch_id = rows[-1][0]
+
+    def add(self, jti, expires_at=None):
+        """
+        Revokes a token until `expires_at` (the token's `exp`, in epoch seconds).
+        """
+        if expires_at is None:
+            expires_at = time.time() + self.compact_interval
+        with self._lock:
+            self._ensure_open()
+            self._conn.execute(
+                "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, int(expires_at))
+            )
+            self._bloom.add(jti)
+
+    def is_blocked(self, jti):
+        with self._lock:
+            self._ensure_open()
+            self._sync()
+            if jti not in self._bloom:
+                return False
+            # Possible hit (or a false positive): confirm against the table
+            row = self._conn.execute("SELECT expires_at FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def revoke_user(self, user_id, valid_after):
+        """
+        Publishes a user's new revocation epoch to every worker. Tokens stamped
+        with an older epoch are treated as revoked from now on.
+        """
+        with self._lock:
+            self._ensure_open()
+            self._conn.execute(
+                "INSERT INTO user_token_epochs (user_id, valid_after) VALUES (?, ?)", (int(user_id), int(valid_after))
+            )
+            if valid_after > self._user_epochs.get(int(user_id), 0):
+                self._user_epochs[int(user_id)] = int(valid_after)
+
+    def is_user_revoked(self, user_id, token_epoch):
+        with self._lock:
+            self._ensure_open()
+            self._sync()
+            return token_epoch < self._user_epochs.get(user_id, 0)
+
+    def compact(self):
+        """
+        Deletes expired entries and rebuilds this worker's filter when it has
+        gone mostly stale. Safe to run from several workers at once.
+        """
+        conn = self._connect()
+        try:
+            now = int(time.time())
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,))
+            # Any token stamped before these epochs has expired by now
+            cutoff = now - self.epoch_retention
+            conn.execute("DELETE FROM user_token_epochs WHERE valid_after <= ?", (cutoff,))
+            with self._lock:
+                self._user_epochs = {k: v for k, v in self._user_epochs.items() if v > cutoff}
+            live = conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0]
+            if self._bloom is None or self._bloom.count <= 2 * live + 1024:
+                return
+
+            bloom = BloomFilter(max(self.capacity, live), self.error_rate)
+            last_id = 0
+            for row_id, jti in conn.execute("SELECT id, jti FROM revoked_tokens WHERE expires_at > ?", (now,)):
+                bloom.add(jti)
+                last_id = max(last_id, row_id)
+            with self._lock:
+                self._bloom = bloom
+                self._last_id = last_id
+                # Force a catch-up read for rows inserted while we were rebuilding
+                self._data_version = None
+        finally:
+            conn.close()
+
+    def _compact_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.compact_interval)
+            try:
+                self.compact()
+            except sqlite3.Error:
+                # Another worker holds the write lock; try again next round
+                pass
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select
+from sqlalchemy.exc import IntegrityError
+from app import app
+from app.models import Booking, BookingSlot, BookingStatus, Service
+
+
+# Reservation table behind double-booking prevention. Every non-cancelled
+# booking with a provider claims the provider's time buckets it covers in
+# booking_slots, inside the same flush as the booking row. Two overlapping
+# bookings would claim at least one common (provider_id, slot_start) key, so
+# the second insert fails on the primary key no matter how many workers race;
+# no check-then-insert window exists.
+#
+# Buckets are only exact if bookings start on the bucket grid, so the API
+# rejects other start times (on_slot_grid), and a booking holds every bucket
+# it reaches: a 50-minute service occupies a full hour of 15-minute buckets,
+# the rest being turnaround. app/utils/availability.py rounds booked time the
+# same way, so it never offers a start the guard would refuse.
+
+DEFAULT_DURATION = 60 # minutes, for services without estimated_duration
+
+slots = BookingSlot.__table__
+
+
+class BookingConflict(Exception):
+    """Raised from a flush when a booking overlaps another one for the same provider."""
+
+
+_EPOCH = datetime(2000, 1, 1) # Origin of the bucket grid
+
+
+def on_slot_grid(moment, slot_minutes):
+    """Whether `moment` starts a bucket, i.e. falls on the slot_minutes grid."""
+    seconds = (moment.replace(tzinfo=None) - _EPOCH).total_seconds()
+    return seconds % (slot_minutes * 60) == 0
+
+
+def slot_buckets(scheduled_at, duration, slot_minutes):
+    # A booking holds every bucket it reaches. Rows from before on_slot_grid
+    # was enforced may start off the grid; they claim every bucket they touch,
+    # which is conservative but never lets overlaps through
+    epoch = _EPOCH
+    first = int((scheduled_at - epoch).total_seconds() // 60) // slot_minutes
+    end_minute = -(-int((scheduled_at + timedelta(minutes=duration) - epoch).total_seconds() // 60) // slot_minutes)
+    return [epoch + timedelta(minutes=bucket * slot_minutes) for bucket in range(first, max(end_minute, first + 1))]
+
+
+def _duration(connection, service_id):
+    duration = connection.execute(select(Service.estimated_duration).where(Service.id == service_id)).scalar()
+    return duration or DEFAULT_DURATION
+
+
+def _reserve(connection, booking):
+    if booking.provider_id is None or booking.scheduled_at is None or booking.status == BookingStatus.CANCELLED:
+        return
+    buckets = slot_buckets(booking.scheduled_at, _duration(connection, booking.service_id), app.config["BOOKING_SLOT_MINUTES"])
+    try:
+        connection.execute(slots.insert(), [
+            {"provider_id": booking.provider_id, "slot_start": bucket, "booking_id": booking.id} for bucket in buckets
+        ])
+    except IntegrityError as e:
+        raise BookingConflict(f"Provider {booking.provider_id} is already booked at {booking.scheduled_at}") from e
+
+
+def _release(connection, booking):
+    connection.execute(slots.delete().where(slots.c.booking_id == booking.id))
+
+
+@event.listens_for(Booking, "after_insert")
+def _booking_inserted(mapper, connection, target):
+    _reserve(connection, target)
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_updated(mapper, connection, target):
+    state = inspect(target).attrs
+    if any(state[attr].history.has_changes() for attr in ("provider_id", "scheduled_at", "service_id", "status")):
+        _release(connection, target)
+        _reserve(connection, target)
+
+
+@event.listens_for(Booking, "after_delete")
+def _booking_deleted(mapper, connection, target):
+    _release(connection, target)
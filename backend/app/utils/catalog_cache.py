@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import app
+from app.models import ServiceCategory, Service, ServiceAddOn, ServiceAvailability
+
+
+CATALOG_MODELS = (ServiceCategory, Service, ServiceAddOn, ServiceAvailability)
+
+
+class CatalogCache:
+    """
+    Per-worker cache of serialized catalog listings (categories, services,
+    add-ons), keyed by request path and query string.
+
+    Entries hold the JSON bytes and a strong ETag over them, so a matching
+    If-None-Match is answered with 304 without touching the DB or marshmallow.
+    Commits through this worker that write any catalog model bump `version`,
+    which drops every entry at once. Writes made by other workers are only
+    picked up once the TTL runs out; the ETag is a content hash, so clients
+    still get 304s after a rebuild that produced the same bytes.
+    """
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (body, etag) for `key`, or None if it has to be rebuilt."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] != self.version or entry[3] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def put(self, key, data, version):
+        """
+        Serializes `data` and caches it under `key`.
+
+        Args:
+            version (int): `self.version` from before `data` was read; if a
+                commit bumped it since, the bytes are returned but not cached.
+        """
+        body = json.dumps(data, separators=(",", ":")).encode()
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        with self._lock:
+            if self.version == version:
+                self._entries[key] = (body, etag, version, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+catalog_cache = CatalogCache(
+    maxsize=app.config["CATALOG_CACHE_SIZE"],
+    ttl=app.config["CATALOG_CACHE_TTL"],
+)
+
+
+def catalog_cached(func):
+    """
+    Serves a catalog GET from `catalog_cache`, with ETag / If-None-Match.
+    Only 200 responses are cached; anything else passes through untouched.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        cached = catalog_cache.get(key)
+        if cached is None:
+            version = catalog_cache.version
+            data, status = func(*args, **kwargs)
+            if status != 200:
+                return data, status
+            cached = catalog_cache.put(key, data, version)
+
+        body, etag = cached
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache" # Always revalidate; the 304 is cheap
+        return response.make_conditional(request)
+    return wrapper
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_changes(session, flush_context):
+    if session.info.get("catalog_changed"):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info["catalog_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version(session):
+    if session.info.pop("catalog_changed", False):
+        catalog_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session):
+    session.info.pop("catalog_changed", None)
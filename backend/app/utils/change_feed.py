@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Booking, ChangeEvent, Notifications, Provider
+
+
+# Per-user change feed behind GET /events (Server-Sent Events).
+#
+# Mapper hooks append a change_events row for every new notification and
+# every booking status transition, on the flush connection, so the feed
+# commits with the change. Each worker runs one feed thread that reads new
+# rows by primary key (every SSE_POLL_INTERVAL, or at once after a commit in
+# this worker) and hands them to the open streams of their user. Streams
+# only wait on their in-memory Subscription, so an idle stream costs no
+# database work, but it does hold whatever serves the response until the
+# client goes away. In production /events is routed to its own gevent pool
+# (gunicorn_events.conf.py), where that is a greenlet and one worker holds
+# SSE_MAX_STREAMS streams on a single OS thread. Anywhere else (sync or
+# gthread workers, the dev server) each stream pins an OS thread, so the
+# worker takes at most SSE_MAX_THREAD_STREAMS of them.
+#
+# A reconnecting client sends Last-Event-ID and gets what it missed from the
+# (user_id, id) index, up to SSE_BACKFILL_LIMIT events within the retention
+# window; beyond that it is sent a "reset" event and should refetch.
+
+events = ChangeEvent.__table__
+FeedEvent = namedtuple("FeedEvent", "id user_id kind data")
+PURGE_INTERVAL = timedelta(minutes=10)
+
+
+def _greenlet_worker():
+    # gevent's worker patches threading before it imports the app
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def _append(connection, user_id, kind, data):
+    if user_id is not None:
+        connection.execute(events.insert().values(
+            user_id=user_id, kind=kind, data=json.dumps(data, default=str), created_at=datetime.utcnow(),
+        ))
+
+
+@event.listens_for(Notifications, "after_insert")
+def _notification_event(mapper, connection, target):
+    _append(connection, target.user_id, "notification", {
+        "id": target.id, "type": target.type.value if target.type else None,
+        "message": target.message, "is_read": bool(target.is_read), "created_at": target.created_at,
+    })
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_status_event(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.added or not history.deleted or history.added[0] == history.deleted[0]:
+        return
+    data = {
+        "booking_id": target.id, "status": history.added[0].value, "previous_status": history.deleted[0].value,
+        "scheduled_at": target.scheduled_at,
+    }
+    _append(connection, target.user_id, "booking_status", data)
+    if target.provider_id is not None:
+        provider_user_id = connection.execute(
+            select(Provider.user_id).where(Provider.id == target.provider_id)
+        ).scalar()
+        if provider_user_id != target.user_id:
+            _append(connection, provider_user_id, "booking_status", data)
+
+
+class Subscription:
+    """One open stream's queue of pending events."""
+    def __init__(self, user_id, max_pending):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.last_id = 0 # newest event id already sent to the client
+        self.overflowed = False
+        self._pending = deque()
+        self._ready = threading.Condition()
+
+    def push(self, feed_event):
+        with self._ready:
+            if len(self._pending) >= self.max_pending:
+                self.overflowed = True # The client resumes from Last-Event-ID instead
+            else:
+                self._pending.append(feed_event)
+            self._ready.notify()
+
+    def take(self, timeout):
+        """Events not sent yet, waiting up to `timeout` seconds for one; [] on timeout."""
+        with self._ready:
+            if not self._pending and not self.overflowed:
+                self._ready.wait(timeout)
+            batch = list(self._pending)
+            self._pending.clear()
+        fresh = [e for e in batch if e.id > self.last_id]
+        if fresh:
+            self.last_id = fresh[-1].id
+        return fresh
+
+
+class ChangeFeed:
+    """
+    Per-worker reader of change_events that fans rows out to subscriptions.
+
+    Args:
+        poll_interval (float): Seconds between reads when nothing woke the feed.
+        max_streams (int): Open subscriptions allowed in this worker.
+        max_pending (int): Events queued per subscription before it is closed.
+        backfill_limit (int): Most events replayed to a resuming client.
+        retention_hours (int): Age after which events are purged.
+        batch_size (int): Rows read per query.
+    """
+    def __init__(self, poll_interval=1, max_streams=1000, max_pending=1000, backfill_limit=500, retention_hours=24,
+                 batch_size=1000):
+        self.poll_interval = poll_interval
+        self.max_streams = max_streams
+        self.max_pending = max_pending
+        self.backfill_limit = backfill_limit
+        self.retention = timedelta(hours=retention_hours)
+        self.batch_size = batch_size
+        self._subscribers = {} # user_id -> set of Subscription
+        self._streams = 0
+        self._last_id = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def subscribe(self, user_id):
+        """A new Subscription for `user_id`, or None when this worker has max_streams open."""
+        self._ensure_started()
+        with self._lock:
+            if self._streams >= self.max_streams:
+                return None
+            subscription = Subscription(user_id, self.max_pending)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._streams += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._streams -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def backfill(self, user_id, last_event_id, session=None):
+        """
+        Events for `user_id` after `last_event_id`, oldest first, and whether
+        the client missed more than can be replayed (it should refetch).
+        """
+        session = session or db.session
+        oldest = session.execute(select(func.min(events.c.id))).scalar()
+        rows = session.execute(
+            select(events.c.id, events.c.user_id, events.c.kind, events.c.data)
+            .where(events.c.user_id == user_id, events.c.id > last_event_id)
+            .order_by(events.c.id).limit(self.backfill_limit + 1)
+        ).all()
+        # Purged past the client's position, or too far behind to replay
+        reset = (oldest is not None and oldest > last_event_id + 1) or len(rows) > self.backfill_limit
+        return [FeedEvent(*row) for row in rows[:self.backfill_limit]], reset
+
+    def wake(self):
+        self._wake.set()
+
+    def _ensure_started(self):
+        # First stream in each worker process starts the feed thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._last_id = db.session.execute(select(func.max(events.c.id))).scalar() or 0
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name="change-feed", daemon=True).start()
+
+    def _run(self):
+        pid = os.getpid()
+        next_purge = datetime.utcnow()
+        with app.app_context():
+            while self._pid == pid:
+                read = 0
+                try:
+                    with db.engine.connect() as conn:
+                        rows = conn.execute(
+                            select(events.c.id, events.c.user_id, events.c.kind, events.c.data)
+                            .where(events.c.id > self._last_id).order_by(events.c.id).limit(self.batch_size)
+                        ).all()
+                        if datetime.utcnow() >= next_purge:
+                            conn.execute(events.delete().where(events.c.created_at < datetime.utcnow() - self.retention))
+                            conn.commit()
+                            next_purge = datetime.utcnow() + PURGE_INTERVAL
+                    read = len(rows)
+                    if rows:
+                        self._last_id = rows[-1].id
+                        self._deliver(FeedEvent(*row) for row in rows)
+                except Exception as e:
+                    app.logger.error(f"Change feed read failed: {e}")
+                if read < self.batch_size:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+
+    def _deliver(self, feed_events):
+        with self._lock:
+            targets = [(e, list(self._subscribers.get(e.user_id, ()))) for e in feed_events]
+        for feed_event, subscribers in targets:
+            for subscription in subscribers:
+                subscription.push(feed_event)
+
+
+change_feed = ChangeFeed(
+    poll_interval=app.config["SSE_POLL_INTERVAL"],
+    max_streams=app.config["SSE_MAX_STREAMS"] if _greenlet_worker() else app.config["SSE_MAX_THREAD_STREAMS"],
+    max_pending=app.config["SSE_MAX_PENDING"],
+    backfill_limit=app.config["SSE_BACKFILL_LIMIT"],
+    retention_hours=app.config["SSE_RETENTION_HOURS"],
+)
+
+
+# Push this worker's own changes right after they commit instead of on the next poll
+@event.listens_for(Session, "after_flush")
+def _note_feed_changes(session, flush_context):
+    if any(isinstance(obj, Notifications) for obj in session.new) or \
+            any(isinstance(obj, Booking) for obj in session.dirty):
+        session.info["change_feed_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_change_feed(session):
+    if session.info.pop("change_feed_dirty", False):
+        change_feed.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_feed_changes(session):
+    session.info.pop("change_feed_dirty", None)
@@ -0,0 +1,157 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, aliased
+from werkzeug.http import http_date, quote_etag
+from app import db
+from app.utils.fieldsets import expanded, representation_variant
+
+
+# Conditional requests for detail resources. The validators come from the
+# row's (id, updated_at), read with a single column query, so a revalidation
+# that ends in 304 (or a PUT that fails its If-Match) never loads the row,
+# its relationships or the schema. An ?expand=ed representation also
+# depends on the related rows, so their (id, updated_at) are read in the same
+# query (outer joins) and folded into the variant part of the ETag; related
+# models without updated_at can't be versioned, and such requests are served
+# without validators. Columns written behind by app/utils/touch_buffer.py
+# (e.g. Users.last_login_at) leave updated_at alone, since a touch isn't an
+# edit, so representations that include them name them as `touched` and
+# they are folded in the same way.
+#
+# A PUT's If-Match is checked up front, so a stale write is refused before the
+# handler runs, and again inside the write's transaction: the first flush
+# starts with a guard UPDATE ... WHERE id = ? AND updated_at = <the version
+# that matched>, which takes the row's write lock; if it matches nothing, the
+# row changed in between and the request gets 412 instead of overwriting it.
+
+
+class PreconditionFailed(Exception):
+    """The row changed between the If-Match check and the write."""
+
+
+MODIFIED_MESSAGE = "The resource has been modified since you last fetched it."
+
+
+@event.listens_for(Session, "before_flush")
+def _guard_if_match(session, flush_context, instances):
+    guard = session.info.pop("if_match", None)
+    if guard is None:
+        return
+    table, object_id, updated_at = guard
+    result = session.connection().execute(
+        table.update().where(table.c.id == object_id, table.c.updated_at == updated_at)
+        .values(updated_at=table.c.updated_at)
+    )
+    if result.rowcount != 1:
+        raise PreconditionFailed()
+
+
+def _validators(model, object_id, relationships=(), touched=()):
+    """
+    (etag, last_modified, versions of touched columns and related rows,
+    updated_at) for the row, or None if it doesn't exist, has no updated_at,
+    or a relationship's target has none.
+    """
+    query = db.session.query(model.updated_at, *touched)
+    for attr in relationships:
+        target = aliased(getattr(model, attr).property.mapper.class_)
+        if not hasattr(target, "updated_at"):
+            return None
+        query = query.outerjoin(target, getattr(model, attr).of_type(target)).add_columns(target.id, target.updated_at)
+    row = query.filter(model.id == object_id).first()
+    if row is None or row[0] is None:
+        return None
+    updated_at, touched_at, related = row[0], row[1:len(touched) + 1], row[len(touched) + 1:]
+    tag = f"{model.__tablename__}:{object_id}:{updated_at.isoformat()}"
+    etag = hashlib.blake2b(tag.encode(), digest_size=16).hexdigest()
+    last_modified = max([updated_at, *(value for value in (*touched_at, *related[1::2]) if value is not None)])
+    versions = ",".join(
+        f"{value.isoformat() if hasattr(value, 'isoformat') else value}" for value in (*touched_at, *related)
+    )
+    return etag, last_modified.replace(microsecond=0, tzinfo=timezone.utc), versions, updated_at
+
+
+def _variant_etag(etag, variant):
+    # Sparse/expanded representations of the same version get "<etag>-<variant hash>"
+    if not variant:
+        return etag
+    return f"{etag}-{hashlib.blake2b(variant.encode(), digest_size=4).hexdigest()}"
+
+
+def _if_match(etag):
+    # If-Match is about the row version, so any representation's tag of it counts
+    if request.if_match.star_tag:
+        return True
+    return any(tag.split("-")[0] == etag for tag in request.if_match.as_set())
+
+
+def _headers(validators):
+    etag, last_modified = validators
+    return {"ETag": quote_etag(etag), "Last-Modified": http_date(last_modified)}
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return None not in (last_modified, request.if_modified_since) and last_modified <= request.if_modified_since
+
+
+def conditional(model, id_arg, expandable=None, touched=()):
+    """
+    Adds ETag / Last-Modified to a detail resource method.
+
+    On GET, answers If-None-Match / If-Modified-Since with 304. On PUT (and
+    PATCH), rejects a stale If-Match with 412 before the handler runs, and
+    again if the row changes before the handler's first flush. In
+    both cases a successful (200) response carries the current validators.
+
+    Args:
+        model: Model class with `id` and `updated_at` columns.
+        id_arg (str): Name of the URL argument holding the row id.
+        expandable (dict): The resource's ?expand= map, as passed to fieldset().
+        touched (tuple): Write-behind columns of `model` in the representation, e.g. (Users.last_login_at,).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            reading = request.method in ("GET", "HEAD")
+            relationships = expanded(expandable) if reading else ()
+            validators = _validators(model, kwargs[id_arg], relationships, touched if reading else ())
+            if validators is not None:
+                etag, last_modified, versions, updated_at = validators
+                validators = (etag, last_modified)
+                if reading:
+                    variant = representation_variant()
+                    validators = (_variant_etag(etag, f"{variant}|{versions}" if versions else variant), last_modified)
+                    # A deleted related row leaves no newer timestamp behind, so expansions need the ETag
+                    if _not_modified(validators[0], None if relationships else last_modified):
+                        return Response(status=304, headers=_headers(validators))
+                elif request.if_match and not _if_match(etag):
+                    return {"message": MODIFIED_MESSAGE}, 412
+                elif request.if_match and not request.if_match.star_tag:
+                    db.session.info["if_match"] = (model.__table__, kwargs[id_arg], updated_at)
+            elif not reading and request.if_match:
+                # If-Match can't hold for a row we can't identify a version of
+                return {"message": "Precondition failed."}, 412
+
+            try:
+                result = func(*args, **kwargs)
+            except PreconditionFailed:
+                db.session.rollback()
+                return {"message": MODIFIED_MESSAGE}, 412
+            finally:
+                db.session.info.pop("if_match", None)
+            if not isinstance(result, tuple) or len(result) != 2 or result[1] != 200:
+                return result
+            if not reading:
+                validators = _validators(model, kwargs[id_arg])
+                validators = validators and validators[:2]
+            if validators is None:
+                return result
+            return result[0], 200, _headers(validators)
+        return wrapper
+    return decorator
@@ -2,22 +2,50 @@ from functools import wraps
 from flask import request, jsonify, g
 # Import jwt_required, get_jwt_identity, get_jwt directly from flask_jwt_extended
 from flask_jwt_extended import jwt_required as flask_jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app import app, db
 from app.models import Users, UserRole
+from app.utils.blocklist import TokenBlacklist
+from app.utils.principal_cache import principal_cache
 
-# A simple in-memory blacklist for demonstration. For production, use a database.
-# This class needs to be imported and used by the @jwt.token_in_blocklist_loader
-# function in your app/__init__.py file.
-class TokenBlacklist:
-    def __init__(self):
-        self.blocked_tokens = set()
+def _stored_token_epochs():
+    # Users.tokens_valid_after is the source of truth; the blocklist file only mirrors it
+    with db.engine.connect() as conn:
+        return conn.execute(select(Users.id, Users.tokens_valid_after).where(Users.tokens_valid_after > 0)).all()
 
-    def add(self, jti):
-        self.blocked_tokens.add(jti)
 
-    def is_blocked(self, jti):
-        return jti in self.blocked_tokens
+# Revoked tokens are kept in a SQLite (WAL) file shared by all worker processes,
+# with a per-worker Bloom filter in front of it. See app/utils/blocklist.py.
+# This instance is used by the @jwt.token_in_blocklist_loader in app/__init__.py.
+jwt_blacklist = TokenBlacklist(
+    app.config["JWT_BLOCKLIST_DB"],
+    capacity=app.config["JWT_BLOCKLIST_BLOOM_CAPACITY"],
+    error_rate=app.config["JWT_BLOCKLIST_BLOOM_ERROR_RATE"],
+    compact_interval=app.config["JWT_BLOCKLIST_COMPACT_INTERVAL"],
+    epoch_retention=int(app.config["JWT_REFRESH_TOKEN_EXPIRES"].total_seconds()),
+    seed_epochs=_stored_token_epochs,
+)
 
-jwt_blacklist = TokenBlacklist() # This instance should be imported into app/__init__.py
+
+# Publish Users.tokens_valid_after changes to the shared blocklist, but only once
+# they are committed (a rolled-back bump must not lock the user out).
+@event.listens_for(Session, "after_flush")
+def _collect_token_revocations(session, flush_context):
+    for obj in session.dirty:
+        if isinstance(obj, Users) and inspect(obj).attrs.tokens_valid_after.history.has_changes():
+            session.info.setdefault("token_revocations", {})[obj.id] = obj.tokens_valid_after
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_token_revocations(session):
+    for user_id, valid_after in session.info.pop("token_revocations", {}).items():
+        jwt_blacklist.revoke_user(user_id, valid_after)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_revocations(session):
+    session.info.pop("token_revocations", None)
 
 def role_required(required_role: UserRole):
     """
@@ -50,10 +78,10 @@ def role_required(required_role: UserRole):
             if user_role != required_role:
                 return jsonify({"message": f"{required_role.value.capitalize()} privileges required"}), 403
 
-            # Fetch the user object and attach to Flask's g object for easy access
-            user_id = get_jwt_identity()
-            g.user = Users.find_by_id(user_id)
-            if not g.user:
+            # Attach the cached principal to g; the full Users row is only
+            # loaded if the endpoint asks for it via get_current_user()
+            g.principal = _load_principal()
+            if not g.principal:
                 return jsonify({"message": "User not found."}), 404
 
             return fn(*args, **kwargs)
@@ -61,11 +89,11 @@ def role_required(required_role: UserRole):
     return decorator
 
 # This wrapper is functionally equivalent to @flask_jwt_required() but
-# also ensures g.user is set. You can use @flask_jwt_required() directly
-# if you prefer to handle g.user assignment within your resource methods.
+# also ensures g.principal is set. You can use @flask_jwt_required() directly
+# if you prefer to handle the lookup within your resource methods.
 def jwt_required_wrapper(fn):
     """
-    Decorator to ensure a valid JWT is present and attach the user object to g.user.
+    Decorator to ensure a valid JWT is present and attach the cached principal to g.principal.
     """
     @wraps(fn)
     @flask_jwt_required() # Ensures valid JWT and automatically handles blacklisting check
@@ -75,12 +103,29 @@ def jwt_required_wrapper(fn):
         claims = get_jwt()
         print(f"--- Decoded JWT Claims (Payload - jwt_required_wrapper): {claims} ---")
         # 
-        user_id = get_jwt_identity()
-        g.user = Users.find_by_id(user_id)
-        if not g.user:
+        g.principal = _load_principal()
+        if not g.principal:
             return jsonify({"message": "User not found."}), 404
         return fn(*args, **kwargs)
     return wrapper
 
+
+def _load_principal():
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None
+    return principal_cache.get(user_id)
+
+
+def get_current_user():
+    """
+    Returns the Users row for the authenticated principal, loading it on first use.
+    Only endpoints that read or modify the full profile should need this.
+    """
+    if "user" not in g:
+        g.user = Users.find_by_id(g.principal.id)
+    return g.user
+
 # Remove app/resources/auth/utils.py entirely as its functionality is now
 # covered by Flask-JWT-Extended and these decorators.
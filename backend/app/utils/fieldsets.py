@@ -0,0 +1,106 @@
+from flask import request
+from flask_restful import abort
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, noload, selectinload
+from app.utils.serializers import serializer_for
+
+
+# Sparse fieldsets (?fields=id,name) and relationship expansion
+# (?expand=payment). Both shrink the SQL as well as the payload: requested
+# fields become load_only() columns, expanded relationships are fetched with
+# one selectinload() query each, and every other expandable relationship is
+# noload()ed, including ones mapped as lazy="joined".
+
+def _csv_arg(name):
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+def representation_variant():
+    """The ?fields= / ?expand= part of the request, normalized; '' for the full representation."""
+    parts = []
+    for name in ("fields", "expand"):
+        values = _csv_arg(name)
+        if values:
+            parts.append(f"{name}={','.join(sorted(set(values)))}")
+    return "&".join(parts)
+
+
+def expanded(expandable):
+    """Relationship attribute names the request's ?expand= asks for, among `expandable`; unknown names are left out."""
+    if not expandable:
+        return []
+    return [expandable[name][0] for name in sorted(set(_csv_arg("expand") or [])) if name in expandable]
+
+
+class ExpandedSerializer:
+    """Dumps with `base`, then adds each expanded relationship under its own key."""
+    def __init__(self, base, nested, many):
+        self.base = base
+        self.nested = nested # [(key, relationship attribute name, serializer)]
+        self.many = many
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else many
+        data = self.base.dump(obj, many=many)
+        pairs = zip(data, obj) if many else [(data, obj)]
+        for item, row in pairs:
+            for key, attr, serializer in self.nested:
+                value = getattr(row, attr)
+                item[key] = None if value is None else serializer.dump(value)
+        return data
+
+
+def fieldset(model, schema_cls, many=False, expandable=None, required=()):
+    """
+    Query options and serializer for the request's ?fields= and ?expand=.
+
+    Args:
+        model: Model class being queried.
+        schema_cls: Schema class whose dump fields ?fields= may name.
+        many (bool): Whether the serializer dumps a list.
+        expandable (dict): ?expand= name -> (relationship attribute name, nested schema class).
+        required (list): Columns to load even if not asked for, e.g. pagination keys.
+
+    Returns:
+        tuple: (list of loader options, serializer with a schema-style dump()).
+    """
+    expandable = expandable or {}
+    requested = _csv_arg("fields")
+    expand = _csv_arg("expand") or []
+
+    unknown = sorted(set(expand) - set(expandable))
+    if unknown:
+        allowed = ", ".join(sorted(expandable)) or "nothing"
+        abort(400, message=f"Cannot expand {', '.join(unknown)}; allowed: {allowed}.")
+
+    options = []
+    only = None
+    if requested is not None:
+        dump_fields = serializer_for(schema_cls, many=many).schema.dump_fields
+        unknown = sorted(set(requested) - set(dump_fields))
+        if unknown or not requested:
+            abort(400, message=f"Unknown fields: {', '.join(unknown) or '(none given)'}.")
+        only = tuple(name for name in dump_fields if name in requested) # Keep schema order
+        columns = inspect(model).column_attrs
+        attrs = [dump_fields[name].attribute or name for name in only]
+        # Fields backed by something other than a column (methods, properties)
+        # may read any attribute, so only narrow the SELECT when all are columns
+        if all(attr in columns for attr in attrs):
+            options.append(load_only(*(getattr(model, attr) for attr in attrs), *required))
+
+    nested = []
+    for name, (attr, nested_schema_cls) in expandable.items():
+        relationship = getattr(model, attr) # Looked up late: backrefs only exist once mappers are configured
+        if name in expand:
+            options.append(selectinload(relationship))
+            nested.append((name, attr, serializer_for(nested_schema_cls)))
+        else:
+            options.append(noload(relationship))
+
+    serializer = serializer_for(schema_cls, many=many, only=only)
+    if nested:
+        serializer = ExpandedSerializer(serializer, nested, many)
+    return options, serializer
@@ -0,0 +1,175 @@
+import re
+from datetime import datetime
+from flask import request
+from flask_restful import abort
+from sqlalchemy import UniqueConstraint, inspect
+
+
+# Declarative filter/sort layer for the list resources:
+#
+#   /bookings?status=confirmed&city=Monrovia&scheduled_at[gte]=2030-01-06&sort=-scheduled_at
+#
+# Each resource whitelists its filterable and sortable columns in a ListSpec.
+# A ListSpec refuses (at import time) any column that isn't the leading column
+# of an index. Sorting feeds the keyset paginator: the sort column plus the
+# primary key as a tiebreaker, so a page is only cheap if one index both
+# finds the filtered rows and returns them in that order. Filter/sort pairs
+# no index can serve that way (a range on one column sorted by another, a
+# filter without an index continuing with the sort key) are refused with 400
+# rather than scanned or sorted in a temporary B-tree; tests/test_filter_indexes.py
+# checks the remaining ones with EXPLAIN QUERY PLAN.
+
+RESERVED_ARGS = {"limit", "after", "fields", "expand", "sort"}
+_ARG = re.compile(r"^(\w+)(?:\[(\w+)\])?$")
+
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, values: column.in_(values),
+}
+# No "ne": an index can't seek to "everything but". "in" spans several values of
+# its column, so it is only offered on columns that are also a sort (see ListSpec.serves)
+EQUALITY = ("eq",)
+RANGE = ("eq", "gt", "gte", "lt", "lte")
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value)
+
+
+def parse_enum(enum_cls):
+    # Accepts the enum's value ("confirmed") or name ("CONFIRMED")
+    def parse(value):
+        try:
+            return enum_cls(value)
+        except ValueError:
+            return enum_cls[value]
+    return parse
+
+
+def is_indexed(attribute):
+    """True if the mapped column leads the primary key, a unique constraint or an index of its table."""
+    column = attribute.property.columns[0]
+    table = column.table
+    if column.index or column.unique:
+        return True
+    leading = [list(table.primary_key.columns)[0]]
+    leading += [list(index.columns)[0] for index in table.indexes]
+    leading += [list(c.columns)[0] for c in table.constraints if isinstance(c, UniqueConstraint) and c.columns]
+    return any(col is column for col in leading)
+
+
+class Filter:
+    def __init__(self, column, ops=EQUALITY, parse=str):
+        self.column = column
+        self.ops = ops
+        self.parse = parse
+
+
+def _index_columns(table):
+    """Column lists of the table's indexes, each ending in the primary key as SQLite stores them (rowid last)."""
+    primary_key = list(table.primary_key.columns)
+    lists = [primary_key]
+    lists += [list(index.columns) + primary_key for index in table.indexes]
+    lists += [list(c.columns) + primary_key for c in table.constraints if isinstance(c, UniqueConstraint) and c.columns]
+    return lists
+
+
+class ListSpec:
+    """
+    Whitelisted filters and sorts for one list resource.
+
+    Args:
+        model: Model class being listed.
+        filters (dict): query parameter name -> Filter.
+        sorts (dict): ?sort= name -> model attribute; clients prefix it with "-" to sort descending.
+        default_sort (str): ?sort= value used when the client sends none; if an index can't
+            serve it with the request's filters, the first of `sorts` that can is used instead.
+    """
+    def __init__(self, model, filters, sorts, default_sort="id"):
+        self.model = model
+        self.filters = filters
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.primary_key = getattr(model, inspect(model).primary_key[0].key)
+        for name, column in [*((n, f.column) for n, f in filters.items()), *sorts.items()]:
+            if not is_indexed(column):
+                raise ValueError(f"{model.__name__}.{name} is not backed by an index and cannot be filtered or sorted on")
+        self._indexes = _index_columns(model.__table__)
+        for name, filter_ in filters.items():
+            for op in filter_.ops:
+                if not any(self.serves(name, op, sort_name) for sort_name in sorts):
+                    raise ValueError(f"{model.__name__}.{name}[{op}] cannot be read in any sort order from one index")
+
+    def key_columns(self, sort_name):
+        column = self.sorts[sort_name]
+        return [column] if column.key == self.primary_key.key else [column, self.primary_key]
+
+    def serves(self, filter_name, op, sort_name):
+        """
+        Whether one index finds the rows matching `filter_name` `op` and
+        returns them in ?sort=`sort_name` order, so a page reads one page of
+        index entries. An equality pins the filter column, so the index must
+        continue with the remaining sort keys; a range or IN spans many
+        values of it, so the rows are only in order if it is the sort column.
+        """
+        column = self.filters[filter_name].column.property.columns[0]
+        keys = [attr.property.columns[0] for attr in self.key_columns(sort_name)]
+        if op == "eq":
+            wanted = [column, *(key for key in keys if key is not column)]
+        else:
+            wanted = keys
+            if wanted[0] is not column:
+                return False
+        return any(len(cols) >= len(wanted) and all(a is b for a, b in zip(cols, wanted)) for cols in self._indexes)
+
+    def apply(self, query):
+        """
+        Applies the request's filters to `query`.
+
+        Returns:
+            tuple: (query, key_columns, descending) ready for paginate().
+        """
+        applied = [] # (query parameter, filter name, op)
+        for arg in request.args:
+            if arg in RESERVED_ARGS:
+                continue
+            match = _ARG.match(arg)
+            spec = self.filters.get(match.group(1)) if match else None
+            if spec is None:
+                allowed = ", ".join(sorted(self.filters))
+                abort(400, message=f"Cannot filter on '{arg}'; allowed: {allowed}.")
+            op = match.group(2) or "eq"
+            if op not in spec.ops:
+                abort(400, message=f"'{op}' is not supported for {match.group(1)}; allowed: {', '.join(spec.ops)}.")
+            try:
+                if op == "in":
+                    value = [spec.parse(v) for raw in request.args.getlist(arg) for v in raw.split(",") if v]
+                else:
+                    value = spec.parse(request.args[arg])
+            except (ValueError, KeyError):
+                abort(400, message=f"Invalid value for '{arg}'.")
+            query = query.filter(OPERATORS[op](spec.column, value))
+            applied.append((arg, match.group(1), op))
+
+        sort = request.args.get("sort") or self._default_sort(applied)
+        descending = sort.startswith("-")
+        sort_name = sort.lstrip("-")
+        if sort_name not in self.sorts:
+            abort(400, message=f"Cannot sort by '{sort}'; allowed: {', '.join(sorted(self.sorts))}.")
+        for arg, name, op in applied:
+            if not self.serves(name, op, sort_name):
+                allowed = [s for s in self.sorts if self.serves(name, op, s)]
+                abort(400, message=f"Cannot combine '{arg}' with sort={sort_name}; "
+                                   f"sort by {', '.join(allowed) or 'another filter'} instead.")
+        return query, self.key_columns(sort_name), descending
+
+    def _default_sort(self, applied):
+        candidates = [self.default_sort, *(s for s in self.sorts if s != self.default_sort)]
+        for sort_name in candidates:
+            if all(self.serves(name, op, sort_name) for _, name, op in applied):
+                return sort_name
+        return self.default_sort
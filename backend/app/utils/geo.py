@@ -0,0 +1,91 @@
+import math
+from sqlalchemy import event
+from app.models import Provider, ProviderService, VerificationStatus
+
+
+# Grid index for "providers near me". The world is cut into fixed cells of
+# CELL_DEGREES on each side; Provider.geo_cell holds the cell of the provider's
+# base location and is indexed, so a search reads only the cells that can
+# reach the query point instead of scanning every provider.
+
+CELL_DEGREES = 0.1 # ~11 km of latitude
+LAT_CELLS = int(180 / CELL_DEGREES)
+LNG_CELLS = int(360 / CELL_DEGREES)
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def cell_for(lat, lng):
+    if lat is None or lng is None:
+        return None
+    row = min(int((lat + 90) / CELL_DEGREES), LAT_CELLS - 1)
+    col = int((lng + 180) / CELL_DEGREES) % LNG_CELLS
+    return row * LNG_CELLS + col
+
+
+def cells_within(lat, lng, radius_km):
+    """Every cell that intersects the square of half-side `radius_km` around the point."""
+    row = min(int((lat + 90) / CELL_DEGREES), LAT_CELLS - 1)
+    col = int((lng + 180) / CELL_DEGREES) % LNG_CELLS
+    d_rows = math.ceil(radius_km / KM_PER_DEGREE / CELL_DEGREES)
+    cos_lat = max(math.cos(math.radians(min(abs(lat) + d_rows * CELL_DEGREES, 89.9))), 0.01)
+    d_cols = min(math.ceil(radius_km / (KM_PER_DEGREE * cos_lat) / CELL_DEGREES), LNG_CELLS // 2)
+
+    cells = []
+    for r in range(max(row - d_rows, 0), min(row + d_rows, LAT_CELLS - 1) + 1):
+        for c in range(col - d_cols, col + d_cols + 1):
+            cells.append(r * LNG_CELLS + c % LNG_CELLS) # wraps across the antimeridian
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@event.listens_for(Provider, "before_insert")
+@event.listens_for(Provider, "before_update")
+def _update_geo_cell(mapper, connection, target):
+    target.geo_cell = cell_for(target.latitude, target.longitude)
+
+
+def search_providers(session, lat, lng, service_id, max_radius_km, default_radius_km, limit=20):
+    """
+    Available, approved providers offering `service_id` whose service radius
+    reaches (lat, lng), nearest first.
+
+    Returns a list of dicts with provider_id, user_id, distance_km, rating
+    and service_radius.
+    """
+    cells = cells_within(lat, lng, max_radius_km)
+    rows = session.query(
+        Provider.id, Provider.user_id, Provider.latitude, Provider.longitude,
+        Provider.service_radius, Provider.rating,
+    ).join(ProviderService, ProviderService.provider_id == Provider.id).filter(
+        ProviderService.service_id == service_id,
+        Provider.geo_cell.in_(cells),
+        Provider.is_available.is_(True),
+        Provider.verification_status == VerificationStatus.APPROVED,
+    ).all()
+
+    # Exact distance check only for the candidates the grid let through
+    results = []
+    for provider_id, user_id, p_lat, p_lng, radius, rating in rows:
+        distance = haversine_km(lat, lng, p_lat, p_lng)
+        reach = min(radius if radius is not None else default_radius_km, max_radius_km)
+        if distance <= reach:
+            results.append((distance, provider_id, user_id, radius, rating))
+
+    results.sort()
+    return [
+        {
+            "provider_id": provider_id,
+            "user_id": user_id,
+            "distance_km": round(distance, 3),
+            "service_radius": radius,
+            "rating": rating,
+        }
+        for distance, provider_id, user_id, radius, rating in results[:limit]
+    ]
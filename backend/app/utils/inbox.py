@@ -0,0 +1,140 @@
+from sqlalchemy import event, func, inspect, select, tuple_, union_all
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Notifications, Users
+
+
+# Per-user notification inbox.
+#
+# Users.unread_notifications is kept in step with the user's unread rows by
+# the mapper hooks below. Each hook issues one UPDATE on the flush
+# connection, so the counter commits or rolls back with the notification, and
+# the badge poll is a primary-key read. mark_read() bypasses the mapper (one
+# bulk UPDATE) and adjusts the counter itself. `flask stats rebuild-unread`
+# recomputes every counter after other bulk changes. The counter is not a
+# profile edit: every UPDATE pins Users.updated_at to itself so the user's
+# ETag and Last-Modified do not move with each notification.
+#
+# Pages are walked newest first on (created_at, id) through
+# ix_notifications_inbox (user_id, is_read, created_at).
+
+users = Users.__table__
+notifications = Notifications.__table__
+INBOX_KEY = [Notifications.created_at, Notifications.id]
+
+
+def _bump_unread(connection, user_id, delta):
+    if user_id is None or not delta:
+        return
+    connection.execute(
+        users.update().where(users.c.id == user_id)
+        .values(unread_notifications=users.c.unread_notifications + delta, updated_at=users.c.updated_at)
+    )
+
+
+def _unread_owner(target, previous=False):
+    # user_id whose counter this notification is included in, or None once read
+    if not previous:
+        return None if target.is_read else target.user_id
+    state = inspect(target).attrs
+
+    def before(attr):
+        history = state[attr].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(target, attr) if not history.added else None
+
+    return None if before("is_read") else before("user_id")
+
+
+# Old values are needed even when the notification was expired before the change
+for _attribute in (Notifications.is_read, Notifications.user_id):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value, active_history=True, retval=True)
+
+
+@event.listens_for(Notifications, "after_insert")
+def _notification_inserted(mapper, connection, target):
+    _bump_unread(connection, _unread_owner(target), 1)
+
+
+@event.listens_for(Notifications, "after_update")
+def _notification_updated(mapper, connection, target):
+    previous, current = _unread_owner(target, previous=True), _unread_owner(target)
+    if previous != current:
+        _bump_unread(connection, previous, -1)
+        _bump_unread(connection, current, 1)
+
+
+# before_delete: the row (and any unloaded attribute) is still readable here
+@event.listens_for(Notifications, "before_delete")
+def _notification_deleted(mapper, connection, target):
+    _bump_unread(connection, _unread_owner(target, previous=True), -1)
+
+
+def unread_count(user_id):
+    """The user's unread notification count: one primary-key read."""
+    return db.session.execute(
+        select(Users.unread_notifications).where(Users.id == user_id)
+    ).scalar()
+
+
+def inbox_page(user_id, limit, before=None, unread_only=False):
+    """
+    Up to `limit` of the user's notifications, newest first.
+
+    Args:
+        user_id (int): Owner of the inbox.
+        limit (int): Maximum rows returned.
+        before (list): (created_at, id) of the last row of the previous page.
+        unread_only (bool): Only unread notifications.
+    """
+    def partition(is_read):
+        query = select(Notifications).where(Notifications.user_id == user_id, Notifications.is_read == is_read)
+        if before is not None:
+            query = query.where(tuple_(*INBOX_KEY) < tuple_(*before))
+        return query.order_by(*(c.desc() for c in INBOX_KEY)).limit(limit)
+
+    if unread_only:
+        return db.session.scalars(partition(False)).all()
+    # Read and unread rows are separate ranges of the index; take the newest
+    # `limit` from each and merge, instead of sorting the user's whole history
+    merged = union_all(*(select(partition(flag).subquery()) for flag in (False, True))).subquery()
+    row = aliased(Notifications, merged)
+    return db.session.scalars(select(row).order_by(row.created_at.desc(), row.id.desc()).limit(limit)).all()
+
+
+def mark_read(user_id, up_to=None):
+    """
+    Marks the user's unread notifications read with one UPDATE and takes them
+    off the unread counter in the same transaction. Returns how many changed.
+
+    Args:
+        user_id (int): Owner of the inbox.
+        up_to (list): (created_at, id) of the newest notification to mark;
+            newer ones stay unread. None marks everything.
+    """
+    c = notifications.c
+    query = notifications.update().where(c.user_id == user_id, c.is_read == False) # noqa: E712
+    if up_to is not None:
+        query = query.where(tuple_(c.created_at, c.id) <= tuple_(*up_to))
+    marked = db.session.execute(query.values(is_read=True)).rowcount
+    _bump_unread(db.session.connection(), user_id, -marked)
+    db.session.commit()
+    return marked
+
+
+def rebuild_unread_counts():
+    """
+    Recomputes every user's unread counter with one correlated UPDATE.
+    Returns the number of users updated.
+    """
+    unread = (
+        select(func.count(notifications.c.id))
+        .where(notifications.c.user_id == users.c.id, notifications.c.is_read == False) # noqa: E712
+        .scalar_subquery()
+    )
+    updated = db.session.execute(
+        users.update().values(unread_notifications=unread, updated_at=users.c.updated_at)
+    ).rowcount
+    db.session.commit()
+    return updated
@@ -0,0 +1,65 @@
+from collections import deque, namedtuple
+
+
+# Delivery channels for the notification dispatcher. A channel receives
+# batches of Messages and reports a result per message; the dispatcher owns
+# claiming, retries and status bookkeeping. Register extra channels (email,
+# SMS, push) with register_channel() and list them in NOTIFY_CHANNELS.
+
+Message = namedtuple("Message", "delivery_id notification_id user_id type message attempt")
+
+
+class ChannelBusy(Exception):
+    """Raised by Channel.send to push a whole batch back without using up an attempt."""
+    def __init__(self, retry_after=5):
+        super().__init__(f"Channel busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Channel:
+    """
+    Base class for delivery channels.
+
+    Attributes:
+        name (str): Key used in NOTIFY_CHANNELS and notification_outbox.channel.
+        batch_size (int): Most messages passed to one send() call.
+    """
+    name = None
+    batch_size = 100
+
+    def send(self, messages):
+        """
+        Delivers `messages` (a list of Message).
+
+        Returns:
+            list: None for each delivered message, or an error string to retry it.
+            Raising fails (and retries) the whole batch; raise ChannelBusy to
+            defer it without counting an attempt.
+        """
+        raise NotImplementedError
+
+
+class LocalChannel(Channel):
+    """In-process stub: records the last `keep` messages and delivers everything."""
+    name = "local"
+    batch_size = 1000
+
+    def __init__(self, keep=1000):
+        self.sent = deque(maxlen=keep)
+        self.count = 0
+
+    def send(self, messages):
+        self.sent.extend(messages)
+        self.count += len(messages)
+        return [None] * len(messages)
+
+
+channels = {}
+
+
+def register_channel(channel):
+    channels[channel.name] = channel
+    return channel
+
+
+register_channel(LocalChannel())
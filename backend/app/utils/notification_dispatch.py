@@ -0,0 +1,277 @@
+import os
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, case, event, exists, select
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Notifications, NotificationDelivery
+from app.utils.notification_channels import ChannelBusy, Message, channels
+
+
+# Asynchronous notification delivery through a transactional outbox.
+#
+# Inserting a Notifications row also inserts one notification_outbox row per
+# channel in NOTIFY_CHANNELS, on the same flush connection, so a request only
+# pays for two INSERTs and never waits on delivery I/O. Dispatcher threads
+# claim due outbox rows in batches (the claim is a lease: rows not settled
+# before it runs out are picked up again), hand them to each channel in
+# chunks of the channel's batch_size, and record every outcome with one
+# executemany. Failures are retried with exponential backoff up to
+# NOTIFY_MAX_ATTEMPTS; the notification's status then moves from "sent" to
+# "delivered" (every channel delivered) or "failed" (any channel gave up).
+#
+# Backpressure: a thread only claims a new batch after settling its last
+# one, so at most threads * batch_size rows are in flight and any backlog
+# waits in the table, not in memory. A channel that is overloaded raises
+# ChannelBusy to hand its batch back without using up an attempt.
+
+outbox = NotificationDelivery.__table__
+notifications = Notifications.__table__
+
+
+@event.listens_for(Notifications, "after_insert")
+def _queue_deliveries(mapper, connection, target):
+    names = app.config["NOTIFY_CHANNELS"]
+    if names:
+        now = datetime.utcnow()
+        connection.execute(outbox.insert(), [
+            {"notification_id": target.id, "channel": name, "status": "pending", "attempts": 0,
+             "available_at": now, "created_at": now}
+            for name in names
+        ])
+
+
+# PRAGMA foreign_keys is off, so the outbox's ON DELETE CASCADE never runs:
+# take a deleted notification's deliveries with it
+@event.listens_for(Notifications, "before_delete")
+def _drop_deliveries(mapper, connection, target):
+    connection.execute(outbox.delete().where(outbox.c.notification_id == target.id))
+
+
+class Dispatcher:
+    """
+    Pool of threads draining the notification outbox.
+
+    Args:
+        threads (int): Dispatcher threads in this process.
+        batch_size (int): Outbox rows claimed per batch.
+        poll_interval (float): Seconds an idle thread waits before looking again (wake() cuts it short).
+        lease_seconds (int): How long a claim is held before the rows are handed out again.
+        max_attempts (int): Attempts per delivery before it is marked failed.
+        backoff (float): Seconds before the first retry; doubles per attempt, with jitter.
+        engine: Engine to use instead of db.engine (benchmarks).
+    """
+    def __init__(self, threads=2, batch_size=500, poll_interval=2, lease_seconds=60, max_attempts=5, backoff=10,
+                 engine=None):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._engine = engine
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def engine(self):
+        return self._engine if self._engine is not None else db.engine
+
+    def start(self):
+        """Starts the threads once per process (a forked worker starts its own)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._workers = [
+                threading.Thread(target=self._run, name=f"notify-dispatch-{i}", daemon=True)
+                for i in range(self.threads)
+            ]
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        self._pid = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        with app.app_context():
+            while not self._stop.is_set():
+                try:
+                    handled = self.dispatch_batch()
+                except Exception as e:
+                    app.logger.error(f"Notification dispatch failed: {e}")
+                    handled = 0
+                if not handled:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+
+    def dispatch_batch(self):
+        """Claims, sends and settles one batch of due deliveries. Returns how many were handled."""
+        token = uuid.uuid4().hex
+        rows = self._claim(token)
+        if rows:
+            self._settle(token, rows, self._send(rows))
+        return len(rows)
+
+    def _claim(self, token):
+        c = outbox.c
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            # Leases that ran out (a dispatcher died mid-batch) go back to pending
+            conn.execute(
+                outbox.update().where(c.status == "sending", c.available_at <= now)
+                .values(status="pending", claimed_by=None)
+            )
+            ids = conn.execute(
+                select(c.id).where(c.status == "pending", c.available_at <= now)
+                .order_by(c.available_at).limit(self.batch_size)
+            ).scalars().all()
+            if not ids:
+                return []
+            # Guarded by status, so two claimers racing for a row cannot both get it
+            conn.execute(
+                outbox.update().where(c.id.in_(ids), c.status == "pending")
+                .values(status="sending", claimed_by=token,
+                        available_at=now + timedelta(seconds=self.lease_seconds))
+            )
+            n = notifications.c
+            rows = conn.execute(
+                select(c.id, c.notification_id, c.channel, c.attempts, n.user_id, n.type, n.message)
+                .join(notifications, n.id == c.notification_id)
+                .where(c.id.in_(ids), c.claimed_by == token)
+            ).all()
+            # Claimed deliveries whose notification is gone (deleted without the ORM) can never be sent
+            orphans = set(ids) - {row.id for row in rows}
+            if orphans:
+                conn.execute(
+                    outbox.update().where(c.id.in_(orphans), c.claimed_by == token)
+                    .values(status="failed", claimed_by=None, available_at=now, last_error="Notification deleted")
+                )
+            return rows
+
+    def _send(self, rows):
+        # {outbox id: None (delivered) | error string | ChannelBusy}
+        results = {}
+        by_channel = {}
+        for row in rows:
+            by_channel.setdefault(row.channel, []).append(row)
+        for name, batch in by_channel.items():
+            channel = channels.get(name)
+            size = channel.batch_size if channel else len(batch)
+            for start in range(0, len(batch), size):
+                chunk = batch[start:start + size]
+                if channel is None:
+                    outcome = [f"Unknown channel {name!r}"] * len(chunk)
+                else:
+                    messages = [
+                        Message(row.id, row.notification_id, row.user_id,
+                                row.type.value if row.type else None, row.message, row.attempts + 1)
+                        for row in chunk
+                    ]
+                    try:
+                        outcome = channel.send(messages)
+                    except ChannelBusy as busy:
+                        outcome = [busy] * len(chunk)
+                    except Exception as e:
+                        outcome = [f"{type(e).__name__}: {e}"] * len(chunk)
+                for row, result in zip(chunk, outcome):
+                    results[row.id] = result
+        return results
+
+    def _retry_at(self, now, attempts):
+        delay = self.backoff * 2 ** (attempts - 1)
+        return now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def _settle(self, token, rows, results):
+        now = datetime.utcnow()
+        updates = []
+        finished = set() # notifications with a delivery that reached a final state
+        for row in rows:
+            result = results.get(row.id, "No result from channel")
+            attempts, error = row.attempts, None
+            if result is None:
+                status, available_at = "delivered", now
+            elif isinstance(result, ChannelBusy):
+                status, available_at = "pending", now + timedelta(seconds=result.retry_after)
+            else:
+                attempts, error = attempts + 1, str(result)[:255]
+                if attempts >= self.max_attempts:
+                    status, available_at = "failed", now
+                else:
+                    status, available_at = "pending", self._retry_at(now, attempts)
+            if status != "pending":
+                finished.add(row.notification_id)
+            updates.append({"b_id": row.id, "b_status": status, "b_attempts": attempts,
+                            "b_available_at": available_at, "b_error": error})
+
+        c = outbox.c
+        n = notifications.c
+        with self.engine.begin() as conn:
+            # Only rows still under this claim; a lapsed lease may have been handed out again
+            conn.execute(
+                outbox.update().where(c.id == bindparam("b_id"), c.claimed_by == token).values(
+                    status=bindparam("b_status"), attempts=bindparam("b_attempts"),
+                    available_at=bindparam("b_available_at"), last_error=bindparam("b_error"), claimed_by=None,
+                ),
+                updates,
+            )
+            if finished:
+                deliveries = exists().where(c.notification_id == n.id)
+                conn.execute(
+                    notifications.update().where(n.id.in_(finished)).values(status=case(
+                        (deliveries.where(c.status == "failed"), "failed"),
+                        (~deliveries.where(c.status != "delivered"), "delivered"),
+                        else_=n.status,
+                    ))
+                )
+
+
+dispatcher = Dispatcher(
+    threads=app.config["NOTIFY_DISPATCH_THREADS"],
+    batch_size=app.config["NOTIFY_BATCH_SIZE"],
+    poll_interval=app.config["NOTIFY_POLL_INTERVAL"],
+    lease_seconds=app.config["NOTIFY_LEASE_SECONDS"],
+    max_attempts=app.config["NOTIFY_MAX_ATTEMPTS"],
+    backoff=app.config["NOTIFY_RETRY_BACKOFF"],
+)
+
+
+@app.before_request
+def _start_dispatcher():
+    # First request in each worker starts its pool, which also drains any backlog left by a restart
+    if app.config["NOTIFY_DISPATCH_IN_WORKERS"]:
+        dispatcher.start()
+
+
+# Wake the pool as soon as a new notification is committed instead of on its next poll
+@event.listens_for(Session, "after_flush")
+def _note_queued_notifications(session, flush_context):
+    if any(isinstance(obj, Notifications) for obj in session.new):
+        session.info["notifications_queued"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop("notifications_queued", False):
+        dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_queued_notifications(session):
+    session.info.pop("notifications_queued", None)
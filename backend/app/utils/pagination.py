@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from flask import request, current_app
+from flask_restful import abort
+from sqlalchemy import tuple_, DateTime
+
+
+# Keyset (cursor) pagination for the list resources.
+# Instead of OFFSET we remember the sort key of the last row we returned and ask
+# for rows strictly "after" it, so every page is an index range scan no matter
+# how deep the client pages.
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        return None
+
+    values = [_cursor_value(column, value) for column, value in zip(columns, payload)]
+    return None if any(value is None for value in values) else values
+
+
+def _cursor_value(column, value):
+    # A cursor value of the column's type, or None if the client sent anything else
+    if isinstance(column.type, DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return value
+    if expected in (float, Decimal):
+        return value if isinstance(value, (int, float)) else None
+    return value if isinstance(value, expected) else None
+
+
+def get_page_limit():
+    default = current_app.config.get("PAGINATION_DEFAULT_LIMIT", 50)
+    maximum = current_app.config.get("PAGINATION_MAX_LIMIT", 200)
+    raw = request.args.get("limit")
+    if raw is None:
+        return min(default, maximum)
+    try:
+        limit = int(raw)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        abort(400, message="limit must be a positive integer.")
+    return min(limit, maximum)
+
+
+def paginate(query, schema, key_columns, descending=False, cursor_values=None):
+    """
+    Returns one page of `query` serialized with `schema` (a many=True schema).
+
+    Args:
+        query: The base SQLAlchemy query (filters already applied).
+        schema: Marshmallow schema used to dump the rows.
+        key_columns (list): Columns forming a unique, indexed sort key, e.g. [Model.id].
+        descending (bool): Walk the key from newest to oldest.
+        cursor_values (callable): Returns the key values of a row, for keys on
+            joined tables. Defaults to reading the key attributes off the row.
+    """
+    limit = get_page_limit()
+    after = request.args.get("after")
+
+    if after:
+        values = decode_cursor(after, key_columns)
+        if values is None:
+            abort(400, message="Invalid cursor.")
+        key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+        bound = tuple_(*values) if len(key_columns) > 1 else values[0]
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [c.desc() if descending else c.asc() for c in key_columns]
+    # Fetch one extra row so we know whether there is another page
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if cursor_values is not None:
+            next_cursor = encode_cursor(cursor_values(last))
+        else:
+            next_cursor = encode_cursor([getattr(last, c.key) for c in key_columns])
+
+    return {
+        "items": schema.dump(rows),
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }
@@ -0,0 +1,124 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from werkzeug.security import check_password_hash, generate_password_hash
+from app import app
+
+
+# Password hashing off the request threads.
+#
+# pbkdf2 at PASSWORD_HASH_METHOD's iteration count costs hundreds of
+# milliseconds of CPU per hash, so a burst of logins hashed inline on request
+# threads takes every core the worker has and stalls all its other requests.
+# Each worker instead sends hashes and checks to a small process pool, and
+# the request thread just waits for the result. At most
+# PASSWORD_HASH_MAX_CONCURRENT jobs per worker are running or queued in the
+# pool, and a request that cannot get a slot within
+# PASSWORD_HASH_QUEUE_TIMEOUT raises HasherBusy, which the handler below
+# answers with 503 and Retry-After, instead of piling up behind the storm. The pool runs at a lower CPU priority
+# (PASSWORD_HASH_NICE), so a storm takes spare CPU rather than request time.
+#
+# Stored hashes record their own method, iterations and salt, so a login
+# whose hash was made with other parameters is rehashed with the current ones.
+
+
+class HasherBusy(Exception):
+    """No hashing slot came free within the queue timeout."""
+
+
+class PasswordHasher:
+    """
+    Bounded per-worker process pool for hashing and checking passwords.
+
+    Args:
+        method (str): werkzeug method for new hashes, e.g. "pbkdf2:sha256:1000000".
+        salt_length (int): Salt characters for new hashes.
+        processes (int): Hashing processes per worker; 0 hashes inline on the request thread.
+        max_concurrent (int): Jobs allowed running or queued in the pool at once.
+        queue_timeout (float): Seconds a request waits for a slot before HasherBusy.
+        nice (int): Niceness added to the pool processes, so request threads get the CPU first.
+    """
+    def __init__(self, method, salt_length=16, processes=2, max_concurrent=8, queue_timeout=5, nice=0):
+        self.method = method
+        self.salt_length = salt_length
+        self.processes = processes
+        self.queue_timeout = queue_timeout
+        self.nice = nice
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def hash(self, password):
+        """A new hash of `password` with the current method and salt length."""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether `pwhash` was made with a method, iteration count or salt length other than the current ones."""
+        method, _, rest = pwhash.partition("$")
+        salt = rest.partition("$")[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool, self._pid = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self.processes:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusy()
+        try:
+            pool = self._executor()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A pool process died (e.g. OOM-killed): start a fresh pool and try once more
+                self._reset(pool)
+                return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _executor(self):
+        # Each worker process gets its own pool; one inherited across a fork is unusable
+        pool = self._pool
+        if pool is not None and self._pid == os.getpid():
+            return pool
+        with self._lock:
+            if self._pid != os.getpid():
+                # Spawned, not forked: the children only import werkzeug, not the app and its threads
+                # (like any spawn pool, a plain script entry point needs an `if __name__ == "__main__"` guard)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=get_context("spawn"),
+                    initializer=os.nice if self.nice and hasattr(os, "nice") else None, initargs=(self.nice,),
+                )
+                self._pid = os.getpid()
+            return self._pool
+
+    def _reset(self, broken):
+        with self._lock:
+            if self._pool is broken: # Another thread may have replaced it already
+                self._pool, self._pid = None, None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    method=app.config["PASSWORD_HASH_METHOD"],
+    salt_length=app.config["PASSWORD_SALT_LENGTH"],
+    processes=app.config["PASSWORD_HASH_PROCESSES"],
+    max_concurrent=app.config["PASSWORD_HASH_MAX_CONCURRENT"],
+    queue_timeout=app.config["PASSWORD_HASH_QUEUE_TIMEOUT"],
+    nice=app.config["PASSWORD_HASH_NICE"],
+)
+
+
+@app.errorhandler(HasherBusy)
+def _hasher_busy(error):
+    return {"message": "Server is busy, please retry shortly."}, 503, {"Retry-After": "1"}
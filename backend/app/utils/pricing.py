@@ -0,0 +1,175 @@
+import threading
+import time
+from bisect import bisect_right
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import app
+from app.models import Service, ServiceAddOn, AreaPricingRule, PricingModel
+from app.utils.surge import demand_model
+
+
+# Server-side pricing. For each service we precompute a compact price sheet:
+# the pricing model, the AreaPricingRule bands sorted by min_area (so a band
+# lookup is a binary search) and the active add-on prices. Sheets are cached
+# per worker, dropped when this worker commits a change to the service, its
+# bands or its add-ons, and otherwise refreshed after PRICING_CACHE_TTL.
+
+class PricingError(ValueError):
+    pass
+
+
+class PriceSheet:
+    __slots__ = ("service_id", "pricing_model", "base_price", "duration", "band_mins", "bands", "add_ons")
+
+    def __init__(self, service, rules, add_ons):
+        self.service_id = service.id
+        self.pricing_model = service.pricing_model
+        self.base_price = service.base_price
+        self.duration = service.estimated_duration
+        rules = sorted(rules, key=lambda r: float("-inf") if r.min_area is None else r.min_area)
+        self.band_mins = [float("-inf") if r.min_area is None else r.min_area for r in rules]
+        self.bands = [
+            (float("inf") if r.max_area is None else r.max_area, r.price_per_unit, r.base_fee or 0.0) for r in rules
+        ]
+        self.add_ons = {a.id: a.price for a in add_ons}
+
+    def base_cost(self, area=None, hours=None):
+        if self.pricing_model == PricingModel.FIXED:
+            return self.base_price
+        if self.pricing_model == PricingModel.HOURLY:
+            if hours is None:
+                if not self.duration:
+                    raise PricingError("hours is required for this service.")
+                hours = self.duration / 60
+            if hours <= 0:
+                raise PricingError("hours must be positive.")
+            return self.base_price * hours
+        # AREA_BASED: the band with the greatest min_area <= area
+        if area is None or area <= 0:
+            raise PricingError("A positive area is required for this service.")
+        i = bisect_right(self.band_mins, area) - 1
+        if i < 0 or area > self.bands[i][0]:
+            raise PricingError(f"No pricing band covers an area of {area}.")
+        _, price_per_unit, base_fee = self.bands[i]
+        return base_fee + price_per_unit * area
+
+    def add_on_cost(self, add_on_ids):
+        total = 0.0
+        for add_on_id in add_on_ids or ():
+            price = self.add_ons.get(add_on_id)
+            if price is None:
+                raise PricingError(f"Add-on {add_on_id} is not available for this service.")
+            total += price
+        return total
+
+
+class PricingEngine:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._sheets = {}
+        self._lock = threading.Lock()
+
+    def sheets(self, service_ids):
+        """Price sheets for the given services, loading all missing ones with three queries."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for service_id in set(service_ids):
+                entry = self._sheets.get(service_id)
+                if entry is not None and entry[1] > now:
+                    found[service_id] = entry[0]
+                else:
+                    missing.append(service_id)
+        if not missing:
+            return found
+
+        services = Service.query.filter(Service.id.in_(missing), Service.is_active.is_(True)).all()
+        rules, add_ons = {}, {}
+        for rule in AreaPricingRule.query.filter(AreaPricingRule.service_id.in_(missing)):
+            rules.setdefault(rule.service_id, []).append(rule)
+        for add_on in ServiceAddOn.query.filter(ServiceAddOn.service_id.in_(missing), ServiceAddOn.is_active.is_(True)):
+            add_ons.setdefault(add_on.service_id, []).append(add_on)
+
+        with self._lock:
+            for service in services:
+                sheet = PriceSheet(service, rules.get(service.id, ()), add_ons.get(service.id, ()))
+                self._sheets[service.id] = (sheet, now + self.ttl)
+                found[service.id] = sheet
+        return found
+
+    def quote_many(self, items):
+        """
+        Prices a batch of items in one pass.
+
+        Args:
+            items (list): dicts with service_id and optional area, hours, add_on_ids,
+                city and scheduled_at (both needed for the surge multiplier).
+
+        Returns:
+            list: one dict per item, either the price breakdown or {"error": ...}.
+        """
+        sheets = self.sheets(item["service_id"] for item in items)
+        results = []
+        for item in items:
+            sheet = sheets.get(item["service_id"])
+            if sheet is None:
+                results.append({"service_id": item["service_id"], "error": "Service not found or inactive."})
+                continue
+            try:
+                base = sheet.base_cost(item.get("area"), item.get("hours"))
+                extras = sheet.add_on_cost(item.get("add_on_ids"))
+            except PricingError as err:
+                results.append({"service_id": item["service_id"], "error": str(err)})
+                continue
+            # Surge applies to the service itself, not to add-ons
+            surge = 1.0
+            if app.config["SURGE_PRICING_ENABLED"] and item.get("city") and item.get("scheduled_at"):
+                surge = demand_model.multiplier(item["city"], item["service_id"], item["scheduled_at"])
+                base *= surge
+            results.append({
+                "service_id": item["service_id"],
+                "pricing_model": sheet.pricing_model.value,
+                "surge_multiplier": surge,
+                "base_cost": round(base, 2),
+                "add_ons_cost": round(extras, 2),
+                "total_cost": round(base + extras, 2),
+            })
+        return results
+
+    def quote(self, service_id, area=None, hours=None, add_on_ids=None, city=None, scheduled_at=None):
+        """Prices a single item; raises PricingError instead of returning an error entry."""
+        result = self.quote_many([{
+            "service_id": service_id, "area": area, "hours": hours, "add_on_ids": add_on_ids,
+            "city": city, "scheduled_at": scheduled_at,
+        }])[0]
+        if "error" in result:
+            raise PricingError(result["error"])
+        return result
+
+    def invalidate(self, service_id):
+        with self._lock:
+            self._sheets.pop(service_id, None)
+
+
+pricing_engine = PricingEngine(ttl=app.config["PRICING_CACHE_TTL"])
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_pricing_changes(session, flush_context):
+    changed = session.info.setdefault("pricing_changes", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Service):
+            changed.add(obj.id)
+        elif isinstance(obj, (ServiceAddOn, AreaPricingRule)):
+            changed.add(obj.service_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_price_sheets(session):
+    for service_id in session.info.pop("pricing_changes", ()):
+        pricing_engine.invalidate(service_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pricing_changes(session):
+    session.info.pop("pricing_changes", None)
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Users, Provider
+
+
+class Principal:
+    """
+    The few facts about the authenticated user that the auth decorators need.
+    """
+    __slots__ = ("id", "role", "is_active", "provider_id")
+
+    def __init__(self, id, role, is_active, provider_id):
+        self.id = id
+        self.role = role
+        self.is_active = is_active
+        self.provider_id = provider_id
+
+
+class PrincipalCache:
+    """
+    Per-worker LRU cache of Principal records with a TTL.
+
+    Writes made through this worker's sessions invalidate entries on commit
+    (see the listeners below). Writes made by other workers are only picked up
+    once the TTL runs out, so keep it short.
+    """
+    def __init__(self, maxsize=10_000, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {} # user_id -> invalidations seen; a load only caches if none happened meanwhile
+        self._epoch = 0 # bumped by clear() and when _generations is pruned
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                principal, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(user_id)
+                    return principal
+                del self._entries[user_id]
+            generation = (self._epoch, self._generations.get(user_id, 0))
+
+        principal = self._load(user_id)
+        if principal is not None:
+            with self._lock:
+                # Invalidated while we were loading: what we read may be the old row
+                if generation != (self._epoch, self._generations.get(user_id, 0)):
+                    return principal
+                self._entries[user_id] = (principal, now + self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if len(self._generations) >= self.maxsize:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    @staticmethod
+    def _load(user_id):
+        # Plain column query: no ORM identity map, no joined-eager `provider` row
+        row = db.session.query(Users.id, Users.role, Users.is_active, Provider.id) \
+            .outerjoin(Provider, Provider.user_id == Users.id) \
+            .filter(Users.id == user_id) \
+            .first()
+        if row is None:
+            return None
+        return Principal(row[0], row[1], row[2], row[3])
+
+
+principal_cache = PrincipalCache(
+    maxsize=app.config["PRINCIPAL_CACHE_SIZE"],
+    ttl=app.config["PRINCIPAL_CACHE_TTL"],
+)
+
+
+# Invalidate on commit rather than on flush, so another thread can't re-cache
+# the old row between our flush and our commit.
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    changed = session.info.setdefault("principal_changes", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Users) and obj.id is not None:
+            changed.add(obj.id)
+        elif isinstance(obj, Provider) and obj.user_id is not None:
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session):
+    for user_id in session.info.pop("principal_changes", ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop("principal_changes", None)
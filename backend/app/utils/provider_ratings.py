@@ -0,0 +1,105 @@
+from sqlalchemy import event, case, func, inspect
+from app import db
+from app.models import Provider, Review
+
+
+# Keeps Provider.rating_sum / rating_count / rating_1..rating_5 and the derived
+# Provider.rating in step with approved Review rows. Each hook issues one
+# UPDATE on the flush connection, so the aggregate commits with the review.
+# `flask stats rebuild-ratings` recomputes everything for backfill.
+
+providers = Provider.__table__
+DEFAULT_RATING = 5.0
+STARS = range(1, 6)
+
+
+def _apply(connection, provider_id, rating, sign):
+    """Adds (sign=1) or removes (sign=-1) one review's contribution."""
+    if provider_id is None or rating is None:
+        return
+    c = providers.c
+    new_sum = c.rating_sum + sign * rating
+    new_count = c.rating_count + sign
+    values = {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        # Right-hand columns refer to the pre-update row, so this is the new average
+        "rating": case((new_count > 0, new_sum * 1.0 / new_count), else_=DEFAULT_RATING),
+    }
+    if rating in STARS:
+        values[f"rating_{rating}"] = c[f"rating_{rating}"] + sign
+    connection.execute(providers.update().where(c.id == provider_id).values(**values))
+
+
+def _contribution(review):
+    # (provider_id, rating) this review counts for, or None when unapproved
+    return (review.provider_id, review.rating) if review.is_approved else None
+
+
+def _previous(target):
+    state = inspect(target).attrs
+
+    def before(attr):
+        history = state[attr].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(target, attr) if not history.added else None
+
+    if not before("is_approved"):
+        return None
+    return before("provider_id"), before("rating")
+
+
+# Old values are needed even when the review was expired before the change
+for _attribute in (Review.rating, Review.is_approved, Review.provider_id):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value, active_history=True, retval=True)
+
+
+@event.listens_for(Review, "after_insert")
+def _review_inserted(mapper, connection, target):
+    current = _contribution(target)
+    if current:
+        _apply(connection, *current, 1)
+
+
+@event.listens_for(Review, "after_update")
+def _review_updated(mapper, connection, target):
+    previous, current = _previous(target), _contribution(target)
+    if previous == current:
+        return
+    if previous:
+        _apply(connection, *previous, -1)
+    if current:
+        _apply(connection, *current, 1)
+
+
+# before_delete: the row (and any unloaded attribute) is still readable here
+@event.listens_for(Review, "before_delete")
+def _review_deleted(mapper, connection, target):
+    previous = _previous(target)
+    if previous:
+        _apply(connection, *previous, -1)
+
+
+def rebuild_provider_ratings():
+    """
+    Recomputes every provider's rating aggregates from approved reviews with
+    one grouped query. Returns the number of providers updated.
+    """
+    star_columns = [func.sum(case((Review.rating == star, 1), else_=0)) for star in STARS]
+    rows = db.session.query(
+        Review.provider_id, func.coalesce(func.sum(Review.rating), 0), func.count(Review.id), *star_columns
+    ).filter(Review.is_approved.is_(True)).group_by(Review.provider_id).all()
+    aggregates = {row[0]: row[1:] for row in rows}
+
+    updated = 0
+    for provider in Provider.query.yield_per(1000):
+        rating_sum, rating_count, *histogram = aggregates.get(provider.id, (0, 0, 0, 0, 0, 0, 0))
+        provider.rating_sum = rating_sum
+        provider.rating_count = rating_count
+        for star, count in zip(STARS, histogram):
+            setattr(provider, f"rating_{star}", count)
+        provider.rating = rating_sum / rating_count if rating_count else DEFAULT_RATING
+        updated += 1
+    db.session.commit()
+    return updated
@@ -0,0 +1,295 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Booking, BookingStatus, Payment, Notifications, NotificationType, ReminderLog
+from app.utils.timing_wheel import TimingWheel
+
+
+# Booking and payment reminders.
+#
+# Each worker keeps the reminders due in the next REMINDER_WINDOW_HOURS in a
+# TimingWheel. The window is loaded with two index range scans
+# (ix_bookings_status_scheduled, ix_payments_status_due) and reloaded every
+# REMINDER_REFILL_INTERVAL; bookings and payments committed through this
+# worker are rescheduled or cancelled right away. Every tick the scheduler
+# thread takes what came due and fires it in batches: one query re-checks
+# the rows (another worker may have cancelled or moved them), the
+# reminder_log primary key claims each reminder so only one worker sends it,
+# and the Notifications rows commit with the claims. They are delivered by
+# the notification dispatcher.
+#
+# On start the window reaches back REMINDER_RECOVERY_HOURS, so reminders a
+# restart missed are still sent (the log skips ones already sent).
+
+ACTIVE_BOOKING = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+UNPAID = "pending"
+FIRE_BATCH = 500 # reminders re-checked and claimed per transaction
+EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(moment):
+    return (moment - EPOCH).total_seconds()
+
+
+@event.listens_for(Payment, "before_insert")
+def _default_due_at(mapper, connection, target):
+    # Unless told otherwise, a booking is paid for by the time it starts
+    if target.due_at is None and target.booking_id is not None:
+        target.due_at = connection.execute(
+            select(Booking.scheduled_at).where(Booking.id == target.booking_id)
+        ).scalar()
+
+
+class ReminderScheduler:
+    """
+    Per-worker timing wheel of upcoming booking and payment reminders.
+
+    Args:
+        booking_leads (list): Minutes before Booking.scheduled_at to remind at.
+        payment_lead (int): Minutes before Payment.due_at to remind at.
+        tick (int): Wheel resolution in seconds.
+        window_hours (int): How far ahead reminders are held in memory.
+        refill_interval (int): Seconds between window reloads.
+        recovery_hours (int): How far back the first load looks for missed reminders.
+    """
+    def __init__(self, booking_leads, payment_lead, tick=30, window_hours=48, refill_interval=900, recovery_hours=6):
+        self.leads = {
+            "booking": [timedelta(minutes=minutes) for minutes in booking_leads],
+            "payment": [timedelta(minutes=payment_lead)],
+        }
+        self.tick = tick
+        self.window = timedelta(hours=window_hours)
+        self.refill_interval = timedelta(seconds=refill_interval)
+        self.recovery = timedelta(hours=recovery_hours)
+        self.wheel = TimingWheel(tick, now=_seconds(datetime.utcnow()))
+        self._loaded_until = None
+        self._replay = None # changes committed while a load is running
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+
+    def start(self):
+        """Starts the scheduler thread once per process (a forked worker starts its own)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.wheel = TimingWheel(self.tick, now=_seconds(datetime.utcnow()))
+            self._loaded_until = None
+        self._stop.clear()
+        threading.Thread(target=self._run, name="reminder-scheduler", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._pid = None
+
+    def _run(self):
+        pid = os.getpid()
+        with app.app_context():
+            now = datetime.utcnow()
+            next_refill = now
+            start = now - self.recovery
+            while self._pid == pid:
+                try:
+                    if now >= next_refill:
+                        self.load(start, now + self.window)
+                        self._purge_log(now)
+                        start, next_refill = now, now + self.refill_interval
+                    with self._lock:
+                        due = self.wheel.advance(_seconds(now))
+                    for i in range(0, len(due), FIRE_BATCH):
+                        self.fire(due[i:i + FIRE_BATCH], now)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Reminder scheduler failed: {e}")
+                finally:
+                    db.session.remove()
+                if self._stop.wait(self.tick):
+                    return
+                now = datetime.utcnow()
+
+    def load(self, start, end, session=None):
+        """Schedules every reminder that fires in [start, end), read with two index range scans."""
+        session = session or db.session
+        with self._lock:
+            self._replay = []
+        try:
+            booking_leads, (payment_lead,) = self.leads["booking"], self.leads["payment"]
+            bookings = session.execute(
+                select(Booking.id, Booking.scheduled_at, Booking.created_at).where(
+                    Booking.status.in_(ACTIVE_BOOKING),
+                    Booking.scheduled_at >= start + min(booking_leads),
+                    Booking.scheduled_at < end + max(booking_leads),
+                )
+            ).all()
+            payments = session.execute(
+                select(Payment.id, Payment.due_at, Payment.created_at).where(
+                    Payment.status == UNPAID,
+                    Payment.due_at >= start + payment_lead,
+                    Payment.due_at < end + payment_lead,
+                )
+            ).all()
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            if self._loaded_until is None or end > self._loaded_until:
+                self._loaded_until = end
+            for kind, rows in (("booking", bookings), ("payment", payments)):
+                for ref_id, target_at, created_at in rows:
+                    for index, lead in enumerate(self.leads[kind]):
+                        fire_at = target_at - lead
+                        # Not before the row existed: a booking made 2h ahead gets no 24h reminder
+                        if start <= fire_at < end and (created_at is None or fire_at >= created_at):
+                            self.wheel.schedule((kind, ref_id, index), _seconds(fire_at), (target_at, fire_at))
+            # Rows loaded above may predate commits made meanwhile; those win
+            replay, self._replay = self._replay, None
+            for changes in replay:
+                self._apply(changes)
+        return len(bookings) + len(payments)
+
+    def apply(self, changes):
+        """
+        Reschedules or cancels reminders for committed changes. No database access.
+
+        Args:
+            changes (dict): (kind, id) -> reminder target (scheduled_at / due_at), or None to cancel.
+        """
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(changes)
+            self._apply(changes)
+
+    def _apply(self, changes):
+        now = datetime.utcnow()
+        for (kind, ref_id), target_at in changes.items():
+            for index, lead in enumerate(self.leads[kind]):
+                key = (kind, ref_id, index)
+                fire_at = target_at - lead if target_at else None
+                # Reminders beyond the loaded window are left to the next refill
+                if fire_at is None or self._loaded_until is None or not now <= fire_at < self._loaded_until:
+                    self.wheel.cancel(key)
+                else:
+                    self.wheel.schedule(key, _seconds(fire_at), (target_at, fire_at))
+
+    def fire(self, due, now, session=None):
+        """
+        Sends the reminders in `due` ([(key, (target_at, fire_at))] from the
+        wheel) that still apply and no worker has sent yet. Returns how many were sent.
+        """
+        session = session or db.session
+        ids = {"booking": set(), "payment": set()}
+        for (kind, ref_id, _), _ in due:
+            ids[kind].add(ref_id)
+
+        current = {}
+        if ids["booking"]:
+            for row in session.execute(
+                select(Booking.id, Booking.user_id, Booking.scheduled_at)
+                .where(Booking.id.in_(ids["booking"]), Booking.status.in_(ACTIVE_BOOKING))
+            ):
+                current[("booking", row.id)] = (row.scheduled_at, row)
+        if ids["payment"]:
+            for row in session.execute(
+                select(Payment.id, Payment.user_id, Payment.booking_id, Payment.amount, Payment.due_at)
+                .where(Payment.id.in_(ids["payment"]), Payment.status == UNPAID)
+            ):
+                current[("payment", row.id)] = (row.due_at, row)
+
+        pending = {}
+        for (kind, ref_id, _), (target_at, fire_at) in due:
+            target_now, row = current.get((kind, ref_id), (None, None))
+            # Cancelled, paid or moved since it was scheduled, or already past
+            if target_now != target_at or target_at <= now:
+                continue
+            pending[(fire_at, kind, ref_id)] = row
+        if not pending:
+            return 0
+
+        log = ReminderLog.__table__
+        insert = postgresql_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        claimed = session.execute(
+            insert(log).values([{"fire_at": f, "kind": k, "ref_id": r} for f, k, r in pending])
+            .on_conflict_do_nothing().returning(log.c.fire_at, log.c.kind, log.c.ref_id)
+        ).all()
+        session.add_all(_notification(kind, pending[(fire_at, kind, ref_id)]) for fire_at, kind, ref_id in claimed)
+        session.commit()
+        return len(claimed)
+
+    def _purge_log(self, now):
+        # Claims older than anything a load can reach again are no longer needed
+        db.session.execute(ReminderLog.__table__.delete().where(ReminderLog.fire_at < now - self.recovery))
+        db.session.commit()
+
+
+def _notification(kind, row):
+    if kind == "booking":
+        return Notifications(
+            user_id=row.user_id, type=NotificationType.BOOKING_REMINDER,
+            message=f"Reminder: your booking is scheduled for {row.scheduled_at:%Y-%m-%d %H:%M}.",
+        )
+    return Notifications(
+        user_id=row.user_id, type=NotificationType.PAYMENT_REMINDER,
+        message=f"Reminder: payment of {row.amount:.2f} for booking #{row.booking_id} "
+                f"is due by {row.due_at:%Y-%m-%d %H:%M}.",
+    )
+
+
+reminders = ReminderScheduler(
+    booking_leads=app.config["REMINDER_BOOKING_LEADS_MINUTES"],
+    payment_lead=app.config["REMINDER_PAYMENT_LEAD_MINUTES"],
+    tick=app.config["REMINDER_TICK_SECONDS"],
+    window_hours=app.config["REMINDER_WINDOW_HOURS"],
+    refill_interval=app.config["REMINDER_REFILL_INTERVAL"],
+    recovery_hours=app.config["REMINDER_RECOVERY_HOURS"],
+)
+
+
+@app.before_request
+def _start_reminders():
+    if app.config["REMINDERS_IN_WORKERS"]:
+        reminders.start()
+
+
+def _changes(obj, new, deleted):
+    """{(kind, id): reminder target or None} for one flushed booking or payment, or {}."""
+    def changed(*attrs):
+        return new or deleted or any(inspect(obj).attrs[attr].history.has_changes() for attr in attrs)
+
+    if isinstance(obj, Booking) and changed("status", "scheduled_at"):
+        active = not deleted and obj.status in ACTIVE_BOOKING
+        return {("booking", obj.id): obj.scheduled_at if active else None}
+    if isinstance(obj, Payment) and changed("status", "due_at"):
+        unpaid = not deleted and obj.status == UNPAID
+        return {("payment", obj.id): obj.due_at if unpaid else None}
+    return {}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_reminder_changes(session, flush_context):
+    for objects, new, deleted in ((session.new, True, False), (session.dirty, False, False), (session.deleted, False, True)):
+        for obj in objects:
+            changes = _changes(obj, new, deleted)
+            if changes:
+                session.info.setdefault("reminder_changes", {}).update(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_reminder_changes(session):
+    changes = session.info.pop("reminder_changes", None)
+    if changes and reminders._pid == os.getpid():
+        reminders.apply(changes) # Not started in this worker: its first load will see them
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reminder_changes(session):
+    session.info.pop("reminder_changes", None)
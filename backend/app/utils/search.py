@@ -0,0 +1,398 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from sqlalchemy import event, func, inspect, select, tuple_
+from app import app, db
+from app.models import (
+    Service, ServiceCategory, ProviderSpecialization, SearchDocument, SearchTerm, SearchVocabulary,
+)
+
+
+# Full-text search over the catalog: service names and descriptions, category
+# descriptions and provider specializations.
+#
+# Every searchable row is mirrored into search_documents by the mapper hooks
+# below, on the flush connection, so the index commits (or rolls back) with
+# the change. Each document's terms go into search_terms together with their
+# bm25 weight in that document ("impact"), quantized to a small integer; the
+# table is keyed by (term, impact, doc_id), so reading a term's postings in
+# key order yields its best documents first. A query walks the postings of
+# its rarest term in that order, looks the other terms up per document, and
+# stops as soon as no unread document can beat the current top results, so a
+# page costs a few index blocks however many documents match.
+
+documents = SearchDocument.__table__
+terms = SearchTerm.__table__
+vocabulary = SearchVocabulary.__table__
+
+KINDS = {"service": 1, "category": 2, "specialization": 3}
+DOC_KINDS = 4 # document id = ref_id * DOC_KINDS + kind code, so each kind gets its own id space
+TITLE_WEIGHT = app.config["SEARCH_TITLE_WEIGHT"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+IMPACT_SCALE = 20 # impact = round(bm25 term weight * IMPACT_SCALE); the weight is at most k1 + 1
+MAX_BLOCK = 4096 # matches fetched per round trip grow 4x from the page size up to this
+MAX_TERMS = app.config["SEARCH_MAX_TERMS"] # each term past the first adds a self-join to every walk
+SNIPPET_WORDS = 12
+
+
+class TooManyTerms(ValueError):
+    """The query has more distinct words than MAX_TERMS."""
+
+
+def doc_id(kind, ref_id):
+    return ref_id * DOC_KINDS + KINDS[kind]
+
+
+# -------------------- Tokenizer --------------------
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word):
+    # Deliberately light: plurals and -ing/-ed, so "repairs"/"repairing" meet "repair"
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def words(value):
+    """Lower-cased, accent-folded words of `value`."""
+    if not value:
+        return []
+    return _WORD.findall(unicodedata.normalize("NFKD", value.lower()).encode("ascii", "ignore").decode())
+
+
+def tokenize(value):
+    """words(value), lightly stemmed: the tokens the index is built from."""
+    return [_stem(word)[:64] for word in words(value)]
+
+
+def impact(tf, length, average_length):
+    """Quantized bm25 weight of a term occurring `tf` times in a document of `length` tokens."""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+    return max(1, round(IMPACT_SCALE * tf * (BM25_K1 + 1) / (tf + norm)))
+
+
+class _CorpusStats:
+    """(document count, average length), recomputed at most every SEARCH_STATS_TTL seconds."""
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._value = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, connection):
+        with self._lock:
+            if self._value is None or self._expires <= time.monotonic():
+                count, average = connection.execute(select(func.count(), func.avg(documents.c.length))).one()
+                self._value = (count, float(average) if average else None)
+                self._expires = time.monotonic() + self.ttl
+            return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+
+
+corpus_stats = _CorpusStats(app.config["SEARCH_STATS_TTL"])
+
+
+def _frequencies(title, body):
+    """({term: weighted tf}, length in tokens) of a title and body."""
+    title_tokens, body_tokens = tokenize(title), tokenize(body)
+    frequencies = Counter(body_tokens)
+    for token in title_tokens:
+        frequencies[token] += TITLE_WEIGHT
+    return frequencies, len(title_tokens) + len(body_tokens)
+
+
+def _document(kind, ref_id, parent_id, title, body):
+    """(search_documents row, {term: weighted tf}) for one catalog entry."""
+    frequencies, length = _frequencies(title, body)
+    row = {
+        "id": doc_id(kind, ref_id), "kind": kind, "ref_id": ref_id, "parent_id": parent_id,
+        "title": title or "", "body": body, "length": length,
+    }
+    return row, frequencies
+
+
+def _postings(key, frequencies, length, average_length):
+    return [
+        {"term": term, "impact": impact(tf, length, average_length), "doc_id": key}
+        for term, tf in frequencies.items()
+    ]
+
+
+def _count_terms(connection, words, delta):
+    """Adds `delta` to the document count of each term, creating missing ones."""
+    if not words:
+        return
+    connection.execute(
+        vocabulary.update().where(vocabulary.c.term.in_(words)).values(doc_count=vocabulary.c.doc_count + delta)
+    )
+    if delta > 0:
+        known = set(connection.execute(select(vocabulary.c.term).where(vocabulary.c.term.in_(words))).scalars())
+        missing = [{"term": term, "doc_count": delta} for term in words if term not in known]
+        if missing:
+            connection.execute(vocabulary.insert(), missing)
+
+
+# -------------------- Keeping the index in sync --------------------
+
+# model -> (kind, columns the document is built from, builder returning (parent_id, title, body) or None)
+SOURCES = {
+    Service: (
+        "service", ("name", "description", "category_id", "is_active"),
+        lambda s: None if s.is_active is False else (s.category_id, s.name, s.description),
+    ),
+    ServiceCategory: (
+        "category", ("name", "description"),
+        lambda c: (None, c.name, c.description),
+    ),
+    ProviderSpecialization: (
+        "specialization", ("provider_id", "specialization_description"),
+        lambda p: (p.provider_id, p.specialization_description, None),
+    ),
+}
+
+
+def _write(connection, kind, ref_id, document):
+    """Replaces the index entry for (kind, ref_id); `document` None just removes it."""
+    key = doc_id(kind, ref_id)
+    old_terms = list(connection.execute(select(terms.c.term).where(terms.c.doc_id == key)).scalars())
+    if old_terms:
+        connection.execute(terms.delete().where(terms.c.doc_id == key))
+        _count_terms(connection, old_terms, -1)
+    connection.execute(documents.delete().where(documents.c.id == key))
+    if document is None:
+        return
+
+    row, frequencies = _document(kind, ref_id, *document)
+    # Impacts use the corpus average length as of now; `flask search rebuild` re-normalizes
+    _, average_length = corpus_stats.get(connection)
+    connection.execute(documents.insert().values(**row))
+    postings = _postings(key, frequencies, row["length"], average_length or max(row["length"], 1))
+    if postings:
+        connection.execute(terms.insert(), postings)
+        _count_terms(connection, list(frequencies), 1)
+
+
+def _indexed(mapper, connection, target):
+    kind, _, build = SOURCES[mapper.class_]
+    _write(connection, kind, target.id, build(target))
+
+
+def _reindexed(mapper, connection, target):
+    kind, columns, build = SOURCES[mapper.class_]
+    state = inspect(target).attrs
+    if any(state[column].history.has_changes() for column in columns):
+        _write(connection, kind, target.id, build(target))
+
+
+def _unindexed(mapper, connection, target):
+    kind, _, _ = SOURCES[mapper.class_]
+    _write(connection, kind, target.id, None)
+
+
+for _model in SOURCES:
+    event.listen(_model, "after_insert", _indexed)
+    event.listen(_model, "after_update", _reindexed)
+    event.listen(_model, "after_delete", _unindexed)
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Reindexes every service, category and specialization from scratch.
+    Returns the number of documents written.
+    """
+    connection = db.session.connection()
+    for table in (documents, terms, vocabulary):
+        table.create(connection, checkfirst=True)
+    connection.execute(terms.delete())
+    connection.execute(vocabulary.delete())
+    connection.execute(documents.delete())
+
+    written = 0
+    for model, (kind, _, build) in SOURCES.items():
+        rows = []
+        for obj in db.session.query(model).yield_per(batch_size):
+            document = build(obj)
+            if document is not None:
+                rows.append(_document(kind, obj.id, *document)[0])
+            if len(rows) >= batch_size:
+                connection.execute(documents.insert(), rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            connection.execute(documents.insert(), rows)
+            written += len(rows)
+    index_documents(connection, batch_size)
+    db.session.commit()
+    return written
+
+
+def index_documents(connection, batch_size=1000):
+    """
+    Writes search_terms and search_vocabulary for every row of
+    search_documents, with impacts normalized by the current average length.
+    Both tables are expected to be empty.
+    """
+    average_length = connection.execute(select(func.avg(documents.c.length))).scalar() or 1.0
+    document_counts = Counter()
+    last = None
+    while True:
+        query = select(documents.c.id, documents.c.title, documents.c.body, documents.c.length)
+        if last is not None:
+            query = query.where(documents.c.id > last)
+        rows = connection.execute(query.order_by(documents.c.id).limit(batch_size)).all()
+        if not rows:
+            break
+        postings = []
+        for row in rows:
+            frequencies, _ = _frequencies(row.title, row.body)
+            postings += _postings(row.id, frequencies, row.length, average_length)
+            document_counts.update(frequencies.keys())
+        if postings:
+            connection.execute(terms.insert(), postings)
+        last = rows[-1].id
+
+    entries = [{"term": term, "doc_count": count} for term, count in document_counts.items()]
+    for start in range(0, len(entries), batch_size):
+        connection.execute(vocabulary.insert(), entries[start:start + batch_size])
+    corpus_stats.reset()
+
+
+# -------------------- Querying --------------------
+
+def _walk(token, tokens, kind_code):
+    """
+    Query reading `token`'s postings best-first, joined to an index probe per
+    other token, so only documents containing every token come back as
+    (impact of token, doc_id, impact of each other token...).
+    """
+    walk = terms.alias("walk")
+    others = [other for other in tokens if other != token]
+    probes = [terms.alias(f"probe_{i}") for i in range(len(others))]
+    query = select(walk.c.impact, walk.c.doc_id, *(probe.c.impact for probe in probes)).select_from(walk)
+    for probe, other in zip(probes, others):
+        query = query.join(probe, (probe.c.doc_id == walk.c.doc_id) & (probe.c.term == other))
+    query = query.where(walk.c.term == token)
+    if kind_code is not None:
+        query = query.where(walk.c.doc_id % DOC_KINDS == kind_code)
+    return walk, query, [token, *others]
+
+
+def _top_documents(session, tokens, idf, kind_code, count):
+    """
+    The `count` best (score, doc_id) pairs, best first, among documents that
+    contain every token. Ties on score go to the higher doc_id.
+
+    Each round reads the next block of matches from every token's postings
+    (Fagin's threshold algorithm). A document none of the walks has reached
+    yet has, for every token, an impact no higher than where that walk
+    stopped, which bounds its score; once the current top results beat that
+    bound the rest can't change them.
+    """
+    walks = {token: _walk(token, tokens, kind_code) for token in tokens}
+    last = dict.fromkeys(tokens)
+    top, seen = [], set() # top: min-heap of (score, doc_id)
+    block = count
+    while True:
+        for token, (walk, query, order) in walks.items():
+            if last[token] is not None:
+                query = query.where(tuple_(walk.c.impact, walk.c.doc_id) < tuple_(*last[token]))
+            rows = session.execute(query.order_by(walk.c.impact.desc(), walk.c.doc_id.desc()).limit(block)).all()
+            for row in rows:
+                doc = row[1]
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                impacts = dict(zip(order, (row[0], *row[2:])))
+                entry = (sum(idf[t] * impacts[t] for t in tokens), doc)
+                if len(top) < count:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            if len(rows) < block:
+                return sorted(top, reverse=True) # Every match went through this walk
+            last[token] = (rows[-1][0], rows[-1][1])
+
+        # An unseen match only reaches `bound` with a lower doc_id than every
+        # walk's position, so it can't displace top[0]
+        bound = sum(idf[t] * last[t][0] for t in tokens)
+        if len(top) == count and top[0] >= (bound, min(position[1] for position in last.values())):
+            return sorted(top, reverse=True)
+        block = min(block * 4, MAX_BLOCK)
+
+
+def _snippet(title, body, tokens):
+    words = (body or title).split()
+    wanted = set(tokens)
+    start = 0
+    for i, word in enumerate(words):
+        if wanted.intersection(tokenize(word)):
+            start = max(i - SNIPPET_WORDS // 2, 0)
+            break
+    chunk = " ".join(words[start:start + SNIPPET_WORDS])
+    return ("…" if start else "") + chunk + ("…" if start + SNIPPET_WORDS < len(words) else "")
+
+
+def search(session, text_query, kind=None, limit=20, offset=0):
+    """
+    Ranked catalog matches for `text_query`, best first. Every word has to
+    match (in the title or the body); a title hit counts SEARCH_TITLE_WEIGHT
+    body hits.
+
+    Args:
+        session: Session to query with.
+        text_query (str): The user's search text.
+        kind (str): Restrict to "service", "category" or "specialization".
+        limit (int): Maximum number of results.
+        offset (int): Number of ranked results to skip.
+
+    Returns:
+        list: dicts with kind, ref_id, parent_id, title, snippet and score.
+
+    Raises:
+        TooManyTerms: The query has more than MAX_TERMS distinct words.
+    """
+    tokens = sorted(set(tokenize(text_query)))
+    if len(tokens) > MAX_TERMS:
+        raise TooManyTerms(f"Search for at most {MAX_TERMS} different words.")
+    if not tokens or limit < 1:
+        return []
+    frequencies = dict(session.execute(
+        select(vocabulary.c.term, vocabulary.c.doc_count).where(vocabulary.c.term.in_(tokens))
+    ).all())
+    if any(frequencies.get(token, 0) <= 0 for token in tokens):
+        return [] # Every word has to match, and one matches nothing
+
+    doc_count, _ = corpus_stats.get(session)
+    idf = {}
+    for token in tokens:
+        n = frequencies[token]
+        idf[token] = math.log(1 + (max(doc_count, n) - n + 0.5) / (n + 0.5))
+    ranked = _top_documents(session, tokens, idf, KINDS.get(kind), offset + limit)[offset:]
+    if not ranked:
+        return []
+
+    rows = {row.id: row for row in session.execute(select(documents).where(documents.c.id.in_([d for _, d in ranked])))}
+    results = []
+    for score, key in ranked:
+        row = rows.get(key)
+        if row is None:
+            continue
+        results.append({
+            "kind": row.kind, "ref_id": row.ref_id, "parent_id": row.parent_id, "title": row.title,
+            "snippet": _snippet(row.title, row.body, tokens), "score": round(score / IMPACT_SCALE, 4),
+        })
+    return results
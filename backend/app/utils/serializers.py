@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from marshmallow.utils import ensure_text_type
+
+
+# Compiled dump functions for hot marshmallow schemas. For each dump field we
+# emit straight-line Python that reads the attribute and applies the same
+# conversion the field's _serialize would (int(), float(), str(), isoformat(),
+# Enum name/value, ...), then exec the whole function once. Fields we don't
+# know how to specialize fall back to field.serialize(), so the output always
+# matches schema.dump() key for key and value for value.
+
+_NUMBER_TYPES = {fields.Integer: "int", fields.Float: "float"}
+_PASSTHROUGH_TYPES = (fields.Boolean, fields.Raw)
+_TEXT_TYPES = (fields.String, fields.Email, fields.URL, fields.Url)
+
+
+def _converter(field, value):
+    """Python expression converting `value` like field._serialize does, or None if unsupported."""
+    kind = type(field)
+    if kind in _NUMBER_TYPES and not field.as_string:
+        return f"{_NUMBER_TYPES[kind]}({value})"
+    if kind in _PASSTHROUGH_TYPES:
+        return value
+    if kind in _TEXT_TYPES:
+        return f"({value} if {value}.__class__ is str else _text({value}))"
+    if kind in (fields.DateTime, fields.NaiveDateTime, fields.AwareDateTime, fields.Date, fields.Time) \
+            and field.format in ("iso", "iso8601"):
+        return f"{value}.isoformat()"
+    if kind is fields.Enum:
+        return _converter(field.field, f"{value}.value" if field.by_value else f"{value}.name")
+    return None
+
+
+def _is_plain(schema):
+    # Hooks or a custom accessor change what dump() returns; leave those to marshmallow
+    return (
+        type(schema).get_attribute is Schema.get_attribute
+        and not schema._hooks[PRE_DUMP]
+        and not schema._hooks[POST_DUMP]
+        and schema.dict_class is dict
+    )
+
+
+def compile_dump(schema):
+    """
+    Builds `dump_one(obj) -> dict` equivalent to `schema.dump(obj, many=False)`
+    for attribute-style objects (model instances), or returns None if the
+    schema has hooks or a custom accessor.
+    """
+    if not _is_plain(schema):
+        return None
+
+    namespace = {"_missing": missing, "_text": ensure_text_type, "_fields": {}, "_get": schema.get_attribute, "_empty": {}}
+    # Loaded column values sit in the instance __dict__; reading it directly
+    # skips SQLAlchemy's attribute descriptors. Anything not there (expired,
+    # deferred, properties) goes through getattr() as usual.
+    body = ["def dump_one(obj):", "    ret = {}", "    d = getattr(obj, '__dict__', _empty)"]
+    for i, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attr = field.attribute if field.attribute is not None else name
+        convert = _converter(field, f"v{i}")
+        if convert is None or "." in attr or not attr.isidentifier():
+            namespace["_fields"][i] = field
+            body += [
+                f"    v{i} = _fields[{i}].serialize({name!r}, obj, accessor=_get)",
+                f"    if v{i} is not _missing:",
+                f"        ret[{key!r}] = v{i}",
+            ]
+            continue
+        body += [
+            f"    v{i} = d.get({attr!r}, _missing)",
+            f"    if v{i} is _missing:",
+            f"        v{i} = getattr(obj, {attr!r}, _missing)",
+            f"    if v{i} is _missing:",
+            f"        v{i} = _fields[{i}].serialize({name!r}, obj, accessor=_get)",
+            f"        if v{i} is not _missing:",
+            f"            ret[{key!r}] = v{i}",
+            f"    else:",
+            f"        ret[{key!r}] = None if v{i} is None else {convert}",
+        ]
+        namespace["_fields"][i] = field
+    body.append("    return ret")
+    exec(compile("\n".join(body), f"<serializer {type(schema).__name__}>", "exec"), namespace)
+    return namespace["dump_one"]
+
+
+class FastSerializer:
+    """
+    Drop-in stand-in for a schema's dump(): same arguments, same output,
+    without marshmallow's per-field dispatch. Loading still goes through the
+    schema (`serializer.schema.load(...)`).
+    """
+    def __init__(self, schema):
+        self.schema = schema
+        self.many = schema.many
+        self._dump_one = compile_dump(schema)
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else many
+        dump_one = self._dump_one
+        if dump_one is None:
+            return self.schema.dump(obj, many=many)
+        if many:
+            if obj is None:
+                return self.schema.dump(obj, many=True)
+            items = list(obj)
+            if items and hasattr(items[0], "__getitem__"):
+                return self.schema.dump(items, many=True) # Mappings go through marshmallow's accessor
+            return [dump_one(item) for item in items]
+        if obj is None or hasattr(obj, "__getitem__"):
+            return self.schema.dump(obj, many=False)
+        return dump_one(obj)
+
+
+# Full-schema serializers are a handful per process. ?fields= variants are
+# picked by clients, so they live in a bounded LRU instead: at most
+# SPARSE_CACHE_SIZE compiled subsets per process, least recently used
+# evicted first.
+SPARSE_CACHE_SIZE = 256
+
+_serializers = {}
+_sparse = OrderedDict()
+_lock = threading.Lock()
+
+
+def serializer_for(schema_cls, many=False, only=None, exclude=()):
+    """
+    Cached FastSerializer for `schema_cls` with the given options, built once
+    per process (`only` variants are kept in a bounded LRU).
+    """
+    key = (schema_cls, many, tuple(only) if only is not None else None, tuple(exclude))
+    if only is None:
+        serializer = _serializers.get(key)
+        if serializer is None:
+            with _lock:
+                serializer = _serializers.get(key)
+                if serializer is None:
+                    serializer = FastSerializer(schema_cls(many=many, exclude=exclude))
+                    _serializers[key] = serializer
+        return serializer
+
+    with _lock:
+        serializer = _sparse.get(key)
+        if serializer is not None:
+            _sparse.move_to_end(key)
+            return serializer
+    serializer = FastSerializer(schema_cls(many=many, only=only, exclude=exclude)) # Compiled outside the lock
+    with _lock:
+        _sparse[key] = serializer
+        _sparse.move_to_end(key)
+        while len(_sparse) > SPARSE_CACHE_SIZE:
+            _sparse.popitem(last=False)
+    return serializer
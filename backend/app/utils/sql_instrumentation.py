@@ -0,0 +1,131 @@
+import logging
+import re
+import time
+from collections import Counter
+from functools import wraps
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+
+
+# Per-request SQL accounting: statement count, total DB time and repeated
+# statement shapes (the usual sign of an N+1 lazy load). Numbers go to a log
+# line on every request and to X-DB-* response headers when DEBUG is on. The
+# line is INFO, raised to WARNING (so it shows with default production
+# logging) for requests over SQL_WARN_QUERY_COUNT queries or SQL_WARN_DB_MS;
+# possible N+1s are always logged at WARNING.
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    # Parameters are already bound as "?", so only inline numbers and
+    # variable-length IN lists need folding
+    shape = _IN_LIST.sub("(?)", statement)
+    shape = _NUMBER.sub("N", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def current_stats():
+    if not has_app_context():
+        return None
+    stats = g.get("query_stats")
+    if stats is None:
+        stats = g.query_stats = QueryStats()
+    return stats
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - started
+    stats.shapes[statement_shape(statement)] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+@app.after_request
+def report_query_stats(response):
+    stats = g.get("query_stats")
+    if stats is None:
+        return response
+
+    threshold = app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+    repeated = stats.repeated(threshold)
+    heavy = stats.count > app.config["SQL_WARN_QUERY_COUNT"] or stats.duration * 1000 > app.config["SQL_WARN_DB_MS"]
+    app.logger.log(
+        logging.WARNING if heavy else logging.INFO,
+        "%s %s -> %s: %d queries, %.1f ms in DB",
+        request.method, request.path, response.status_code, stats.count, stats.duration * 1000,
+    )
+    for shape, n in repeated:
+        app.logger.warning("Possible N+1 on %s %s: %dx %s", request.method, request.path, n, shape)
+
+    if app.debug:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+        if repeated:
+            response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+    return response
+
+
+def query_budget(max_queries):
+    """
+    Declares how many statements a resource method may issue (auth lookups
+    made by the outer decorators are not counted).
+
+    Over-budget calls are logged; with SQL_ENFORCE_QUERY_BUDGETS set (e.g. in
+    tests) they raise QueryBudgetExceeded instead.
+
+    Args:
+        max_queries (int): Statement budget for one call of the method.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            stats = current_stats()
+            before = stats.count
+            result = fn(*args, **kwargs)
+            used = stats.count - before
+            if used > max_queries:
+                message = f"{fn.__qualname__} issued {used} queries (budget {max_queries})"
+                if app.config["SQL_ENFORCE_QUERY_BUDGETS"]:
+                    raise QueryBudgetExceeded(message)
+                app.logger.warning(message)
+            return result
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
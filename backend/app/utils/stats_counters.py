@@ -0,0 +1,150 @@
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+from app import db
+from app.models import Users, UserRole, Booking, Service, SiteCounters, BookingDailyCount
+
+
+# Mapper hooks that keep SiteCounters / BookingDailyCount in step with the
+# Users, Booking and Service tables. They run inside the flush, on the same
+# connection, so the counters commit or roll back together with the change.
+# Bulk query.update()/delete() bypass mapper events; run `flask stats rebuild`
+# after any of those (and once after first deploying the counters tables).
+
+counters = SiteCounters.__table__
+daily = BookingDailyCount.__table__
+
+
+def _bump(connection, **deltas):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    result = connection.execute(
+        counters.update().where(counters.c.id == 1).values(
+            **{name: counters.c[name] + delta for name, delta in deltas.items()}
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(counters.insert().values(id=1, **{
+            name: deltas.get(name, 0) for name in ("total_users", "total_providers", "total_bookings", "active_services")
+        }))
+
+
+def _bump_daily(connection, day, status, delta):
+    result = connection.execute(
+        daily.update().where(daily.c.day == day, daily.c.status == status).values(count=daily.c.count + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(daily.insert().values(day=day, status=status, count=delta))
+
+
+# The hooks need the previous value of these attributes even when the row was
+# expired (e.g. after a commit) before being modified. active_history makes the
+# ORM load it on assignment instead of recording an unknown old value.
+for _attribute in (Users.role, Booking.status, Service.is_active):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value, active_history=True, retval=True)
+
+
+def _old_and_new(target, attr):
+    # Values before and after this flush for one attribute
+    history = inspect(target).attrs[attr].history
+    if not history.has_changes():
+        value = getattr(target, attr)
+        return value, value
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _booking_day(booking):
+    return (booking.created_at or datetime.utcnow()).date()
+
+
+# -------------------- Users --------------------
+
+@event.listens_for(Users, "after_insert")
+def _user_inserted(mapper, connection, target):
+    _bump(connection, total_users=1, total_providers=int(target.role == UserRole.PROVIDER))
+
+
+@event.listens_for(Users, "after_update")
+def _user_updated(mapper, connection, target):
+    old, new = _old_and_new(target, "role")
+    _bump(connection, total_providers=int(new == UserRole.PROVIDER) - int(old == UserRole.PROVIDER))
+
+
+@event.listens_for(Users, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _bump(connection, total_users=-1, total_providers=-int(target.role == UserRole.PROVIDER))
+
+
+# -------------------- Booking --------------------
+
+@event.listens_for(Booking, "after_insert")
+def _booking_inserted(mapper, connection, target):
+    _bump(connection, total_bookings=1)
+    _bump_daily(connection, _booking_day(target), target.status, 1)
+
+
+@event.listens_for(Booking, "after_update")
+def _booking_updated(mapper, connection, target):
+    old, new = _old_and_new(target, "status")
+    if old != new:
+        day = _booking_day(target)
+        _bump_daily(connection, day, old, -1)
+        _bump_daily(connection, day, new, 1)
+
+
+@event.listens_for(Booking, "after_delete")
+def _booking_deleted(mapper, connection, target):
+    _bump(connection, total_bookings=-1)
+    _bump_daily(connection, _booking_day(target), target.status, -1)
+
+
+# -------------------- Service --------------------
+
+@event.listens_for(Service, "after_insert")
+def _service_inserted(mapper, connection, target):
+    _bump(connection, active_services=int(bool(target.is_active)))
+
+
+@event.listens_for(Service, "after_update")
+def _service_updated(mapper, connection, target):
+    old, new = _old_and_new(target, "is_active")
+    _bump(connection, active_services=int(bool(new)) - int(bool(old)))
+
+
+@event.listens_for(Service, "after_delete")
+def _service_deleted(mapper, connection, target):
+    _bump(connection, active_services=-int(bool(target.is_active)))
+
+
+def rebuild_counters():
+    """
+    Recomputes every counter from the source tables in one transaction.
+    Returns the rebuilt SiteCounters row.
+    """
+    totals = {
+        "total_users": db.session.query(func.count(Users.id)).scalar(),
+        "total_providers": db.session.query(func.count(Users.id)).filter(Users.role == UserRole.PROVIDER).scalar(),
+        "total_bookings": db.session.query(func.count(Booking.id)).scalar(),
+        "active_services": db.session.query(func.count(Service.id)).filter(Service.is_active.is_(True)).scalar(),
+    }
+    row = SiteCounters.get()
+    if row is None:
+        row = SiteCounters(id=1)
+        db.session.add(row)
+    for name, value in totals.items():
+        setattr(row, name, value)
+
+    BookingDailyCount.query.delete()
+    day = func.date(Booking.created_at)
+    buckets = db.session.query(day, Booking.status, func.count(Booking.id)).group_by(day, Booking.status).all()
+    for bucket_day, status, count in buckets:
+        if bucket_day is None:
+            continue
+        if isinstance(bucket_day, str):
+            bucket_day = datetime.strptime(bucket_day, "%Y-%m-%d").date()
+        db.session.add(BookingDailyCount(day=bucket_day, status=status, count=count))
+
+    db.session.commit()
+    return row
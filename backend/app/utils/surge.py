@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from sqlalchemy import event, extract, func
+from sqlalchemy.orm import Session
+from app import app, db
+from app.models import Booking, BookingStatus, Service, ProviderSchedule, ProviderService
+
+
+# Demand-aware price multipliers.
+#
+# Demand is booked service-hours per (city, service, hour-of-week) and supply
+# is scheduled provider-hours per (service, hour-of-week) over a window that
+# runs from SURGE_WINDOW_DAYS back to SURGE_HORIZON_DAYS ahead, so upcoming
+# bookings count as demand as soon as they are made. Providers carry no city,
+# so supply is shared by every city. Each row
+# is a flat array('d') of 168 buckets (hour-of-week, Sunday 00:00 = 0), so a
+# multiplier lookup is two dict hits and two array reads.
+#
+# A full refresh pushes the heavy aggregation into one GROUP BY per table and
+# only loops over the grouped rows in Python. Between refreshes each worker
+# adds its own committed bookings to the demand rows when they commit, if they
+# fall inside the same window; bookings made in other workers, cancellations
+# and reschedules show up at the next refresh. The
+# first refresh runs on the refresher thread; until it lands every
+# multiplier is 1.0.
+
+HOURS_PER_WEEK = 168
+
+
+def hour_of_week(moment):
+    # Same convention as SQL extract('dow') (Sunday = 0)
+    return ((moment.weekday() + 1) % 7) * 24 + moment.hour
+
+
+def _normalize_city(city):
+    return (city or "").strip().lower()
+
+
+class DemandModel:
+    def __init__(self, window_days=28, horizon_days=14, refresh_interval=300, threshold=0.7, sensitivity=1.0,
+                 max_multiplier=2.0):
+        self.window_days = window_days
+        self.horizon_days = horizon_days
+        self.refresh_interval = refresh_interval
+        self.threshold = threshold
+        self.sensitivity = sensitivity
+        self.max_multiplier = max_multiplier
+        self._demand = {} # (city, service_id) -> array of booked hours per week
+        self._supply = {} # service_id -> array of provider hours per week
+        self._durations = {} # service_id -> booking length in hours
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        self._pid = None
+
+    def multiplier(self, city, service_id, scheduled_at):
+        self._ensure_started()
+        bucket = hour_of_week(scheduled_at)
+        demand = self._demand.get((_normalize_city(city), service_id))
+        supply = self._supply.get(service_id)
+        if demand is None or supply is None or supply[bucket] <= 0:
+            return 1.0 # No signal
+        utilization = demand[bucket] / supply[bucket]
+        surge = 1.0 + self.sensitivity * (utilization - self.threshold)
+        return round(min(max(surge, 1.0), self.max_multiplier), 2)
+
+    def record_booking(self, city, service_id, scheduled_at, now=None):
+        """Adds one committed booking to this worker's demand rows, if refresh() would count it."""
+        start, end = self._window(now or datetime.utcnow())
+        if not start <= scheduled_at < end:
+            return
+        weeks = self._weeks()
+        key = (_normalize_city(city), service_id)
+        with self._lock:
+            row = self._demand.get(key)
+            if row is None:
+                row = self._demand[key] = array("d", bytes(8 * HOURS_PER_WEEK))
+            row[hour_of_week(scheduled_at)] += self._durations.get(service_id, 1.0) / weeks
+
+    def refresh(self, session=None, now=None):
+        """Rebuilds every demand and supply row from the database."""
+        session = session or db.session
+        start, end = self._window(now or datetime.utcnow())
+        weeks = self._weeks()
+
+        durations = {
+            service_id: (minutes or 60) / 60
+            for service_id, minutes in session.query(Service.id, Service.estimated_duration)
+        }
+
+        dow = extract("dow", Booking.scheduled_at)
+        hour = extract("hour", Booking.scheduled_at)
+        demand = {}
+        for city, service_id, day, hr, booked_hours in session.query(
+            func.lower(func.trim(Booking.city)), Booking.service_id, dow, hour,
+            func.sum(func.coalesce(Service.estimated_duration, 60)) / 60.0,
+        ).outerjoin(Service, Service.id == Booking.service_id).filter(
+            Booking.scheduled_at >= start,
+            Booking.scheduled_at < end,
+            Booking.status != BookingStatus.CANCELLED,
+        ).group_by(func.lower(func.trim(Booking.city)), Booking.service_id, dow, hour):
+            row = demand.get((city or "", service_id))
+            if row is None:
+                row = demand[(city or "", service_id)] = array("d", bytes(8 * HOURS_PER_WEEK))
+            row[int(day) * 24 + int(hr)] += booked_hours / weeks
+
+        # Provider-hours per hour-of-week, then fanned out to the services each provider offers
+        provider_hours = {}
+        for provider_id, day, start_time, end_time in session.query(
+            ProviderSchedule.provider_id, ProviderSchedule.available_date,
+            ProviderSchedule.start_time, ProviderSchedule.end_time,
+        ).filter(ProviderSchedule.available_date >= start.date(), ProviderSchedule.available_date < end.date()):
+            row = provider_hours.get(provider_id)
+            if row is None:
+                row = provider_hours[provider_id] = array("d", bytes(8 * HOURS_PER_WEEK))
+            base = hour_of_week(datetime.combine(day, datetime.min.time()))
+            begin = start_time.hour * 60 + start_time.minute
+            end = end_time.hour * 60 + end_time.minute
+            while begin < end:
+                next_hour = (begin // 60 + 1) * 60
+                row[base + begin // 60] += (min(end, next_hour) - begin) / 60 / weeks
+                begin = next_hour
+
+        supply = {}
+        for provider_id, service_id in session.query(ProviderService.provider_id, ProviderService.service_id):
+            hours = provider_hours.get(provider_id)
+            if hours is None:
+                continue
+            row = supply.get(service_id)
+            if row is None:
+                row = supply[service_id] = array("d", bytes(8 * HOURS_PER_WEEK))
+            for i in range(HOURS_PER_WEEK):
+                row[i] += hours[i]
+
+        with self._lock:
+            self._demand, self._supply, self._durations = demand, supply, durations
+            self._refreshed_at = time.monotonic()
+
+    def _window(self, now):
+        # [start, end): trailing history plus the bookable horizon
+        return now - timedelta(days=self.window_days), now + timedelta(days=self.horizon_days)
+
+    def _weeks(self):
+        return (self.window_days + self.horizon_days) / 7
+
+    def _ensure_started(self):
+        # First lookup in each worker process starts the refresher, which loads the model
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._refresh_loop, name="surge-refresher", daemon=True).start()
+
+    def _refresh_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    app.logger.error(f"Surge model refresh failed: {e}")
+                finally:
+                    db.session.remove()
+            if not self.refresh_interval:
+                return
+            time.sleep(self.refresh_interval)
+
+
+demand_model = DemandModel(
+    window_days=app.config["SURGE_WINDOW_DAYS"],
+    horizon_days=app.config["SURGE_HORIZON_DAYS"],
+    refresh_interval=app.config["SURGE_REFRESH_INTERVAL"],
+    threshold=app.config["SURGE_UTILIZATION_THRESHOLD"],
+    sensitivity=app.config["SURGE_SENSITIVITY"],
+    max_multiplier=app.config["SURGE_MAX_MULTIPLIER"],
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_bookings(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Booking) and obj.scheduled_at is not None:
+            session.info.setdefault("surge_bookings", []).append((obj.city, obj.service_id, obj.scheduled_at))
+
+
+@event.listens_for(Session, "after_commit")
+def _record_new_bookings(session):
+    bookings = session.info.pop("surge_bookings", ())
+    if demand_model._pid != os.getpid():
+        return # Model not loaded in this worker yet; the initial refresh will see them
+    for city, service_id, scheduled_at in bookings:
+        demand_model.record_booking(city, service_id, scheduled_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_new_bookings(session):
+    session.info.pop("surge_bookings", None)
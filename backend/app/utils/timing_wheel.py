@@ -0,0 +1,94 @@
+import math
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel (Varghese & Lauck). Timers hash into one slot
+    per level by due tick, so scheduling and cancelling are O(1), and an
+    advance only touches the slots of the ticks it crosses: level 0 fires,
+    higher levels cascade their timers one level down as time reaches them.
+    Not thread-safe; callers hold their own lock.
+
+    Args:
+        tick (float): Seconds per tick; timers fire at the first tick boundary at or after their time.
+        slots (int): Slots per level.
+        levels (int): Number of levels; timers up to tick * slots ** (levels - 1) * (slots - 1)
+            seconds ahead always fit.
+        now (float): Start time (epoch seconds).
+    """
+    def __init__(self, tick, slots=64, levels=3, now=0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.horizon = tick * slots ** (levels - 1) * (slots - 1) # guaranteed reach
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._timers = {} # key -> (level, slot); level -1 is the expired list
+        self._expired = {} # key -> payload, fired by the next advance()
+        self._current = int(now // tick)
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def schedule(self, key, when, payload=None):
+        """
+        (Re)schedules `key` to fire at `when` (epoch seconds). Past times fire
+        on the next advance(). Returns False, scheduling nothing, if it does not fit.
+        """
+        self.cancel(key)
+        return self._place(key, math.ceil(when / self.tick), payload)
+
+    def cancel(self, key):
+        """Removes `key`; returns whether it was scheduled."""
+        position = self._timers.pop(key, None)
+        if position is None:
+            return False
+        level, slot = position
+        if level < 0:
+            del self._expired[key]
+        else:
+            del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, now):
+        """Moves the wheel to `now` and returns [(key, payload)] for every timer that came due."""
+        fired = list(self._expired.items())
+        self._expired.clear()
+        target = int(now // self.tick)
+        if not self._timers:
+            self._current = max(self._current, target) # Nothing to cascade or fire on the way
+        while self._current < target:
+            self._current += 1
+            current = self._current
+            # Cascade from the top so a timer can drop several levels in one tick
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if current % span == 0:
+                    slot = (current // span) % self.slots
+                    bucket, self._wheels[level][slot] = self._wheels[level][slot], {}
+                    for key, (due, payload) in bucket.items():
+                        self._place(key, due, payload)
+            slot = current % self.slots
+            bucket, self._wheels[0][slot] = self._wheels[0][slot], {}
+            fired.extend((key, payload) for key, (_, payload) in bucket.items())
+            fired.extend(self._expired.items()) # Cascaded timers due exactly now
+            self._expired.clear()
+        for key, _ in fired:
+            self._timers.pop(key, None)
+        return fired
+
+    def _place(self, key, due, payload):
+        if due <= self._current:
+            self._expired[key] = payload
+            self._timers[key] = (-1, None)
+            return True
+        for level in range(self.levels):
+            span = self.slots ** level
+            if due // span - self._current // span < self.slots:
+                slot = (due // span) % self.slots
+                self._wheels[level][slot][key] = (due, payload)
+                self._timers[key] = (level, slot)
+                return True
+        return False # Beyond the top level
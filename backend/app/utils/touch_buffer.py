@@ -0,0 +1,158 @@
+import atexit
+import os
+import threading
+from sqlalchemy import bindparam, or_
+from app import app, db
+
+
+# Write-behind buffer for "touch" columns: timestamps such as
+# Users.last_login_at that are rewritten on hot paths but that nothing reads
+# back within the same request.
+#
+# touch() only records the value in this worker's memory, coalesced by
+# (column, primary key) so repeated touches of one row keep the newest
+# value. A flusher thread writes everything pending every TOUCH_FLUSH_INTERVAL
+# seconds (sooner once TOUCH_MAX_PENDING rows are waiting, and at interpreter
+# exit) with one executemany UPDATE per column in a single transaction. A
+# flush that fails is merged back and retried on the next one.
+#
+# Loss is bounded: a worker that dies without a clean exit (SIGKILL, OOM,
+# power loss) drops at most its last TOUCH_FLUSH_INTERVAL seconds of
+# touches. Reads see values up to that much behind. Values only move
+# forward, so a late flush from one worker never overwrites a newer value
+# written by another, and touches don't count as edits: onupdate columns
+# such as updated_at are left alone.
+
+
+class TouchBuffer:
+    """
+    Per-worker coalescing write-behind buffer.
+
+    Args:
+        flush_interval (float): Seconds between flushes.
+        max_pending (int): Buffered rows that trigger an early flush.
+        engine: Engine to use instead of db.engine (benchmarks).
+    """
+    def __init__(self, flush_interval=10, max_pending=10_000, engine=None):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._engine = engine
+        self._columns = {} # (table name, column name) -> Column
+        self._pending = {} # (table name, column name) -> {primary key: value}
+        self._size = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def engine(self):
+        return self._engine if self._engine is not None else db.engine
+
+    def touch(self, attribute, pk, value):
+        """
+        Queues `attribute` (e.g. Users.last_login_at) = `value` for the row with primary key `pk`.
+        """
+        column = attribute.property.columns[0]
+        key = (column.table.name, column.name)
+        self._ensure_started()
+        with self._lock:
+            self._columns.setdefault(key, column)
+            rows = self._pending.setdefault(key, {})
+            current = rows.get(pk)
+            if current is None:
+                self._size += 1
+            if current is None or value > current:
+                rows[pk] = value
+            full = self._size >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Writes every pending touch. Returns how many rows were sent."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending, self._size = self._pending, {}, 0
+                columns = dict(self._columns)
+            if not pending:
+                return 0
+            try:
+                with self.engine.begin() as conn:
+                    for key, rows in pending.items():
+                        column = columns[key]
+                        table = column.table
+                        (pk_column,) = table.primary_key.columns
+                        # Pin onupdate columns to themselves so a touch doesn't look like an edit
+                        untouched = {c.name: c for c in table.columns if c.onupdate is not None and c is not column}
+                        conn.execute(
+                            table.update()
+                            .where(pk_column == bindparam("b_pk"),
+                                   or_(column.is_(None), column < bindparam("b_value")))
+                            .values({column.name: bindparam("b_value"), **untouched}),
+                            [{"b_pk": pk, "b_value": value} for pk, value in rows.items()],
+                        )
+            except Exception:
+                self._merge_back(pending)
+                raise
+            return sum(len(rows) for rows in pending.values())
+
+    def stop(self):
+        """Stops the flusher and writes what is still pending."""
+        self._stop.set()
+        self._wake.set()
+        self._pid = None
+        self.flush()
+
+    def _merge_back(self, pending):
+        # Touches made since the swap are newer and win
+        with self._lock:
+            for key, rows in pending.items():
+                current = self._pending.setdefault(key, {})
+                for pk, value in rows.items():
+                    if pk not in current:
+                        current[pk] = value
+                        self._size += 1
+                    elif value > current[pk]:
+                        current[pk] = value
+
+    def _ensure_started(self):
+        # First touch in each worker process starts its flusher
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Anything buffered before a fork belongs to the parent
+            self._pending, self._size = {}, 0
+            self._pid = os.getpid()
+        self._stop.clear()
+        threading.Thread(target=self._run, name="touch-flusher", daemon=True).start()
+        atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        pid = os.getpid()
+        with app.app_context():
+            while self._pid == pid:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    app.logger.error(f"Touch buffer flush failed: {e}")
+                if self._stop.is_set():
+                    return
+
+    def _flush_at_exit(self):
+        if self._pid == os.getpid():
+            with app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    app.logger.error(f"Touch buffer flush at exit failed, {self._size} rows lost: {e}")
+
+
+touches = TouchBuffer(
+    flush_interval=app.config["TOUCH_FLUSH_INTERVAL"],
+    max_pending=app.config["TOUCH_MAX_PENDING"],
+)
@@ -47,3 +47,724 @@ def create_admin(username, email, password):
     except Exception as e:
         db.session.rollback()
         click.echo(f"Error creating admin user: {e}")
+
+
+# Maintenance of the denormalized counters behind /admin/v1/stats
+stats_cli = AppGroup('stats')
+
+@stats_cli.command('rebuild')
+def rebuild_stats():
+    """
+    Recomputes the admin stats counters and daily booking buckets from scratch.
+    Example: flask stats rebuild
+    """
+    from app.utils.stats_counters import rebuild_counters
+    counters = rebuild_counters()
+    click.echo(
+        f"Counters rebuilt: {counters.total_users} users, {counters.total_providers} providers, "
+        f"{counters.total_bookings} bookings, {counters.active_services} active services."
+    )
+
+
+@stats_cli.command('rebuild-ratings')
+def rebuild_ratings():
+    """
+    Recomputes provider rating aggregates (sum, count, histogram) from approved reviews.
+    Example: flask stats rebuild-ratings
+    """
+    from app.utils.provider_ratings import rebuild_provider_ratings
+    click.echo(f"Ratings rebuilt for {rebuild_provider_ratings()} providers.")
+
+
+@stats_cli.command('rebuild-unread')
+def rebuild_unread():
+    """
+    Recomputes every user's unread notification counter.
+    Example: flask stats rebuild-unread
+    """
+    from app.utils.inbox import rebuild_unread_counts
+    click.echo(f"Unread counters rebuilt for {rebuild_unread_counts()} users.")
+
+
+# Full-text search index (see app/utils/search.py)
+search_cli = AppGroup('search')
+
+@search_cli.command('rebuild')
+def rebuild_search():
+    """
+    Reindexes every service, category and provider specialization for /search.
+    Example: flask search rebuild
+    """
+    from app.utils.search import rebuild_search_index
+    click.echo(f"Search index rebuilt: {rebuild_search_index()} documents.")
+
+
+# Notification delivery (see app/utils/notification_dispatch.py)
+notify_cli = AppGroup('notify')
+
+@notify_cli.command('dispatch')
+def notify_dispatch():
+    """
+    Runs a dispatcher pool in the foreground until interrupted. Use with
+    NOTIFY_DISPATCH_IN_WORKERS = False to keep delivery out of the web workers.
+    Example: flask notify dispatch
+    """
+    import time
+    from app.utils.notification_dispatch import dispatcher
+    dispatcher.start()
+    click.echo(f"Dispatching with {dispatcher.threads} threads; Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        dispatcher.stop(timeout=dispatcher.lease_seconds)
+
+
+# Booking and payment reminders (see app/utils/reminders.py)
+reminders_cli = AppGroup('reminders')
+
+@reminders_cli.command('run')
+def reminders_run():
+    """
+    Runs the reminder scheduler in the foreground until interrupted. Use with
+    REMINDERS_IN_WORKERS = False to keep it out of the web workers.
+    Example: flask reminders run
+    """
+    import time
+    from app.utils.reminders import reminders
+    reminders.start()
+    click.echo("Reminder scheduler running; Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        reminders.stop()
+
+
+# Micro-benchmarks for the hot paths. They run against scratch data, never the app database.
+bench_cli = AppGroup('bench')
+
+@bench_cli.command('blocklist')
+@click.option('--tokens', default=1_000_000, help='Number of revoked tokens to load.')
+@click.option('--checks', default=100_000, help='Number of lookups to time.')
+def bench_blocklist(tokens, checks):
+    """
+    Times TokenBlacklist.is_blocked with a large number of revoked tokens.
+    Example: flask bench blocklist --tokens 1000000
+    """
+    import os
+    import sqlite3
+    import tempfile
+    import time
+    import uuid
+    from app.utils.blocklist import TokenBlacklist
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blocklist.db")
+        blocklist = TokenBlacklist(path, capacity=tokens, compact_interval=0)
+        blocklist.is_blocked("warmup") # creates the table
+
+        expires_at = int(time.time()) + 3600
+        revoked = [uuid.uuid4().hex for _ in range(tokens)]
+        started = time.perf_counter()
+        conn = sqlite3.connect(path)
+        conn.executemany(
+            "INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+            ((jti, expires_at) for jti in revoked),
+        )
+        conn.commit()
+        conn.close()
+        click.echo(f"Loaded {tokens} revoked tokens in {time.perf_counter() - started:.2f}s")
+
+        # First check after the load pulls every row into the Bloom filter
+        started = time.perf_counter()
+        blocklist.is_blocked("warmup")
+        click.echo(f"Bloom filter sync: {time.perf_counter() - started:.2f}s")
+
+        def timed(label, jtis):
+            started = time.perf_counter()
+            hits = sum(1 for jti in jtis if blocklist.is_blocked(jti))
+            elapsed = time.perf_counter() - started
+            click.echo(f"{label}: {elapsed / len(jtis) * 1e6:.2f} us/check ({hits} blocked)")
+
+        timed("Valid tokens (Bloom negative)", [uuid.uuid4().hex for _ in range(checks)])
+        timed("Revoked tokens (table lookup)", revoked[:checks])
+
+
+@bench_cli.command('geo-search')
+@click.option('--providers', default=100_000, help='Number of providers to generate.')
+@click.option('--searches', default=1_000, help='Number of searches to time.')
+def bench_geo_search(providers, searches):
+    """
+    Times the grid-indexed provider search on a scratch SQLite database.
+    Example: flask bench geo-search --providers 100000
+    """
+    import os
+    import random
+    import tempfile
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app import app
+    from app.models import Provider, ProviderService, VerificationStatus
+    from app.utils.geo import cell_for, search_providers
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        db.metadata.create_all(engine, tables=[Provider.__table__, ProviderService.__table__])
+
+        # Providers spread over Liberia, each offering 3 of 20 services
+        rows, links = [], []
+        for provider_id in range(1, providers + 1):
+            lat, lng = rng.uniform(4.3, 8.6), rng.uniform(-11.5, -7.4)
+            rows.append({
+                "id": provider_id, "user_id": provider_id, "latitude": lat, "longitude": lng,
+                "geo_cell": cell_for(lat, lng), "service_radius": rng.uniform(5, 30), "rating": 5.0,
+                "rating_sum": 0, "rating_count": 0, "rating_1": 0, "rating_2": 0, "rating_3": 0,
+                "rating_4": 0, "rating_5": 0, "is_available": True,
+                "verification_status": VerificationStatus.APPROVED,
+            })
+            for service_id in rng.sample(range(1, 21), 3):
+                links.append({"provider_id": provider_id, "service_id": service_id})
+        with engine.begin() as conn:
+            conn.execute(Provider.__table__.insert(), rows)
+            conn.execute(ProviderService.__table__.insert(), links)
+
+        with Session(engine) as session:
+            timings, found = [], 0
+            for _ in range(searches):
+                lat, lng = rng.uniform(4.3, 8.6), rng.uniform(-11.5, -7.4)
+                started = time.perf_counter()
+                found += len(search_providers(
+                    session, lat, lng, rng.randint(1, 20),
+                    app.config["PROVIDER_SEARCH_MAX_RADIUS_KM"], app.config["PROVIDER_DEFAULT_SERVICE_RADIUS_KM"],
+                ))
+                timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        click.echo(
+            f"{providers} providers, {searches} searches: "
+            f"p50 {timings[len(timings) // 2] * 1000:.2f} ms, p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, "
+            f"avg {found / searches:.1f} results"
+        )
+
+
+@bench_cli.command('surge-refresh')
+@click.option('--bookings', default=1_000_000, help='Number of bookings in the demand window.')
+@click.option('--lookups', default=100_000, help='Number of multiplier lookups to time.')
+def bench_surge_refresh(bookings, lookups):
+    """
+    Times a full rebuild of the surge demand/supply model and multiplier lookups
+    on a scratch SQLite database.
+    Example: flask bench surge-refresh --bookings 1000000
+    """
+    import os
+    import random
+    import tempfile
+    import time
+    from datetime import datetime, time as clock, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.models import Booking, BookingStatus, Service, ProviderSchedule, ProviderService
+    from app.utils.surge import DemandModel
+
+    rng = random.Random(42)
+    cities = ["Monrovia", "Gbarnga", "Buchanan", "Kakata", "Harper", "Zwedru", "Voinjama", "Ganta"]
+    services, providers = 50, 2_000
+    now = datetime(2030, 3, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        tables = [Service.__table__, Booking.__table__, ProviderSchedule.__table__, ProviderService.__table__]
+        db.metadata.create_all(engine, tables=tables)
+
+        with engine.begin() as conn:
+            conn.execute(Service.__table__.insert(), [
+                {"id": i, "name": f"Service {i}", "base_price": 10.0, "estimated_duration": rng.choice((30, 60, 120))}
+                for i in range(1, services + 1)
+            ])
+            conn.execute(ProviderService.__table__.insert(), [
+                {"provider_id": p, "service_id": s}
+                for p in range(1, providers + 1) for s in rng.sample(range(1, services + 1), 3)
+            ])
+            conn.execute(ProviderSchedule.__table__.insert(), [
+                {"provider_id": p, "available_date": (now - timedelta(days=d)).date(),
+                 "start_time": clock(rng.randint(6, 10)), "end_time": clock(rng.randint(15, 20))}
+                for p in range(1, providers + 1) for d in range(1, 29) if rng.random() < 0.7
+            ])
+            batch = []
+            for i in range(bookings):
+                batch.append({
+                    "user_id": 1, "service_id": rng.randint(1, services), "status": BookingStatus.COMPLETED,
+                    "scheduled_at": now - timedelta(minutes=rng.randint(1, 28 * 24 * 60)),
+                    "street_address": "1 Bench St", "city": rng.choice(cities), "total_cost": 10.0,
+                })
+                if len(batch) == 50_000:
+                    conn.execute(Booking.__table__.insert(), batch)
+                    batch = []
+            if batch:
+                conn.execute(Booking.__table__.insert(), batch)
+
+        model = DemandModel(horizon_days=0, refresh_interval=0) # The scratch bookings are all in the past
+        with Session(engine) as session:
+            started = time.perf_counter()
+            model.refresh(session=session, now=now)
+            refresh_seconds = time.perf_counter() - started
+        model._pid = os.getpid() # Loaded by hand above; skip the lazy first-use refresh
+
+        queries = [
+            (rng.choice(cities), rng.randint(1, services), now + timedelta(minutes=rng.randint(0, 7 * 24 * 60)))
+            for _ in range(lookups)
+        ]
+        started = time.perf_counter()
+        surged = sum(1 for city, service_id, at in queries if model.multiplier(city, service_id, at) > 1.0)
+        lookup_seconds = time.perf_counter() - started
+
+        click.echo(
+            f"{bookings} bookings: full refresh {refresh_seconds:.2f}s; "
+            f"{lookups} lookups {lookup_seconds / lookups * 1e6:.2f} us each, {surged / lookups:.1%} surged"
+        )
+
+
+@bench_cli.command('serializers')
+@click.option('--rows', default=10_000, help='Number of model instances per schema.')
+@click.option('--repeat', default=5, help='Timed runs per serializer; the best one is reported.')
+def bench_serializers(rows, repeat):
+    """
+    Checks that the compiled serializers produce exactly the same JSON as
+    marshmallow for UserSchema, BookingSchema and ServiceSchema, then times both.
+    Example: flask bench serializers --rows 10000
+    """
+    import json
+    import random
+    import time
+    from datetime import datetime, timedelta
+    from app.models import Booking, BookingStatus, Service, PricingModel, UserRole
+    from app.schemas.booking import BookingSchema
+    from app.schemas.service import ServiceSchema
+    from app.schemas.user import UserSchema
+    from app.utils.serializers import serializer_for
+
+    rng = random.Random(42)
+    start = datetime(2030, 1, 1)
+
+    def maybe(value):
+        return value if rng.random() < 0.8 else None # Exercise the None paths too
+
+    users = [Users(
+        id=i, username=f"user{i}", email=f"user{i}@example.com", firstname=maybe("First"), lastname=maybe("Last"),
+        gender=maybe("Other"), phone=maybe("+231770000000"), role=rng.choice(list(UserRole)),
+        is_verified=rng.random() < 0.5, is_active=True, address=maybe("1 Broad St"),
+        timestamp=start, updated_at=start + timedelta(seconds=i),
+        last_login_at=maybe(start + timedelta(hours=i)), email_verified_at=maybe(start),
+    ) for i in range(1, rows + 1)]
+    bookings = [Booking(
+        id=i, user_id=i, provider_id=maybe(i % 50 + 1), service_id=i % 20 + 1, status=rng.choice(list(BookingStatus)),
+        scheduled_at=start + timedelta(minutes=15 * i), street_address="1 Broad St", city="Monrovia",
+        state=maybe("Montserrado"), zip_code=maybe("1000"), latitude=maybe(6.3), longitude=maybe(-10.8),
+        notes=maybe("Ring twice"), total_cost=rng.uniform(10, 500), created_at=start, updated_at=start,
+    ) for i in range(1, rows + 1)]
+    services = [Service(
+        id=i, name=f"Service {i}", description=maybe("Description"), category_id=i % 10 + 1,
+        pricing_model=rng.choice(list(PricingModel)), base_price=rng.uniform(5, 100), unit_label=maybe("sq m"),
+        estimated_duration=maybe(60), requires_materials=False, has_add_ons=rng.random() < 0.5, is_active=True,
+        created_at=start, updated_at=start,
+    ) for i in range(1, rows + 1)]
+
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    failed = False
+    for schema_cls, objects in ((UserSchema, users), (BookingSchema, bookings), (ServiceSchema, services)):
+        schema, fast = schema_cls(many=True), serializer_for(schema_cls, many=True)
+        expected, actual = json.dumps(schema.dump(objects)), json.dumps(fast.dump(objects))
+        parity = "ok" if expected == actual else "MISMATCH"
+        failed = failed or expected != actual
+        slow_s, fast_s = best(lambda: schema.dump(objects)), best(lambda: fast.dump(objects))
+        click.echo(
+            f"{schema_cls.__name__:<14} {rows} rows: marshmallow {slow_s * 1000:.1f} ms, "
+            f"compiled {fast_s * 1000:.1f} ms ({slow_s / fast_s:.1f}x), parity {parity}"
+        )
+    if failed:
+        raise SystemExit(1)
+
+
+@bench_cli.command('search')
+@click.option('--documents', default=1_000_000, help='Number of indexed documents.')
+@click.option('--searches', default=1_000, help='Number of searches to time.')
+def bench_search(documents, searches):
+    """
+    Times ranked /search queries over a scratch SQLite index.
+    Example: flask bench search --documents 1000000
+    """
+    import itertools
+    import os
+    import random
+    import tempfile
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.models import SearchDocument, SearchTerm, SearchVocabulary
+    from app.utils import search as search_index
+
+    rng = random.Random(42)
+    trades = ["pipe", "boiler", "roof", "window", "garden", "carpet", "kitchen", "bathroom", "fence", "gutter",
+              "wiring", "lighting", "drain", "tile", "floor", "wall", "door", "lock", "solar", "generator",
+              "aircon", "fridge", "laundry", "sofa", "mattress", "pool", "driveway", "ceiling", "shower", "toilet"]
+    actions = ["repair", "installation", "cleaning", "deep cleaning", "painting", "maintenance", "inspection",
+               "replacement", "servicing", "fitting", "removal", "polishing"]
+    # Body text drawn from a Zipf-like vocabulary, as in real descriptions
+    vocabulary = [f"w{i}" for i in range(20_000)] + trades + actions
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    kinds = list(search_index.KINDS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        db.metadata.create_all(engine, tables=[
+            SearchDocument.__table__, SearchTerm.__table__, SearchVocabulary.__table__,
+        ])
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            rows = []
+            for ref_id in range(1, documents + 1):
+                title = f"{rng.choice(trades).title()} {rng.choice(actions)}"
+                body = " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(5, 30)))
+                rows.append(search_index._document(rng.choice(kinds), ref_id, None, title, body)[0])
+                if len(rows) == 50_000:
+                    conn.execute(SearchDocument.__table__.insert(), rows)
+                    rows = []
+            if rows:
+                conn.execute(SearchDocument.__table__.insert(), rows)
+            search_index.index_documents(conn, batch_size=50_000)
+        index_seconds = time.perf_counter() - started
+
+        queries = [
+            rng.choice([f"{rng.choice(trades)} {rng.choice(actions)}", rng.choice(trades), rng.choice(actions)])
+            for _ in range(searches)
+        ]
+        with Session(engine) as session:
+            search_index.search(session, queries[0], limit=21) # Load the corpus stats
+            timings, found = [], 0
+            for query in queries:
+                started = time.perf_counter()
+                found += len(search_index.search(session, query, limit=21))
+                timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    click.echo(
+        f"{documents} documents indexed in {index_seconds:.1f}s; {searches} searches: "
+        f"p50 {timings[len(timings) // 2] * 1000:.2f} ms, p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, "
+        f"avg {found / searches:.1f} results"
+    )
+
+@bench_cli.command('autocomplete')
+@click.option('--suggestions', default=100_000, help='Number of suggestions in the index.')
+@click.option('--lookups', default=100_000, help='Number of prefix lookups to time.')
+def bench_autocomplete(suggestions, lookups):
+    """
+    Times building the typeahead prefix index and completing keystroke prefixes.
+    Example: flask bench autocomplete --suggestions 100000
+    """
+    import random
+    import time
+    from app.utils.autocomplete import PrefixIndex, Suggestion
+
+    rng = random.Random(42)
+    syllables = ["pi", "pe", "re", "pa", "ir", "clea", "ning", "roo", "fing", "win", "dow", "gar", "den",
+                 "ki", "tchen", "ba", "th", "so", "lar", "ge", "ne", "ra", "tor", "ti", "le", "flo", "or"]
+    vocabulary = sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(5_000)})
+    labels = [" ".join(rng.choices(vocabulary, k=rng.randint(1, 4))).capitalize() for _ in range(suggestions)]
+    items = [
+        Suggestion(rng.choice(["service", "category", "specialization"]), i, label, int(rng.paretovariate(1.2)))
+        for i, label in enumerate(labels)
+    ]
+
+    started = time.perf_counter()
+    index = PrefixIndex(items)
+    build_seconds = time.perf_counter() - started
+
+    # Keystrokes: every prefix of a word someone is typing, often after earlier words
+    prefixes = []
+    while len(prefixes) < lookups:
+        typed = rng.choice(labels).lower()
+        prefixes.extend(typed[:length] for length in range(1, len(typed) + 1))
+    prefixes = prefixes[:lookups]
+    timings, found = [], 0
+    for prefix in prefixes:
+        started = time.perf_counter()
+        found += len(index.complete(prefix, 8))
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    click.echo(
+        f"{suggestions} suggestions indexed in {build_seconds:.2f}s ({len(index._hot)} precomputed prefixes); "
+        f"{lookups} lookups: p50 {timings[len(timings) // 2] * 1e6:.1f} us, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us, avg {found / lookups:.1f} suggestions"
+    )
+
+@bench_cli.command('notify')
+@click.option('--notifications', default=100_000, help='Number of queued notifications.')
+@click.option('--threads', default=2, help='Dispatcher threads.')
+@click.option('--batch-size', default=1000, help='Outbox rows claimed per batch.')
+def bench_notify(notifications, threads, batch_size):
+    """
+    Times draining a notification outbox into the local stub channel on a
+    scratch SQLite database.
+    Example: flask bench notify --notifications 100000 --threads 2
+    """
+    import os
+    import tempfile
+    import threading
+    import time
+    from datetime import datetime
+    from sqlalchemy import create_engine, func, select
+    from app.models import Notifications, NotificationDelivery, NotificationType
+    from app.utils.notification_channels import channels
+    from app.utils.notification_dispatch import Dispatcher
+
+    local = channels["local"]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"), connect_args={"timeout": 30})
+        db.metadata.create_all(engine, tables=[Users.__table__, Notifications.__table__, NotificationDelivery.__table__])
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            for start in range(0, notifications, 50_000):
+                ids = range(start + 1, min(start + 50_000, notifications) + 1)
+                conn.execute(Notifications.__table__.insert(), [
+                    {"id": i, "user_id": i % 1000 + 1, "message": f"Booking {i} confirmed",
+                     "type": NotificationType.BOOKING_CONFIRMATION, "status": "sent", "is_read": False,
+                     "created_at": now}
+                    for i in ids
+                ])
+                conn.execute(NotificationDelivery.__table__.insert(), [
+                    {"notification_id": i, "channel": "local", "status": "pending", "attempts": 0,
+                     "available_at": now, "created_at": now}
+                    for i in ids
+                ])
+
+        dispatcher = Dispatcher(threads=threads, batch_size=batch_size, engine=engine)
+        sent_before = local.count
+
+        def drain():
+            while dispatcher.dispatch_batch():
+                pass
+
+        workers = [threading.Thread(target=drain) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        seconds = time.perf_counter() - started
+
+        with engine.connect() as conn:
+            statuses = dict(conn.execute(
+                select(Notifications.status, func.count()).group_by(Notifications.status)
+            ).all())
+
+    click.echo(
+        f"{notifications} notifications dispatched in {seconds:.2f}s "
+        f"({notifications / seconds:,.0f}/s, {threads} threads, batches of {batch_size}); "
+        f"stub received {local.count - sent_before}; notification statuses {statuses}"
+    )
+
+@bench_cli.command('reminders')
+@click.option('--bookings', default=1_000_000, help='Number of bookings, spread over 60 days.')
+def bench_reminders(bookings):
+    """
+    Times loading the reminder window from a scratch SQLite database and
+    advancing the timing wheel through it, tick by tick.
+    Example: flask bench reminders --bookings 1000000
+    """
+    import os
+    import random
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.models import Booking, BookingStatus, Payment
+    from app.utils.reminders import ReminderScheduler, _seconds
+    from app.utils.timing_wheel import TimingWheel
+
+    rng = random.Random(42)
+    now = datetime(2030, 3, 1)
+    statuses = [BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.COMPLETED, BookingStatus.CANCELLED]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        db.metadata.create_all(engine, tables=[Booking.__table__, Payment.__table__])
+        with engine.begin() as conn:
+            batch = []
+            for i in range(1, bookings + 1):
+                scheduled_at = now + timedelta(minutes=rng.randint(-30 * 24 * 60, 30 * 24 * 60))
+                batch.append({
+                    "id": i, "user_id": 1, "service_id": 1, "status": rng.choice(statuses),
+                    "scheduled_at": scheduled_at, "street_address": "1 Bench St", "city": "Monrovia",
+                    "total_cost": 10.0, "created_at": scheduled_at - timedelta(days=7),
+                })
+                if len(batch) == 50_000:
+                    conn.execute(Booking.__table__.insert(), batch)
+                    conn.execute(Payment.__table__.insert(), [
+                        {"user_id": 1, "booking_id": row["id"], "amount": 10.0, "status": "pending",
+                         "due_at": row["scheduled_at"], "created_at": row["created_at"]}
+                        for row in batch if row["id"] % 2
+                    ])
+                    batch = []
+            if batch:
+                conn.execute(Booking.__table__.insert(), batch)
+
+        scheduler = ReminderScheduler(booking_leads=[24 * 60, 60], payment_lead=24 * 60)
+        scheduler.wheel = TimingWheel(scheduler.tick, now=_seconds(now))
+        with Session(engine) as session:
+            started = time.perf_counter()
+            loaded = scheduler.load(now, now + scheduler.window, session=session)
+            load_seconds = time.perf_counter() - started
+        scheduled = len(scheduler.wheel)
+
+        ticks = int(scheduler.window.total_seconds() // scheduler.tick)
+        fired, worst = 0, 0.0
+        started = time.perf_counter()
+        for tick in range(1, ticks + 1):
+            began = time.perf_counter()
+            fired += len(scheduler.wheel.advance(_seconds(now) + tick * scheduler.tick))
+            worst = max(worst, time.perf_counter() - began)
+        advance_seconds = time.perf_counter() - started
+
+    click.echo(
+        f"{bookings} bookings: window load {load_seconds:.2f}s ({loaded} rows, {scheduled} reminders); "
+        f"{ticks} ticks advanced in {advance_seconds:.2f}s (worst tick {worst * 1000:.2f} ms), {fired} fired"
+    )
+
+@bench_cli.command('login-storm')
+@click.option('--logins', default=8, help='Threads logging in back to back.')
+@click.option('--seconds', default=5.0, help='Duration of each phase.')
+def bench_login_storm(logins, seconds):
+    """
+    Latency of a non-auth endpoint (GET /categories) while threads hammer
+    the login endpoint, with passwords hashed inline and then in the
+    hashing pool. Uses a throwaway user in the configured database.
+    Example: flask bench login-storm --logins 8 --seconds 5
+    """
+    import threading
+    import time
+    from flask import current_app
+    from app import limiter
+    from app.utils.password_hashing import password_hasher
+
+    username, password = "bench-login-storm", "benchmark-password"
+    user = Users.find_by_username(username) or Users(username=username, email="bench-login-storm@example.com",
+                                                     password=password)
+    user.save_to_db()
+    client = current_app.test_client()
+    credentials = {"username": username, "email": user.email, "password": password}
+
+    def phase(storm):
+        stop = threading.Event()
+        latencies, counts = [], {"logins": 0, "busy": 0}
+        lock = threading.Lock()
+
+        def login():
+            while not stop.is_set():
+                status = client.post("/auth/v1/login", json=credentials).status_code
+                with lock:
+                    counts["logins" if status == 200 else "busy"] += 1
+
+        def probe():
+            # Open loop: one request due every 10 ms, timed from when it was due, so time spent
+            # waiting for a CPU before it could even start counts too
+            started = time.perf_counter()
+            for i in range(int(seconds * 100)):
+                due = started + i * 0.01
+                time.sleep(max(0.0, due - time.perf_counter()))
+                client.get("/categories")
+                latencies.append(time.perf_counter() - due)
+            stop.set()
+
+        # Fresh threads, so every request gets its own app context rather than sharing the CLI's
+        threads = [threading.Thread(target=login) for _ in range(storm)] + [threading.Thread(target=probe)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies.sort()
+        p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+        return (f"GET /categories p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms over {len(latencies)} requests; "
+                f"{counts['logins'] / seconds:.0f} logins/s, {counts['busy']} turned away")
+
+    limiter_enabled, processes = limiter.enabled, password_hasher.processes
+    limiter.enabled = False
+    try:
+        phase(0) # Warm the catalog cache
+        click.echo(f"idle: {phase(0)}")
+        password_hasher.processes = 0
+        click.echo(f"{logins} logging in, hashed inline: {phase(logins)}")
+        password_hasher.processes = processes
+        client.post("/auth/v1/login", json=credentials) # Start the pool outside the timed phase
+        click.echo(f"{logins} logging in, hashed in a pool of {processes}: {phase(logins)}")
+    finally:
+        limiter.enabled, password_hasher.processes = limiter_enabled, processes
+        db.session.delete(Users.find_by_username(username))
+        db.session.commit()
+
+@bench_cli.command('touches')
+@click.option('--users', default=10_000, help='Number of users.')
+@click.option('--logins', default=20_000, help='Logins to record.')
+def bench_touches(users, logins):
+    """
+    Times recording last_login_at for a stream of logins on a scratch SQLite
+    database: one commit per login versus the write-behind buffer.
+    Example: flask bench touches --users 10000 --logins 20000
+    """
+    import os
+    import random
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine, func, select
+    from app.utils.touch_buffer import TouchBuffer
+
+    rng = random.Random(42)
+    stream = [(rng.randint(1, users), datetime(2030, 1, 1) + timedelta(seconds=i)) for i in range(logins)]
+    table = Users.__table__
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine("sqlite:///" + os.path.join(tmp, "bench.db"))
+        db.metadata.create_all(engine, tables=[table])
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [
+                {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+                for i in range(1, users + 1)
+            ])
+
+        started = time.perf_counter()
+        for user_id, at in stream:
+            with engine.begin() as conn:
+                conn.execute(table.update().where(table.c.id == user_id).values(last_login_at=at))
+        inline_seconds = time.perf_counter() - started
+
+        with engine.begin() as conn:
+            conn.execute(table.update().values(last_login_at=None))
+        buffer = TouchBuffer(engine=engine)
+        started = time.perf_counter()
+        for user_id, at in stream:
+            buffer.touch(Users.last_login_at, user_id, at)
+        touch_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        written = buffer.flush()
+        flush_seconds = time.perf_counter() - started
+        buffer.stop()
+
+        with engine.connect() as conn:
+            latest = conn.execute(select(func.max(table.c.last_login_at))).scalar()
+
+    click.echo(
+        f"{logins} logins over {users} users: one commit each {inline_seconds:.2f}s "
+        f"({inline_seconds / logins * 1e6:.0f} µs per login); buffered {touch_seconds * 1000:.1f} ms "
+        f"({touch_seconds / logins * 1e6:.1f} µs per login) + one flush of {written} rows in "
+        f"{flush_seconds * 1000:.0f} ms; latest last_login_at {latest}"
+    )
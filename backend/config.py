@@ -47,6 +47,107 @@ class Config(object):
     JWT_TOKEN_LOCATION = ["headers"] # Specify where JWT is expected (e.g., 'Authorization: Bearer <token>')
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    # Shared revoked-token store (one file per host, used by every worker)
+    JWT_BLOCKLIST_DB = os.environ.get("JWT_BLOCKLIST_DB") # unset: blocklist.db in the app's instance folder
+    JWT_BLOCKLIST_BLOOM_CAPACITY = 1_000_000
+    JWT_BLOCKLIST_BLOOM_ERROR_RATE = 0.01
+    JWT_BLOCKLIST_COMPACT_INTERVAL = 300 # seconds between purges of expired entries
 
     UPLOADED_IMAGES_DEST = os.path.join("static", "images")
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024 # 10 MB limit for uploads
+
+    # SQL instrumentation (see app/utils/sql_instrumentation.py)
+    SQL_N_PLUS_ONE_THRESHOLD = 5 # same statement shape this many times in one request gets flagged
+    SQL_ENFORCE_QUERY_BUDGETS = False # set True in tests to fail on @query_budget overruns
+    SQL_WARN_QUERY_COUNT = 50 # requests issuing more statements are logged at WARNING
+    SQL_WARN_DB_MS = 500 # likewise for requests spending longer than this in the database
+
+    # Provider geo search (km)
+    PROVIDER_SEARCH_MAX_RADIUS_KM = 30
+    PROVIDER_DEFAULT_SERVICE_RADIUS_KM = 10
+
+    # Availability slot engine
+    AVAILABILITY_SLOT_STEP_MINUTES = 30 # a multiple of BOOKING_SLOT_MINUTES, so every offered slot can be booked
+    AVAILABILITY_MAX_DAYS = 31
+    AVAILABILITY_MAX_PROVIDERS = 100
+
+    # Double-booking guard: bookings claim provider time in buckets of this size
+    BOOKING_SLOT_MINUTES = 15
+
+    # Pricing engine
+    PRICING_CACHE_TTL = 60 # seconds a worker keeps a service's price sheet
+    QUOTE_MAX_ITEMS = 100
+
+    # Demand-aware surge multipliers, applied to quotes that carry city and scheduled_at
+    SURGE_PRICING_ENABLED = True
+    SURGE_WINDOW_DAYS = 28 # trailing window for demand and supply
+    SURGE_HORIZON_DAYS = 14 # upcoming days counted too, so new bookings move prices when they are made
+    SURGE_REFRESH_INTERVAL = 300 # seconds between full rebuilds in each worker
+    SURGE_UTILIZATION_THRESHOLD = 0.7 # booked/available hours where surge starts
+    SURGE_SENSITIVITY = 1.0 # multiplier gained per unit of utilization above the threshold
+    SURGE_MAX_MULTIPLIER = 2.0
+
+    # Serialized catalog listings (categories, services, add-ons) served with ETag/304
+    CATALOG_CACHE_SIZE = 256 # distinct path + query string entries per worker
+    CATALOG_CACHE_TTL = 60 # seconds; bounds staleness for writes made by other workers
+
+    # Full-text search over the catalog (/search)
+    SEARCH_TITLE_WEIGHT = 5 # a title hit counts this many body hits in bm25
+    SEARCH_MAX_RESULTS = 1000 # deepest ranked result a cursor can page to
+    SEARCH_MAX_TERMS = 8 # distinct words per query; each one adds a join to the postings walks
+    SEARCH_STATS_TTL = 300 # seconds the inverted-index corpus stats (doc count, avg length) are reused
+
+    # Typeahead suggestions (/autocomplete), served from a per-worker prefix index
+    AUTOCOMPLETE_REFRESH_INTERVAL = 600 # seconds between full reloads (popularity, other workers' edits)
+    AUTOCOMPLETE_MAX_SPECIALIZATIONS = 500 # most-booked specialization phrases offered
+    AUTOCOMPLETE_DEFAULT_LIMIT = 8
+    AUTOCOMPLETE_MAX_LIMIT = 20
+    AUTOCOMPLETE_RATE_LIMIT = "20 per second" # one request per keystroke; replaces the default limits
+
+    # Notification delivery: outbox rows drained by a dispatcher thread pool
+    NOTIFY_CHANNELS = ["local"] # channels every new notification is queued for
+    NOTIFY_DISPATCH_IN_WORKERS = True # False: run `flask notify dispatch` processes instead
+    NOTIFY_DISPATCH_THREADS = 2
+    NOTIFY_BATCH_SIZE = 500 # outbox rows a dispatcher thread claims at once
+    NOTIFY_POLL_INTERVAL = 2 # seconds an idle thread waits before looking for due rows again
+    NOTIFY_LEASE_SECONDS = 60 # claimed rows are retried if not settled within this
+    NOTIFY_MAX_ATTEMPTS = 5
+    NOTIFY_RETRY_BACKOFF = 10 # seconds before the first retry; doubles per attempt
+
+    # Booking and payment reminders, fired from a per-worker timing wheel
+    REMINDERS_IN_WORKERS = True # False: run `flask reminders run` instead
+    REMINDER_BOOKING_LEADS_MINUTES = [24 * 60, 60] # reminders sent this long before Booking.scheduled_at
+    REMINDER_PAYMENT_LEAD_MINUTES = 24 * 60 # before Payment.due_at
+    REMINDER_TICK_SECONDS = 30
+    REMINDER_WINDOW_HOURS = 48 # how far ahead the wheel is loaded
+    REMINDER_REFILL_INTERVAL = 900 # seconds between window reloads (picks up other workers' writes)
+    REMINDER_RECOVERY_HOURS = 6 # reminders missed by at most this long (e.g. during a restart) are still sent
+
+    # Live event stream (GET /events, Server-Sent Events)
+    SSE_POLL_INTERVAL = 1 # seconds between change-feed reads per worker; its own commits are pushed at once
+    SSE_HEARTBEAT_SECONDS = 15
+    SSE_MAX_STREAMS = 1000 # open streams per gevent worker (gunicorn_events.conf.py); more get 503
+    SSE_MAX_THREAD_STREAMS = 8 # the same for any other worker, where every open stream holds an OS thread
+    SSE_MAX_PENDING = 1000 # events queued for a slow client before its stream is closed
+    SSE_BACKFILL_LIMIT = 500 # missed events replayed on resume; beyond this the client is told to refetch
+    SSE_RETENTION_HOURS = 24 # how far back Last-Event-ID can resume
+
+    # Password hashing, done in a per-worker process pool (app/utils/password_hashing.py)
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000000" # logins with a hash made otherwise are rehashed
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_PROCESSES = 2 # per worker; 0 hashes inline on the request thread
+    PASSWORD_HASH_MAX_CONCURRENT = 8 # hashes running or queued per worker
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5 # seconds a request waits for a slot before getting 503
+    PASSWORD_HASH_NICE = 10 # pool processes yield the CPU to request handling
+
+    # Write-behind buffer for touch columns such as last_login_at (app/utils/touch_buffer.py)
+    TOUCH_FLUSH_INTERVAL = 10 # seconds; also the most a crashed worker can lose
+    TOUCH_MAX_PENDING = 10_000 # buffered rows that trigger an early flush
+
+    # Keyset pagination for list endpoints (?limit=&after=)
+    PAGINATION_DEFAULT_LIMIT = 50
+    PAGINATION_MAX_LIMIT = 200
+
+    # Per-worker cache of (id, role, is_active, provider_id) used by the auth decorators
+    PRINCIPAL_CACHE_SIZE = 10_000
+    PRINCIPAL_CACHE_TTL = 30 # seconds; bounds staleness for writes made by other workers
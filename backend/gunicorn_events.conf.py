@@ -0,0 +1,35 @@
+# gunicorn settings for the event-stream pool (GET /events).
+#
+#     gunicorn -c gunicorn_events.conf.py "app:app"
+#
+# A Server-Sent Events stream stays open for as long as the client is
+# connected (up to its access token's expiry), waiting on its change-feed
+# subscription. Under gevent each of those waits is a greenlet, so one worker
+# holds SSE_MAX_STREAMS streams on a single OS thread; under sync or gthread
+# workers every stream would pin an OS thread of its own.
+#
+# Route only /events here from the proxy, unbuffered, e.g. for nginx:
+#
+#     location /events {
+#         proxy_pass http://127.0.0.1:5001;
+#         proxy_http_version 1.1;
+#         proxy_buffering off;
+#         proxy_read_timeout 1h;
+#     }
+#
+# and keep the rest of the API on its regular workers: password hashing and
+# autocomplete rebuilds do CPU work that expects real threads, and would
+# stall every stream of a gevent worker while they run.
+import os
+
+from config import Config
+
+bind = os.environ.get("EVENTS_BIND", "127.0.0.1:5001")
+worker_class = "gevent"
+workers = int(os.environ.get("EVENTS_WORKERS", 2))
+# Open streams are capped by the app (503 beyond SSE_MAX_STREAMS); leave room for the rejected and the reconnecting
+worker_connections = Config.SSE_MAX_STREAMS + 100
+# The worker patches the standard library before importing the app; a preloaded app would keep real threads
+preload_app = False
+# Streams never finish on their own; on restart clients reconnect with Last-Event-ID
+graceful_timeout = 5
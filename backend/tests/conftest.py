@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its config at import time, so point it at scratch files first
+_scratch = tempfile.mkdtemp()
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(_scratch, "app.db")
+os.environ["JWT_BLOCKLIST_DB"] = os.path.join(_scratch, "blocklist.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(
+        TESTING=True, RATELIMIT_ENABLED=False, SQL_ENFORCE_QUERY_BUDGETS=True,
+        NOTIFY_DISPATCH_IN_WORKERS=False, REMINDERS_IN_WORKERS=False,
+    )
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
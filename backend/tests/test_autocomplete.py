@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import Service
+from app.utils import autocomplete as autocomplete_module
+from app.utils.autocomplete import Autocomplete, PrefixIndex
+
+
+@pytest.fixture
+def suggestions(app, monkeypatch):
+    instance = Autocomplete(refresh_interval=0, top=20)
+    monkeypatch.setattr(autocomplete_module, "autocomplete", instance)
+    return instance
+
+
+def _labels(instance, text):
+    return [s.label for s in instance.complete(text)]
+
+
+def test_failed_first_load_is_retried(app, suggestions, monkeypatch):
+    with app.app_context():
+        db.session.add(Service(name="Pipe repair", base_price=10.0))
+        db.session.commit()
+        real_refresh = suggestions.refresh
+        calls = []
+
+        def locked_then_ok(session=None):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("SELECT", {}, Exception("database is locked"))
+            real_refresh(session)
+
+        monkeypatch.setattr(suggestions, "refresh", locked_then_ok)
+        with pytest.raises(OperationalError):
+            suggestions.complete("pipe")
+        assert _labels(suggestions, "pipe") == ["Pipe repair"]
+        assert len(calls) == 2
+
+
+def test_catalog_commit_rebuilds_off_the_request_thread(app, suggestions, monkeypatch):
+    with app.app_context():
+        assert suggestions.complete("drain") == [] # Loads this worker's (empty) index and starts the refresher
+
+        built_on = []
+        real_init = PrefixIndex.__init__
+
+        def recording_init(self, *args, **kwargs):
+            built_on.append(threading.current_thread().name)
+            real_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(PrefixIndex, "__init__", recording_init)
+        db.session.add(Service(name="Drain cleaning", base_price=10.0))
+        db.session.commit()
+
+        deadline = time.monotonic() + 5
+        while not suggestions.complete("drain") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _labels(suggestions, "drain") == ["Drain cleaning"]
+        assert built_on == ["autocomplete-refresher"]
@@ -0,0 +1,119 @@
+import random
+import threading
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from marshmallow import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Booking, ProviderSchedule, Service, Users
+from app.schemas.booking import BookingSchema
+from app.utils.availability import provider_availability
+from app.utils.booking_slots import BookingConflict
+
+DAY = datetime(2030, 1, 7, 8, 0)
+
+
+def _booking(provider_id, service_id, scheduled_at):
+    return Booking(
+        user_id=1, service_id=service_id, provider_id=provider_id, scheduled_at=scheduled_at,
+        street_address="1 Test St", city="Monrovia", total_cost=10.0,
+    )
+
+
+def _add(session, booking):
+    session.add(booking)
+    try:
+        session.commit()
+    except BookingConflict:
+        session.rollback()
+        return False
+    return True
+
+
+@pytest.fixture
+def services(app):
+    # (id, minutes): a 50-minute service still occupies whole 15-minute buckets
+    with app.app_context():
+        db.session.add(Users(username="booker", email="booker@example.com", password="Secret123!"))
+        db.session.add_all([
+            Service(name="Hour", base_price=10.0, estimated_duration=60),
+            Service(name="Fifty", base_price=10.0, estimated_duration=50),
+        ])
+        db.session.commit()
+    return {1: 60, 2: 50}
+
+
+def test_back_to_back_bookings_do_not_conflict(app, services):
+    with app.app_context():
+        assert _add(db.session, _booking(1, 2, DAY + timedelta(hours=1)))  # 9:00-9:50
+        assert _add(db.session, _booking(1, 1, DAY + timedelta(hours=2)))  # 10:00-11:00
+        assert _add(db.session, _booking(1, 1, DAY + timedelta(hours=3)))  # 11:00-12:00
+        assert not _add(db.session, _booking(1, 1, DAY + timedelta(hours=1, minutes=45)))
+
+
+def test_scheduled_at_must_be_on_the_slot_grid(app):
+    with app.test_request_context():
+        with pytest.raises(ValidationError, match="15-minute boundary"):
+            BookingSchema().load({
+                "user_id": 1, "provider_id": 1, "service_id": 1, "scheduled_at": "2030-01-07T09:05:00",
+                "street_address": "1 Test St", "city": "Monrovia",
+            })
+
+
+def test_availability_rounds_booked_time_to_the_slot_grid(app, services):
+    with app.app_context():
+        db.session.add(ProviderSchedule(provider_id=1, available_date=DAY.date(), start_time=time(9), end_time=time(12)))
+        db.session.commit()
+        assert _add(db.session, _booking(1, 2, DAY + timedelta(hours=1)))  # 9:00-9:50, holds 9:00-10:00
+        availability = provider_availability([1], date(2030, 1, 7), date(2030, 1, 7), 2, step=15, grid=15)[1]
+    assert availability["free"] == [(datetime(2030, 1, 7, 10), datetime(2030, 1, 7, 12))]
+    assert availability["slots"][0] == datetime(2030, 1, 7, 10)
+    assert availability["slots"][-1] == datetime(2030, 1, 7, 11)  # 11:00-11:50 is the last start that fits
+
+
+def test_concurrent_bookings_never_overlap(app, services, tmp_path):
+    # Many threads book random grid-aligned starts for a few providers at once
+    threads, attempts, providers = 8, 100, 3
+    engine = create_engine("sqlite:///" + str(tmp_path / "stress.db"), connect_args={"timeout": 30})
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Users(username="booker", email="booker@example.com", password="Secret123!"))
+        session.add_all([Service(name="Hour", base_price=10.0, estimated_duration=60),
+                         Service(name="Fifty", base_price=10.0, estimated_duration=50)])
+        session.commit()
+
+    created, errors = [], []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(attempts):
+                booking = _booking(rng.randint(1, providers), rng.choice(list(services)),
+                                   DAY + timedelta(minutes=15 * rng.randint(0, 40)))
+                with Session(engine) as session:
+                    try:
+                        if _add(session, booking):
+                            created.append(booking.id)
+                    except OperationalError as e:
+                        errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    assert not errors
+    assert created
+    with Session(engine) as session:
+        for provider_id in range(1, providers + 1):
+            rows = sorted(
+                (b.scheduled_at, b.scheduled_at + timedelta(minutes=services[b.service_id]))
+                for b in session.query(Booking).filter_by(provider_id=provider_id)
+            )
+            assert all(later[0] >= earlier[1] for earlier, later in zip(rows, rows[1:]))
+    engine.dispose()
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import db
+from app.models import Service
+from app.utils import conditional
+
+
+@pytest.fixture
+def service_id(app):
+    with app.app_context():
+        service = Service(name="Cleaning", base_price=10.0)
+        db.session.add(service)
+        db.session.commit()
+        return service.id
+
+
+def _name(app, service_id):
+    with app.app_context():
+        return db.session.execute(select(Service.name).where(Service.id == service_id)).scalar()
+
+
+def test_put_with_current_etag_succeeds(client, app, service_id):
+    etag = client.get(f"/services/{service_id}").headers["ETag"]
+    response = client.put(f"/services/{service_id}", json={"name": "Deep cleaning"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert client.put(f"/services/{service_id}", json={"name": "Again"}, headers={"If-Match": etag}).status_code == 412
+    assert _name(app, service_id) == "Deep cleaning"
+
+
+def test_write_between_check_and_flush_is_refused(client, app, service_id, monkeypatch):
+    # Another writer commits right after this request's If-Match check has passed
+    etag = client.get(f"/services/{service_id}").headers["ETag"]
+    check = conditional._if_match
+
+    def check_then_concurrent_write(current):
+        matched = check(current)
+        with db.engine.begin() as conn:
+            conn.execute(Service.__table__.update().where(Service.id == service_id).values(
+                name="Written concurrently", updated_at=datetime.utcnow() + timedelta(seconds=1),
+            ))
+        return matched
+
+    monkeypatch.setattr(conditional, "_if_match", check_then_concurrent_write)
+    response = client.put(f"/services/{service_id}", json={"name": "Stale write"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert _name(app, service_id) == "Written concurrently"
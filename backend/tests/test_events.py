@@ -0,0 +1,40 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models import Users
+from app.utils.change_feed import change_feed
+
+
+@pytest.fixture
+def auth_headers(app):
+    with app.app_context():
+        user = Users(username="listener", email="listener@example.com", password="Secret123!")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_thread_worker_caps_open_streams(app, client, auth_headers):
+    # Outside a gevent worker every open stream holds an OS thread
+    assert change_feed.max_streams == app.config["SSE_MAX_THREAD_STREAMS"]
+    streams = []
+    try:
+        for _ in range(change_feed.max_streams):
+            response = client.get("/events", headers=auth_headers, buffered=False)
+            assert response.status_code == 200
+            assert next(response.response).startswith(b"retry:")
+            streams.append(response)
+        refused = client.get("/events", headers=auth_headers)
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"]
+    finally:
+        for response in streams:
+            response.close()
+    # Closed streams give their places back
+    response = client.get("/events", headers=auth_headers, buffered=False)
+    assert response.status_code == 200
+    next(response.response)
+    response.close()
+    assert change_feed._streams == 0
@@ -0,0 +1,77 @@
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import DateTime, Enum, Float, Integer, text
+from werkzeug.exceptions import BadRequest
+
+from app import db
+from app.resources.booking import BOOKING_LIST
+from app.resources.review import REVIEW_LIST
+from app.resources.service import SERVICE_LIST
+
+SPECS = (BOOKING_LIST, SERVICE_LIST, REVIEW_LIST)
+TABLE_SCAN = re.compile(r"\bSCAN \w+") # With or without "USING ... INDEX": a walk of the whole table or index
+TEMP_SORT = re.compile(r"\bUSE TEMP B-TREE\b")
+
+
+def _sample(filter_, op):
+    column = filter_.column.property.columns[0]
+    if isinstance(column.type, Enum):
+        values = [member.value for member in column.type.enum_class][:2]
+    elif isinstance(column.type, DateTime):
+        values = [datetime(2030, 1, 1).isoformat(), datetime(2030, 2, 1).isoformat()]
+    elif isinstance(column.type, (Integer, Float)):
+        values = ["1", "2"]
+    else:
+        values = ["x", "y"]
+    return ",".join(values) if op == "in" else values[0]
+
+
+def _cases(spec):
+    # Every filter with every operator it allows, alone and with every sort (both directions)
+    sorts = [None, *spec.sorts, *(f"-{name}" for name in spec.sorts)]
+    for sort in sorts:
+        if sort is not None:
+            yield spec, f"sort={sort}", True
+    for name, filter_ in spec.filters.items():
+        for op in filter_.ops:
+            arg = name if op == "eq" else f"{name}[{op}]"
+            for sort in sorts:
+                yield spec, f"{arg}={_sample(filter_, op)}" + (f"&sort={sort}" if sort else ""), False
+
+
+CASES = [case for spec in SPECS for case in _cases(spec)]
+
+
+def _plan(app, spec, query_string):
+    with app.test_request_context(f"/?{query_string}"):
+        query, key_columns, descending = spec.apply(spec.model.query)
+        order = [c.desc() if descending else c.asc() for c in key_columns]
+        statement = query.order_by(*order).limit(51).statement
+        sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        return [row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+@pytest.mark.parametrize("spec, query_string, unfiltered", CASES,
+                         ids=[f"{spec.model.__tablename__}?{qs}" for spec, qs, _ in CASES])
+def test_list_query_reads_one_index_in_order(app, spec, query_string, unfiltered):
+    with app.app_context():
+        try:
+            plan = _plan(app, spec, query_string)
+        except BadRequest:
+            assert "sort=" in query_string, "a filter must be accepted with its default sort"
+            return # Refused: no single index serves this filter in this order
+    steps = "; ".join(plan)
+    assert not TEMP_SORT.search(steps), steps
+    # An unfiltered list walks its sort index (or the rowid) and stops after one page
+    assert unfiltered or not TABLE_SCAN.search(steps), steps
+
+
+@pytest.mark.parametrize("query_string", [
+    "scheduled_at[gte]=2030-01-01T00:00:00&sort=id", "status=pending&sort=id", "status[ne]=pending",
+])
+def test_unserved_pairs_are_refused(app, query_string):
+    with app.test_request_context(f"/?{query_string}"):
+        with pytest.raises(BadRequest):
+            BOOKING_LIST.apply(BOOKING_LIST.model.query)
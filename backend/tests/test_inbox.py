@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from app import db
+from app.models import Notifications, Users
+from app.utils.inbox import mark_read, rebuild_unread_counts, unread_count
+
+EDITED = datetime(2030, 1, 1, 12, 0)
+
+
+def _updated_at(user_id):
+    db.session.expire_all()
+    return db.session.get(Users, user_id).updated_at
+
+
+def test_unread_counter_does_not_touch_updated_at(app):
+    # The counter is not a profile edit: ETag and Last-Modified must not move with it
+    with app.app_context():
+        user = Users(username="reader", email="reader@example.com", password="Secret123!")
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(Users.__table__.update().values(updated_at=EDITED))
+        db.session.commit()
+
+        db.session.add_all([Notifications(user_id=user.id, message=f"note {i}") for i in range(3)])
+        db.session.commit()
+        assert unread_count(user.id) == 3
+        assert _updated_at(user.id) == EDITED
+
+        notification = db.session.scalars(db.select(Notifications).limit(1)).one()
+        notification.is_read = True
+        db.session.commit()
+        assert unread_count(user.id) == 2
+        assert _updated_at(user.id) == EDITED
+
+        assert mark_read(user.id) == 2
+        assert rebuild_unread_counts() == 1
+        assert unread_count(user.id) == 0
+        assert _updated_at(user.id) == EDITED
@@ -0,0 +1,37 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+
+from app import db
+from app.models import Users
+from app.resources import notification
+from app.utils.sql_instrumentation import QueryBudgetExceeded
+
+
+@pytest.fixture
+def auth_headers(app):
+    with app.app_context():
+        user = Users(username="budget", email="budget@example.com", password="Secret123!")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_endpoint_within_budget(client, auth_headers):
+    response = client.get("/notifications/unread-count", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json() == {"unread": 0}
+
+
+def test_endpoint_over_budget_raises(client, auth_headers, monkeypatch):
+    # GET /notifications/unread-count is declared @query_budget(1); make it issue a second query
+    real_unread_count = notification.unread_count
+
+    def unread_count_with_extra_query(user_id):
+        db.session.execute(select(Users.id).where(Users.id == user_id))
+        return real_unread_count(user_id)
+
+    monkeypatch.setattr(notification, "unread_count", unread_count_with_extra_query)
+    with pytest.raises(QueryBudgetExceeded, match="issued 2 queries"):
+        client.get("/notifications/unread-count", headers=auth_headers)
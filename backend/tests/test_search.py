@@ -0,0 +1,34 @@
+import pytest
+
+from app import db
+from app.models import Service
+from app.utils.search import MAX_TERMS
+
+WORDS = [f"word{chr(97 + i // 26)}{chr(97 + i % 26)}" for i in range(70)]
+
+
+@pytest.fixture
+def indexed(app):
+    # One service whose description contains all 70 words
+    with app.app_context():
+        db.session.add(Service(name="Plumbing", description=" ".join(WORDS), base_price=10.0))
+        db.session.commit()
+
+
+def test_query_at_the_term_cap_runs(client, indexed):
+    response = client.get("/search", query_string={"q": " ".join(WORDS[:MAX_TERMS])})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.get_json()["items"]] == ["Plumbing"]
+
+
+@pytest.mark.parametrize("count", [MAX_TERMS + 1, 70])
+def test_query_over_the_term_cap_is_refused(client, indexed, count):
+    # 70 indexed words used to reach SQLite's 64-table join limit and fail with a 500
+    response = client.get("/search", query_string={"q": " ".join(WORDS[:count])})
+    assert response.status_code == 400
+    assert str(MAX_TERMS) in response.get_json()["message"]
+
+
+def test_repeated_words_count_once(client, indexed):
+    response = client.get("/search", query_string={"q": " ".join(WORDS[:2] * 20)})
+    assert response.status_code == 200
@@ -0,0 +1,69 @@
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Booking, BookingStatus, PricingModel, Service, UserRole, Users
+from app.schemas.booking import BookingSchema
+from app.schemas.service import ServiceSchema
+from app.schemas.user import UserSchema
+from app.utils import serializers
+from app.utils.serializers import serializer_for
+
+START = datetime(2030, 1, 1, 9, 30, 15, 250)
+
+
+def _users():
+    # Every enum member, and each nullable column both set and None
+    return [Users(
+        id=i, username=f"user{i}", email=f"user{i}@example.com", role=role,
+        firstname="First" if i % 2 else None, lastname=None, gender="Other", phone=None if i % 2 else "+231770000000",
+        is_verified=bool(i % 2), is_active=True, address=None, timestamp=START, updated_at=START + timedelta(seconds=i),
+        last_login_at=START if i % 2 else None, notifications_seen_at=None if i % 2 else START,
+        email_verified_at=START, phone_verified_at=None,
+    ) for i, role in enumerate(UserRole, start=1)]
+
+
+def _bookings():
+    return [Booking(
+        id=i, user_id=i, provider_id=None if i % 2 else 3, service_id=7, status=status,
+        scheduled_at=START + timedelta(minutes=15 * i), street_address="1 Broad St", city="Monrovia",
+        state=None, zip_code="1000" if i % 2 else None, latitude=6.3, longitude=None, notes="Ring twice",
+        total_cost=10.5 * i, created_at=START, updated_at=None if i % 2 else START,
+    ) for i, status in enumerate(BookingStatus, start=1)]
+
+
+def _services():
+    return [Service(
+        id=i, name=f"Service {i}", description=None if i % 2 else "Description", category_id=None if i % 2 else 4,
+        pricing_model=model, base_price=12.25 * i, unit_label="sq m", estimated_duration=None if i % 2 else 60,
+        requires_materials=False, has_add_ons=True, is_active=True, created_at=START, updated_at=START,
+    ) for i, model in enumerate(PricingModel, start=1)]
+
+
+@pytest.mark.parametrize("schema_cls, build", [
+    (UserSchema, _users), (BookingSchema, _bookings), (ServiceSchema, _services),
+])
+def test_compiled_dump_matches_marshmallow(app, schema_cls, build):
+    with app.app_context():
+        objects = build()
+        expected = json.dumps(schema_cls(many=True).dump(objects))
+        assert json.dumps(serializer_for(schema_cls, many=True).dump(objects)) == expected
+        for obj in objects:
+            assert json.dumps(serializer_for(schema_cls).dump(obj)) == json.dumps(schema_cls().dump(obj))
+
+
+def test_sparse_variants_are_bounded(app, monkeypatch):
+    # ?fields= subsets are client-chosen; only the most recently used ones stay compiled
+    monkeypatch.setattr(serializers, "SPARSE_CACHE_SIZE", 4)
+    monkeypatch.setattr(serializers, "_sparse", OrderedDict())
+    names = list(UserSchema().dump_fields)
+    variants = [tuple(names[:i]) for i in range(1, 9)]
+    with app.app_context():
+        for only in variants:
+            serializer_for(UserSchema, only=only)
+        assert len(serializers._sparse) == 4
+        assert serializer_for(UserSchema, only=variants[-1]) is serializer_for(UserSchema, only=variants[-1])
+        user = _users()[0]
+        assert serializer_for(UserSchema, only=variants[1]).dump(user) == UserSchema(only=variants[1]).dump(user)
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, time as clock, timedelta
+
+import pytest
+
+from app import db
+from app.models import Booking, ProviderSchedule, ProviderService, Service, Users
+from app.utils import surge
+from app.utils.surge import DemandModel
+
+
+@pytest.fixture
+def model(app, monkeypatch):
+    # Surges from the first booked hour on, so one booking is enough to move the price
+    model = DemandModel(window_days=28, horizon_days=14, refresh_interval=0, threshold=0.0, max_multiplier=5.0)
+    monkeypatch.setattr(surge, "demand_model", model)
+    return model
+
+
+def _wait_for_first_refresh(model):
+    deadline = time.monotonic() + 10
+    while model._refreshed_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert model._refreshed_at is not None
+
+
+def test_committed_future_booking_moves_the_multiplier(app, model):
+    tomorrow = datetime.utcnow().date() + timedelta(days=1)
+    slot = datetime.combine(tomorrow, clock(10))
+    with app.app_context():
+        db.session.add(Users(username="surge", email="surge@example.com", password="Secret123!"))
+        db.session.add(Service(name="Cleaning", base_price=10.0, estimated_duration=60))
+        db.session.add(ProviderService(provider_id=1, service_id=1))
+        db.session.add(ProviderSchedule(provider_id=1, available_date=tomorrow, start_time=clock(9), end_time=clock(17)))
+        db.session.commit()
+
+        assert model.multiplier("Monrovia", 1, slot) == 1.0 # Starts this worker's refresher
+        _wait_for_first_refresh(model)
+        assert model.multiplier("Monrovia", 1, slot) == 1.0
+
+        db.session.add(Booking(
+            user_id=1, service_id=1, provider_id=1, scheduled_at=slot,
+            street_address="1 Test St", city="Monrovia", total_cost=10.0,
+        ))
+        db.session.commit()
+
+        # One provider-hour booked out of one scheduled: utilization 1.0, counted on commit
+        assert model.multiplier("Monrovia", 1, slot) == 2.0
+        assert model.multiplier("Monrovia", 1, slot + timedelta(hours=1)) == 1.0